@@ -89,46 +89,46 @@ export const BulkRescheduleModal: React.FC<BulkRescheduleModalProps> = ({
         return;
       }
 
-      // Reschedule each appointment
-      const results = await Promise.allSettled(
-        impactedAppointments.map(async (apt: any) => {
-          let timeSlot = apt.timeSlot || apt.appointmentTime;
-          
-          // If auto_assign mode, find next available slot
-          if (rescheduleMode === 'auto_assign' && availableSlots.length > 0) {
-            // Try to find same time slot first
-            const sameSlot = availableSlots.find(slot => slot === timeSlot);
-            if (!sameSlot) {
-              // Use first available slot
-              timeSlot = availableSlots[0];
-            }
-          }
-
-          const response = await fetch(`/api/appointments/${apt.id}/reschedule`, {
-            method: 'PATCH',
-            headers: {
-              Authorization: `Bearer ${token}`,
-              'Content-Type': 'application/json',
-            },
-            body: JSON.stringify({
-              appointmentDate: rescheduleDate,
-              appointmentTime: timeSlot?.split('-')[0] || '09:00',
-              timeSlot: timeSlot || availableSlots[0],
-              rescheduleReason: `Bulk reschedule due to doctor leave on ${leaveDate}`,
-            }),
-          });
-
-          if (!response.ok) {
-            const error = await response.json();
-            throw new Error(error.message || 'Failed to reschedule');
+      // Pick the target slot for each appointment, then reschedule them in one request
+      const items = impactedAppointments.map((apt: any) => {
+        let timeSlot = apt.timeSlot || apt.appointmentTime;
+
+        // If auto_assign mode, find next available slot
+        if (rescheduleMode === 'auto_assign' && availableSlots.length > 0) {
+          // Try to find same time slot first
+          const sameSlot = availableSlots.find(slot => slot === timeSlot);
+          if (!sameSlot) {
+            // Use first available slot
+            timeSlot = availableSlots[0];
           }
+        }
 
-          return response.json();
-        })
-      );
+        return {
+          appointmentId: apt.id,
+          appointmentDate: rescheduleDate,
+          appointmentTime: timeSlot?.split('-')[0] || '09:00',
+          timeSlot: timeSlot || availableSlots[0],
+        };
+      });
+
+      const response = await fetch('/api/appointments/reschedule-bulk', {
+        method: 'POST',
+        headers: {
+          Authorization: `Bearer ${token}`,
+          'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({
+          items,
+          rescheduleReason: `Bulk reschedule due to doctor leave on ${leaveDate}`,
+        }),
+      });
+
+      if (!response.ok) {
+        const error = await response.json();
+        throw new Error(error.message || 'Failed to reschedule');
+      }
 
-      const successful = results.filter(r => r.status === 'fulfilled').length;
-      const failed = results.filter(r => r.status === 'rejected').length;
+      const { successful, failed } = await response.json();
 
       if (successful > 0) {
         message.success(`Successfully rescheduled ${successful} appointment(s)`);
@@ -79,8 +79,16 @@ export const BedOccupancyMap: React.FC<BedOccupancyMapProps> = ({
   }, [structure]);
 
   // Get bed with patient info (defined before useMemo that uses it)
+  const encountersByBedId = useMemo(() => {
+    const byBed = new Map<number, any>();
+    encounters.forEach((e: any) => {
+      if (e.currentBedId != null && !byBed.has(e.currentBedId)) byBed.set(e.currentBedId, e);
+    });
+    return byBed;
+  }, [encounters]);
+
   const getBedWithPatient = (bed: Bed) => {
-    const encounter = encounters.find((e: any) => e.currentBedId === bed.id);
+    const encounter = encountersByBedId.get(bed.id);
     return {
       bed,
       encounter,
@@ -138,11 +146,15 @@ export const BedOccupancyMap: React.FC<BedOccupancyMapProps> = ({
       >
     > = {};
 
+    const roomsById = new Map(structure.rooms.map((r) => [r.id, r]));
+    const wardsById = new Map(structure.wards.map((w) => [w.id, w]));
+    const roomGroups = new Map<number, { room: any; beds: Array<{ bed: Bed; encounter?: IpdEncounter; patient?: any }> }>();
+
     structure.beds.forEach((bed) => {
-      const room = structure.rooms.find((r) => r.id === bed.roomId);
+      const room = roomsById.get(bed.roomId);
       if (!room) return;
 
-      const ward = structure.wards.find((w) => w.id === room.wardId);
+      const ward = wardsById.get(room.wardId);
       if (!ward) return;
 
       const floorId = ward.floorId || 0; // Use 0 for no floor
@@ -154,21 +166,20 @@ export const BedOccupancyMap: React.FC<BedOccupancyMapProps> = ({
         organized[floorId][ward.id] = [];
       }
 
-      const roomGroup = organized[floorId][ward.id].find((g: any) => g.room.id === room.id);
+      const roomGroup = roomGroups.get(room.id);
       const bedWithPatient = getBedWithPatient(bed);
 
       if (roomGroup) {
         roomGroup.beds.push(bedWithPatient);
       } else {
-        organized[floorId][ward.id].push({
-          room,
-          beds: [bedWithPatient],
-        });
+        const group = { room, beds: [bedWithPatient] };
+        roomGroups.set(room.id, group);
+        organized[floorId][ward.id].push(group);
       }
     });
 
     return organized;
-  }, [structure, encounters]);
+  }, [structure, encountersByBedId]);
 
   if (structureLoading || encountersLoading) {
     return (
@@ -8,6 +8,7 @@ import {
   UnorderedListOutlined,
 } from '@ant-design/icons';
 import { useQuery, useQueryClient } from '@tanstack/react-query';
+import { QUEUE_FALLBACK_REFETCH_MS, useQueueEvents } from '../../hooks/use-queue-events';
 import { QueueItem } from './QueueItem';
 import type { OpdQueueEntry } from '../../types/queue';
 import dayjs from 'dayjs';
@@ -29,7 +30,7 @@ export const NowServingWidget: React.FC<NowServingWidgetProps> = ({
 
   // Fetch queue for doctor
   const {
-    data: queueData = [],
+    data: queueResponse,
     isLoading,
     refetch,
   } = useQuery({
@@ -41,15 +42,22 @@ export const NowServingWidget: React.FC<NowServingWidgetProps> = ({
       });
       if (!response.ok) throw new Error('Failed to fetch queue');
       const data = await response.json();
-      return data.map((item: any) => ({
+      // Same cache shape as QueuePanel (shared query key): { queue, notYetCheckedIn }
+      const items = Array.isArray(data) ? data : data.queue || [];
+      const queue = items.map((item: any) => ({
         ...item.queue,
         appointment: item.appointment,
         patient: item.patient,
         doctor: item.doctor,
+        estimatedWaitMinutes: item.estimatedWaitMinutes ?? null,
       }));
+      return { queue, notYetCheckedIn: Array.isArray(data) ? [] : data.notYetCheckedIn || [] };
     },
-    refetchInterval: 3000, // Auto-refresh every 3 seconds
+    refetchInterval: QUEUE_FALLBACK_REFETCH_MS, // Live updates come from useQueueEvents
   });
+  useQueueEvents(doctorId, queueDate);
+
+  const queueData = queueResponse?.queue ?? [];
 
   const handleStart = async (queueEntryId: number) => {
     try {
@@ -225,7 +233,7 @@ export const NowServingWidget: React.FC<NowServingWidgetProps> = ({
         width={400}
       >
         <List
-          dataSource={queueData.sort((a: OpdQueueEntry, b: OpdQueueEntry) => a.position - b.position)}
+          dataSource={queueData}
           renderItem={(item: OpdQueueEntry) => (
             <List.Item>
               <QueueItem
@@ -8,8 +8,9 @@ import {
   ArrowDownOutlined,
   CloseCircleOutlined,
   CheckCircleOutlined,
+  ClockCircleOutlined,
 } from '@ant-design/icons';
-import type { OpdQueueEntry } from '../../../types/queue';
+import type { OpdQueueEntry } from '../../types/queue';
 
 const { Text } = Typography;
 
@@ -106,6 +107,11 @@ export const QueueItem: React.FC<QueueItemProps> = ({
               #{queueEntry.tokenNumber}
             </Text>
             <Tag color={getStatusColor(queueEntry.status)}>{getStatusLabel(queueEntry.status)}</Tag>
+            {queueEntry.estimatedWaitMinutes != null && (
+              <Text type="secondary">
+                <ClockCircleOutlined /> ~{queueEntry.estimatedWaitMinutes} min
+              </Text>
+            )}
           </Space>
           {showActions && isReceptionist && queueEntry.status === 'waiting' && (
             <Space>
@@ -2,6 +2,7 @@ import React, { useState, useEffect } from 'react';
 import { Card, List, Select, Space, Button, Typography, Empty, Spin, message } from 'antd';
 import { ReloadOutlined, UserOutlined } from '@ant-design/icons';
 import { useQuery, useQueryClient } from '@tanstack/react-query';
+import { QUEUE_FALLBACK_REFETCH_MS, useQueueEvents } from '../../hooks/use-queue-events';
 import { QueueItem } from './QueueItem';
 import type { OpdQueueEntry } from '../../types/queue';
 import dayjs from 'dayjs';
@@ -70,12 +71,14 @@ export const QueuePanel: React.FC<QueuePanelProps> = ({
         appointment: item.appointment,
         patient: item.patient,
         doctor: item.doctor,
+        estimatedWaitMinutes: item.estimatedWaitMinutes ?? null,
       }));
       return { queue, notYetCheckedIn: data.notYetCheckedIn || [] };
     },
     enabled: !!selectedDoctorId,
-    refetchInterval: 5000,
+    refetchInterval: QUEUE_FALLBACK_REFETCH_MS,
   });
+  useQueueEvents(selectedDoctorId, selectedDate);
 
   const queueData = queueResponse?.queue ?? [];
   const notYetCheckedIn = queueResponse?.notYetCheckedIn ?? [];
@@ -196,10 +199,11 @@ export const QueuePanel: React.FC<QueuePanelProps> = ({
 
   const handleReorder = async (queueEntryId: number, direction: 'up' | 'down') => {
     try {
-      const entry = queueData.find((e: OpdQueueEntry) => e.id === queueEntryId);
-      if (!entry) return;
+      // The API takes the 1-based rank in the queue as served (manual order once reordered)
+      const rank = queueData.findIndex((e: OpdQueueEntry) => e.id === queueEntryId) + 1;
+      if (rank === 0) return;
 
-      const newPosition = direction === 'up' ? entry.position - 1 : entry.position + 1;
+      const newPosition = direction === 'up' ? rank - 1 : rank + 1;
       if (newPosition < 1 || newPosition > queueData.length) return;
 
       const token = localStorage.getItem('auth-token');
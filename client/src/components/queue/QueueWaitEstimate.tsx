@@ -0,0 +1,49 @@
+import React from 'react';
+import { Typography } from 'antd';
+import { ClockCircleOutlined } from '@ant-design/icons';
+import { useQuery } from '@tanstack/react-query';
+
+const { Text } = Typography;
+
+// Estimates are computed per minute on the server
+const WAIT_REFETCH_MS = 60_000;
+
+interface QueueStatus {
+  checkedIn: boolean;
+  status?: string | null;
+  tokenIdentifier?: string | null;
+  patientsAhead?: number | null;
+  estimatedWaitMinutes?: number | null;
+}
+
+interface QueueWaitEstimateProps {
+  appointmentId: number;
+}
+
+/**
+ * Patient-facing place in line and estimated wait for a checked-in appointment
+ * (GET /api/opd-queue/appointment/:appointmentId). Renders nothing until there is an estimate.
+ */
+export const QueueWaitEstimate: React.FC<QueueWaitEstimateProps> = ({ appointmentId }) => {
+  const { data } = useQuery<QueueStatus>({
+    queryKey: ['/api/opd-queue/appointment', appointmentId],
+    queryFn: async () => {
+      const token = localStorage.getItem('auth-token');
+      const response = await fetch(`/api/opd-queue/appointment/${appointmentId}`, {
+        headers: { Authorization: `Bearer ${token}` },
+      });
+      if (!response.ok) throw new Error('Failed to fetch queue status');
+      return response.json();
+    },
+    refetchInterval: WAIT_REFETCH_MS,
+  });
+
+  if (!data?.checkedIn || data.estimatedWaitMinutes == null) return null;
+
+  return (
+    <Text type="secondary" style={{ fontSize: '11px', display: 'block', marginTop: '4px' }}>
+      <ClockCircleOutlined /> ~{data.estimatedWaitMinutes} min wait
+      {data.patientsAhead != null && ` · ${data.patientsAhead} ahead of you`}
+    </Text>
+  );
+};
@@ -0,0 +1,42 @@
+import { useEffect } from 'react';
+import { useQueryClient } from '@tanstack/react-query';
+import { applyQueueDiff, subscribeToQueueEvents } from '../lib/queue-events';
+
+// Polling only backs up the event stream (e.g. after it gave up reconnecting).
+export const QUEUE_FALLBACK_REFETCH_MS = 60_000;
+
+/**
+ * Keep the cached queue for a doctor/date (['/api/opd-queue/doctor', doctorId, queueDate])
+ * in sync from /api/events/queue: upsert/remove diffs patch the cache, anything that cannot
+ * be patched (new entries, reset, resync) refetches it.
+ * The cache may hold the rows array or { queue, notYetCheckedIn }.
+ */
+export function useQueueEvents(doctorId: number | undefined, queueDate: string) {
+  const queryClient = useQueryClient();
+
+  useEffect(() => {
+    if (!doctorId) return;
+    const queryKey = ['/api/opd-queue/doctor', doctorId, queueDate];
+    const refetch = () => queryClient.invalidateQueries({ queryKey });
+
+    return subscribeToQueueEvents(
+      { doctorId, queueDate },
+      {
+        onEvent: (evt) => {
+          let patched = false;
+          queryClient.setQueryData(queryKey, (current: any) => {
+            if (!current) return current;
+            const rows = Array.isArray(current) ? current : current.queue ?? [];
+            const next = applyQueueDiff(rows, evt.diff);
+            if (!next) return current;
+            patched = true;
+            return Array.isArray(current) ? next : { ...current, queue: next };
+          });
+          // A check-in also changes the not-yet-checked-in list
+          if (!patched || evt.action === 'checked-in') refetch();
+        },
+        onResync: refetch,
+      },
+    );
+  }, [doctorId, queueDate, queryClient]);
+}
@@ -0,0 +1,142 @@
+export type QueueEventDiff =
+  | { op: "upsert"; index: number; entry: Record<string, any>; appointmentStatus: string | null }
+  | { op: "remove"; id: number }
+  | { op: "reset" };
+
+export type QueueEvent = {
+  id: number;
+  type: "queue.changed";
+  action: string;
+  hospitalId: number;
+  doctorId: number;
+  queueDate: string;
+  queueEntryId: number | null;
+  diff: QueueEventDiff;
+  occurredAt: string;
+};
+
+type Handlers = {
+  onEvent: (evt: QueueEvent) => void;
+  // The server could not replay what was missed (or this is a fresh reconnect): refetch the queue
+  onResync: () => void;
+  onError?: (err: unknown) => void;
+};
+
+/**
+ * Subscribe to server-sent OPD queue diffs for one doctor/date (SSE).
+ * Reconnects resume from the last event id received; uses query-param token because
+ * EventSource cannot set Authorization headers.
+ */
+export function subscribeToQueueEvents(filter: { doctorId: number; queueDate: string }, handlers: Handlers) {
+  const token = localStorage.getItem("auth-token");
+  if (!token) return () => {};
+
+  let closed = false;
+  let es: EventSource | null = null;
+  let retryTimer: number | null = null;
+  let retryCount = 0;
+  let lastEventId: string | null = null;
+  let connectedBefore = false;
+  const MAX_RETRIES = 5;
+  const MAX_RETRY_DELAY = 30000; // 30 seconds max delay
+
+  const connect = () => {
+    if (closed) return;
+
+    // Stop retrying after max attempts; callers keep a slow polling fallback
+    if (retryCount >= MAX_RETRIES) {
+      console.warn('⚠️ SSE: Max retry attempts reached for queue events. Stopping connection attempts.');
+      return;
+    }
+
+    const params = new URLSearchParams({
+      token,
+      doctorId: String(filter.doctorId),
+      queueDate: filter.queueDate,
+    });
+    if (lastEventId) params.set("lastEventId", lastEventId);
+
+    try {
+      es = new EventSource(`/api/events/queue?${params.toString()}`);
+
+      es.onopen = () => {
+        retryCount = 0;
+      };
+
+      es.onmessage = (msg) => {
+        try {
+          if (msg.lastEventId) lastEventId = msg.lastEventId;
+          const data = JSON.parse(msg.data || "{}");
+          if (data?.type === "queue.changed") {
+            handlers.onEvent(data as QueueEvent);
+          } else if (data?.type === "queue.resync") {
+            handlers.onResync();
+          } else if (data?.type === "connected") {
+            // A fresh (non-resumed) stream after a drop may have missed changes
+            if (connectedBefore) handlers.onResync();
+            connectedBefore = true;
+          }
+        } catch (e) {
+          // ignore bad messages
+        }
+      };
+
+      es.onerror = (e) => {
+        handlers.onError?.(e);
+
+        try {
+          es?.close();
+        } catch {}
+        es = null;
+
+        if (closed) return;
+
+        retryCount++;
+        const delay = Math.min(1500 * Math.pow(2, retryCount - 1), MAX_RETRY_DELAY);
+        retryTimer = window.setTimeout(() => {
+          connect();
+        }, delay);
+      };
+    } catch (error) {
+      console.error('❌ SSE: Failed to create queue EventSource:', error);
+      if (!closed && retryCount < MAX_RETRIES) {
+        retryCount++;
+        const delay = Math.min(1500 * Math.pow(2, retryCount - 1), MAX_RETRY_DELAY);
+        retryTimer = window.setTimeout(() => {
+          connect();
+        }, delay);
+      }
+    }
+  };
+
+  connect();
+
+  return () => {
+    closed = true;
+    if (retryTimer) window.clearTimeout(retryTimer);
+    try {
+      es?.close();
+    } catch {}
+  };
+}
+
+/**
+ * Apply one diff to flattened queue rows ({ ...queue, appointment, patient, doctor }).
+ * Returns null when the rows cannot be patched locally (a new entry needs its joined rows).
+ */
+export function applyQueueDiff<T extends { id: number; appointment?: any }>(rows: T[], diff: QueueEventDiff): T[] | null {
+  if (diff.op === "remove") return rows.filter((row) => row.id !== diff.id);
+  if (diff.op !== "upsert") return null;
+
+  const existing = rows.find((row) => row.id === diff.entry.id);
+  if (!existing) return null;
+
+  const updated = {
+    ...existing,
+    ...diff.entry,
+    appointment: existing.appointment ? { ...existing.appointment, status: diff.appointmentStatus } : existing.appointment,
+  } as T;
+  const next = rows.filter((row) => row.id !== existing.id);
+  next.splice(Math.min(diff.index, next.length), 0, updated);
+  return next;
+}
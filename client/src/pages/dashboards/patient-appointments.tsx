@@ -52,6 +52,7 @@ import { getISTNow, getISTStartOfDay, isSameDayIST, toIST } from '../../lib/time
 import { PrescriptionPreview } from '../../components/prescription/PrescriptionPreview';
 import LabReportViewerModal from '../../components/modals/lab-report-viewer-modal';
 import BookAppointmentModal from '../../components/modals/BookAppointmentModal';
+import { QueueWaitEstimate } from '../../components/queue/QueueWaitEstimate';
 
 const { Content, Sider } = Layout;
 const { Title, Text } = Typography;
@@ -922,6 +923,7 @@ export default function PatientAppointments() {
             <Tag color={getStatusColor(effectiveStatus)}>
               {effectiveStatus.toUpperCase()}
             </Tag>
+            {effectiveStatus === 'checked-in' && <QueueWaitEstimate appointmentId={record.id} />}
             {rescheduleRequest && (
               <Tag 
                 color={
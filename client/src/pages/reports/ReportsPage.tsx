@@ -154,10 +154,10 @@ export default function ReportsPage({ hospitalId }: ReportsPageProps) {
   });
 
   // Export handler
-  const handleExport = async (type: string) => {
+  const handleExport = async (type: string, format: 'csv' | 'xlsx' = 'csv') => {
     try {
       const token = localStorage.getItem('auth-token');
-      let params = new URLSearchParams();
+      let params = new URLSearchParams({ format });
       
       switch (type) {
         case 'opd':
@@ -185,7 +185,7 @@ export default function ReportsPage({ hospitalId }: ReportsPageProps) {
       const url = window.URL.createObjectURL(blob);
       const a = document.createElement('a');
       a.href = url;
-      a.download = response.headers.get('Content-Disposition')?.split('filename=')[1]?.replace(/"/g, '') || `${type}-report.csv`;
+      a.download = response.headers.get('Content-Disposition')?.split('filename=')[1]?.replace(/"/g, '') || `${type}-report.${format}`;
       document.body.appendChild(a);
       a.click();
       window.URL.revokeObjectURL(url);
@@ -523,6 +523,12 @@ export default function ReportsPage({ hospitalId }: ReportsPageProps) {
                       >
                         Export CSV
                       </Button>
+                      <Button
+                        icon={<DownloadOutlined />}
+                        onClick={() => handleExport('opd', 'xlsx')}
+                      >
+                        Export XLSX
+                      </Button>
                     </Space>
                   </Card>
 
@@ -619,6 +625,12 @@ export default function ReportsPage({ hospitalId }: ReportsPageProps) {
                       >
                         Export CSV
                       </Button>
+                      <Button
+                        icon={<DownloadOutlined />}
+                        onClick={() => handleExport('lab', 'xlsx')}
+                      >
+                        Export XLSX
+                      </Button>
                     </Space>
                   </Card>
 
@@ -716,6 +728,12 @@ export default function ReportsPage({ hospitalId }: ReportsPageProps) {
                       >
                         Export CSV
                       </Button>
+                      <Button
+                        icon={<DownloadOutlined />}
+                        onClick={() => handleExport('finance', 'xlsx')}
+                      >
+                        Export XLSX
+                      </Button>
                     </Space>
                   </Card>
 
@@ -15,6 +15,7 @@ export interface OpdQueueEntry {
   notes: string | null;
   createdAt: string;
   updatedAt: string | null;
+  estimatedWaitMinutes?: number | null; // null once the patient is no longer waiting
   appointment?: {
     id: number;
     reason: string;
@@ -0,0 +1,4 @@
+-- Revenue KPI card (getRevenueStats): one grouped query over a hospital's invoices and their payments.
+-- INCLUDE lets the per-invoice payment lookup answer SUM(amount) by bucket from the index alone.
+CREATE INDEX IF NOT EXISTS "idx_invoices_hospital_id" ON "invoices" ("hospital_id");
+CREATE INDEX IF NOT EXISTS "idx_payments_invoice_received_at" ON "payments" ("invoice_id", "received_at") INCLUDE ("amount", "created_at");
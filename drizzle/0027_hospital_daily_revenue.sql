@@ -0,0 +1,56 @@
+-- Daily revenue rollup per (hospital, day, source, method); maintained by billing.service on
+-- every payment/refund. Source classification matches revenue.service#getRevenueTransactions.
+CREATE TABLE IF NOT EXISTS "hospital_daily_revenue" (
+  "hospital_id" integer NOT NULL REFERENCES "hospitals"("id"),
+  "day" text NOT NULL, -- YYYY-MM-DD
+  "source" text NOT NULL,
+  "method" text NOT NULL,
+  "collected_amount" numeric(12, 2) DEFAULT '0' NOT NULL,
+  "payment_count" integer DEFAULT 0 NOT NULL,
+  "refunded_amount" numeric(12, 2) DEFAULT '0' NOT NULL,
+  "refund_count" integer DEFAULT 0 NOT NULL,
+  "updated_at" timestamp DEFAULT NOW(),
+  PRIMARY KEY ("hospital_id", "day", "source", "method")
+);
+
+-- Invoice date-range reads in analytics/reporting
+CREATE INDEX IF NOT EXISTS "idx_invoices_hospital_created_at" ON "invoices" ("hospital_id", "created_at");
+
+-- Backfill (same as `npm run db:rebuild-daily-revenue`)
+DELETE FROM "hospital_daily_revenue";
+INSERT INTO "hospital_daily_revenue"
+  (hospital_id, day, source, method, collected_amount, payment_count, refunded_amount, refund_count, updated_at)
+SELECT hospital_id, day, source, method,
+  SUM(collected_amount), SUM(payment_count), SUM(refunded_amount), SUM(refund_count), NOW()
+FROM (
+  SELECT i.hospital_id,
+    to_char(COALESCE(p.received_at, p.created_at, NOW()), 'YYYY-MM-DD') AS day,
+    CASE
+      WHEN i.appointment_id IS NOT NULL THEN 'appointment'
+      WHEN EXISTS (SELECT 1 FROM invoice_items ii WHERE ii.invoice_id = i.id AND ii.type LIKE '%lab%') THEN 'test'
+      WHEN EXISTS (SELECT 1 FROM invoice_items ii WHERE ii.invoice_id = i.id
+        AND (ii.type LIKE '%pharmacy%' OR ii.type LIKE '%medicine%' OR ii.type LIKE '%medication%')) THEN 'pharmacy'
+      WHEN EXISTS (SELECT 1 FROM invoice_items ii WHERE ii.invoice_id = i.id AND ii.type LIKE '%consultation%') THEN 'appointment'
+      ELSE 'opd'
+    END AS source,
+    p.method AS method,
+    p.amount AS collected_amount, 1 AS payment_count, 0 AS refunded_amount, 0 AS refund_count
+  FROM payments p
+  JOIN invoices i ON i.id = p.invoice_id
+  UNION ALL
+  SELECT i.hospital_id,
+    to_char(COALESCE(r.processed_at, r.created_at, NOW()), 'YYYY-MM-DD'),
+    CASE
+      WHEN i.appointment_id IS NOT NULL THEN 'appointment'
+      WHEN EXISTS (SELECT 1 FROM invoice_items ii WHERE ii.invoice_id = i.id AND ii.type LIKE '%lab%') THEN 'test'
+      WHEN EXISTS (SELECT 1 FROM invoice_items ii WHERE ii.invoice_id = i.id
+        AND (ii.type LIKE '%pharmacy%' OR ii.type LIKE '%medicine%' OR ii.type LIKE '%medication%')) THEN 'pharmacy'
+      WHEN EXISTS (SELECT 1 FROM invoice_items ii WHERE ii.invoice_id = i.id AND ii.type LIKE '%consultation%') THEN 'appointment'
+      ELSE 'opd'
+    END,
+    'unknown',
+    0, 0, r.amount, 1
+  FROM refunds r
+  JOIN invoices i ON i.id = r.invoice_id
+) AS t
+GROUP BY hospital_id, day, source, method;
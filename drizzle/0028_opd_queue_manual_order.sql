@@ -0,0 +1,8 @@
+-- Doctor/date queues that staff have reordered by hand; these are ranked by opd_queue_entries.position
+-- instead of the computed slot + arrival order.
+CREATE TABLE IF NOT EXISTS "opd_queue_manual_order" (
+  "doctor_id" integer NOT NULL REFERENCES "doctors"("id"),
+  "queue_date" text NOT NULL,
+  "updated_at" timestamp DEFAULT NOW(),
+  PRIMARY KEY ("doctor_id", "queue_date")
+);
@@ -0,0 +1,87 @@
+// scripts/check-queue-order.ts
+// Check that manual queue moves show up in the served queue order: a row moved with
+// reorderQueue / applyQueueOrder must come back at its new index from getQueueForDoctor.
+// The queue's order keys and manual-order flag are restored afterwards.
+//
+// Usage:
+//   npm run check-queue-order -- --doctor=12 --date=2026-10-17
+import { db } from '../server/db.js';
+import { opdQueueEntries, opdQueueManualOrder } from '../shared/schema.js';
+import { and, eq, sql } from 'drizzle-orm';
+import { applyQueueOrder, getQueueForDoctor, reorderQueue } from '../server/services/queue.service.js';
+import { reloadLiveQueue } from '../server/services/opd-queue-live.js';
+
+const arg = (name: string) => process.argv.find((a) => a.startsWith(`--${name}=`))?.split('=')[1];
+
+const doctorId = parseInt(arg('doctor') || '', 10);
+const queueDate = arg('date') || '';
+
+if (!doctorId || !/^\d{4}-\d{2}-\d{2}$/.test(queueDate)) {
+  console.error('❌ Usage: check-queue-order --doctor=ID --date=YYYY-MM-DD');
+  process.exit(1);
+}
+
+const servedIds = async () => (await getQueueForDoctor(doctorId, queueDate)).map((row) => row.queue.id);
+
+const expectOrder = (label: string, actual: number[], expected: number[]) => {
+  if (actual.join(',') !== expected.join(',')) {
+    throw new Error(`${label}: expected [${expected.join(', ')}], got [${actual.join(', ')}]`);
+  }
+  console.log(`✅ ${label}`);
+};
+
+const main = async () => {
+  const queueFilter = and(eq(opdQueueEntries.doctorId, doctorId), eq(opdQueueEntries.queueDate, queueDate));
+  const original = await db
+    .select({ id: opdQueueEntries.id, position: opdQueueEntries.position })
+    .from(opdQueueEntries)
+    .where(queueFilter);
+  if (original.length < 2) {
+    throw new Error(`Queue for doctor ${doctorId} on ${queueDate} needs at least 2 entries (has ${original.length})`);
+  }
+  const [flag] = await db
+    .select({ doctorId: opdQueueManualOrder.doctorId })
+    .from(opdQueueManualOrder)
+    .where(and(eq(opdQueueManualOrder.doctorId, doctorId), eq(opdQueueManualOrder.queueDate, queueDate)));
+
+  try {
+    // Move the last served row to the front
+    const before = await servedIds();
+    const moved = before[before.length - 1];
+    await reorderQueue(moved, 1);
+    expectOrder('reorderQueue moves the row to index 0', await servedIds(), [moved, ...before.slice(0, -1)]);
+
+    // Move the (new) first row down one place
+    const afterMove = await servedIds();
+    await reorderQueue(afterMove[0], 2);
+    expectOrder('reorderQueue moves the row to index 1', await servedIds(), [afterMove[1], afterMove[0], ...afterMove.slice(2)]);
+
+    // Reverse the whole queue
+    const reversed = [...(await servedIds())].reverse();
+    await applyQueueOrder(doctorId, queueDate, reversed);
+    expectOrder('applyQueueOrder sets the served order', await servedIds(), reversed);
+  } finally {
+    await db.transaction(async (tx) => {
+      for (const entry of original) {
+        await tx
+          .update(opdQueueEntries)
+          .set({ position: entry.position, updatedAt: sql`NOW()` })
+          .where(eq(opdQueueEntries.id, entry.id));
+      }
+      if (!flag) {
+        await tx
+          .delete(opdQueueManualOrder)
+          .where(and(eq(opdQueueManualOrder.doctorId, doctorId), eq(opdQueueManualOrder.queueDate, queueDate)));
+      }
+    });
+    await reloadLiveQueue(doctorId, queueDate);
+    console.log('↩️  Restored original queue order');
+  }
+};
+
+main()
+  .then(() => process.exit(0))
+  .catch((err) => {
+    console.error('❌ Queue order check failed:', err);
+    process.exit(1);
+  });
@@ -0,0 +1,28 @@
+// scripts/rebuild-daily-revenue.ts
+// Rebuild the hospital_daily_revenue rollup from payments and refunds.
+//
+// Usage:
+//   npm run db:rebuild-daily-revenue                 # all hospitals
+//   npm run db:rebuild-daily-revenue -- --hospital=3 # one hospital
+import { rebuildHospitalDailyRevenue } from '../server/services/revenue-rollup.service.js';
+
+const hospitalArg = process.argv.find((arg) => arg.startsWith('--hospital='));
+const hospitalId = hospitalArg ? parseInt(hospitalArg.split('=')[1], 10) : undefined;
+
+if (hospitalArg && (!hospitalId || isNaN(hospitalId))) {
+  console.error('❌ --hospital must be a hospital id');
+  process.exit(1);
+}
+
+const main = async () => {
+  console.log(`📊 Rebuilding daily revenue rollup for ${hospitalId ? `hospital ${hospitalId}` : 'all hospitals'}...`);
+  const { rowCount } = await rebuildHospitalDailyRevenue(hospitalId);
+  console.log(`✅ hospital_daily_revenue rebuilt (${rowCount} rows)`);
+};
+
+main()
+  .then(() => process.exit(0))
+  .catch((err) => {
+    console.error('❌ Rebuild failed:', err);
+    process.exit(1);
+  });
@@ -87,6 +87,61 @@ async function ensureInvoicesMissingColumns() {
   }
 }
 
+async function ensureRevenueIndexes() {
+  try {
+    // Revenue KPI aggregation: hospital -> invoices -> payments (see drizzle/0026_revenue_stats_indexes.sql)
+    await sql.unsafe(`CREATE INDEX IF NOT EXISTS "idx_invoices_hospital_id" ON "invoices" ("hospital_id");`);
+    await sql.unsafe(`CREATE INDEX IF NOT EXISTS "idx_payments_invoice_received_at" ON "payments" ("invoice_id", "received_at") INCLUDE ("amount", "created_at");`);
+  } catch (e) {
+    console.warn('⚠️ Could not ensure revenue indexes (continuing):', e);
+  }
+}
+
+async function ensureHospitalDailyRevenueTable() {
+  try {
+    // See drizzle/0027_hospital_daily_revenue.sql; backfilled once when first created here
+    const [{ exists }] = await sql`SELECT to_regclass('public.hospital_daily_revenue') IS NOT NULL AS exists`;
+    await sql.unsafe(`
+      CREATE TABLE IF NOT EXISTS "hospital_daily_revenue" (
+        "hospital_id" integer NOT NULL REFERENCES "hospitals"("id"),
+        "day" text NOT NULL,
+        "source" text NOT NULL,
+        "method" text NOT NULL,
+        "collected_amount" numeric(12, 2) DEFAULT '0' NOT NULL,
+        "payment_count" integer DEFAULT 0 NOT NULL,
+        "refunded_amount" numeric(12, 2) DEFAULT '0' NOT NULL,
+        "refund_count" integer DEFAULT 0 NOT NULL,
+        "updated_at" timestamp DEFAULT NOW(),
+        PRIMARY KEY ("hospital_id", "day", "source", "method")
+      );
+    `);
+    await sql.unsafe(`CREATE INDEX IF NOT EXISTS "idx_invoices_hospital_created_at" ON "invoices" ("hospital_id", "created_at");`);
+    if (!exists) {
+      const { rebuildHospitalDailyRevenue } = await import('./services/revenue-rollup.service.js');
+      const { rowCount } = await rebuildHospitalDailyRevenue();
+      console.log(`📊 Backfilled hospital_daily_revenue (${rowCount} rows)`);
+    }
+  } catch (e) {
+    console.warn('⚠️ Could not ensure hospital_daily_revenue table (continuing):', e);
+  }
+}
+
+async function ensureOpdQueueManualOrderTable() {
+  try {
+    // See drizzle/0028_opd_queue_manual_order.sql
+    await sql.unsafe(`
+      CREATE TABLE IF NOT EXISTS "opd_queue_manual_order" (
+        "doctor_id" integer NOT NULL REFERENCES "doctors"("id"),
+        "queue_date" text NOT NULL,
+        "updated_at" timestamp DEFAULT NOW(),
+        PRIMARY KEY ("doctor_id", "queue_date")
+      );
+    `);
+  } catch (e) {
+    console.warn('⚠️ Could not ensure opd_queue_manual_order table (continuing):', e);
+  }
+}
+
 async function ensurePatientChatMessagesTable() {
   try {
     await sql.unsafe(`
@@ -109,4 +164,7 @@ console.log('🧩 DB target:', redactDbUrl(connectionString));
 void ensureAppointmentRescheduleColumns();
 void ensurePatientAgeReferenceColumns();
 void ensureInvoicesMissingColumns();
-void ensurePatientChatMessagesTable();
\ No newline at end of file
+void ensurePatientChatMessagesTable();
+void ensureRevenueIndexes();
+void ensureHospitalDailyRevenueTable();
+void ensureOpdQueueManualOrderTable();
\ No newline at end of file
@@ -1,7 +1,8 @@
 import { EventEmitter } from "events";
 import { db } from "../db.js";
-import { appointments, doctors, patients, users } from "../../drizzle/schema.js";
-import { eq } from "drizzle-orm";
+import { appointments, doctors, patients } from "../../drizzle/schema.js";
+import { inArray } from "drizzle-orm";
+import { LruCache } from "../utils/lru-cache.js";
 
 export type AppointmentEventAction =
   | "created"
@@ -20,6 +21,7 @@ export type AppointmentEvent = {
   hospitalId: number | null;
   doctorId: number | null;
   patientId: number | null;
+  appointmentDate: string | null;
   doctorUserId: number | null;
   patientUserId: number | null;
   occurredAt: string;
@@ -32,58 +34,97 @@ export function onAppointmentEvent(listener: (evt: AppointmentEvent) => void) {
   return () => emitter.off("appointment", listener);
 }
 
-async function resolveUserIds(appointmentRow: {
+// doctorId/patientId -> userId. The mapping practically never changes, so events skip the
+// lookups after first sight; doctors/patients services invalidate on profile updates.
+const USER_ID_CACHE_SIZE = 5000;
+const doctorUserIds = new LruCache<number, number>(USER_ID_CACHE_SIZE);
+const patientUserIds = new LruCache<number, number>(USER_ID_CACHE_SIZE);
+// Bumped on every invalidation so a lookup that raced it does not re-cache a stale mapping.
+let userIdGeneration = 0;
+
+export function invalidateDoctorUserId(doctorId: number) {
+  doctorUserIds.delete(doctorId);
+  userIdGeneration++;
+}
+
+export function invalidatePatientUserId(patientId: number) {
+  patientUserIds.delete(patientId);
+  userIdGeneration++;
+}
+
+type AppointmentRow = {
+  id: number;
+  status: string | null;
+  hospitalId: number | null;
   doctorId: number | null;
   patientId: number | null;
-}): Promise<{ doctorUserId: number | null; patientUserId: number | null }> {
-  let doctorUserId: number | null = null;
-  let patientUserId: number | null = null;
-
-  if (appointmentRow.doctorId) {
-    const [doc] = await db
-      .select({ userId: doctors.userId })
-      .from(doctors)
-      .where(eq(doctors.id, appointmentRow.doctorId))
-      .limit(1);
-    doctorUserId = doc?.userId ?? null;
+  appointmentDate: string | null;
+};
+
+/**
+ * Map doctor and patient ids to user ids, from cache where possible and with at most one
+ * doctors query and one patients query for the misses.
+ */
+async function resolveUserIds(rows: Array<{ doctorId: number | null; patientId: number | null }>) {
+  const generation = userIdGeneration;
+  const doctorMisses = new Set<number>();
+  const patientMisses = new Set<number>();
+  for (const row of rows) {
+    if (row.doctorId && !doctorUserIds.has(row.doctorId)) doctorMisses.add(row.doctorId);
+    if (row.patientId && !patientUserIds.has(row.patientId)) patientMisses.add(row.patientId);
   }
 
-  if (appointmentRow.patientId) {
-    const [pat] = await db
-      .select({ userId: patients.userId })
-      .from(patients)
-      .where(eq(patients.id, appointmentRow.patientId))
-      .limit(1);
-    patientUserId = pat?.userId ?? null;
+  const [docs, pats] = await Promise.all([
+    doctorMisses.size > 0
+      ? db
+          .select({ id: doctors.id, userId: doctors.userId })
+          .from(doctors)
+          .where(inArray(doctors.id, [...doctorMisses]))
+      : Promise.resolve([]),
+    patientMisses.size > 0
+      ? db
+          .select({ id: patients.id, userId: patients.userId })
+          .from(patients)
+          .where(inArray(patients.id, [...patientMisses]))
+      : Promise.resolve([]),
+  ]);
+
+  const fetchedDoctors = new Map<number, number>();
+  const fetchedPatients = new Map<number, number>();
+  for (const doc of docs) if (doc.userId != null) fetchedDoctors.set(doc.id, doc.userId);
+  for (const pat of pats) if (pat.userId != null) fetchedPatients.set(pat.id, pat.userId);
+  if (generation === userIdGeneration) {
+    fetchedDoctors.forEach((userId, id) => doctorUserIds.set(id, userId));
+    fetchedPatients.forEach((userId, id) => patientUserIds.set(id, userId));
   }
 
-  return { doctorUserId, patientUserId };
+  return {
+    doctorUserId: (doctorId: number | null) =>
+      doctorId ? fetchedDoctors.get(doctorId) ?? doctorUserIds.get(doctorId) ?? null : null,
+    patientUserId: (patientId: number | null) =>
+      patientId ? fetchedPatients.get(patientId) ?? patientUserIds.get(patientId) ?? null : null,
+  };
 }
 
-export async function emitAppointmentChanged(
-  appointmentId: number,
-  action: AppointmentEventAction
-) {
-  try {
-    const [apt] = await db
-      .select({
-        id: appointments.id,
-        status: appointments.status,
-        hospitalId: appointments.hospitalId,
-        doctorId: appointments.doctorId,
-        patientId: appointments.patientId,
-      })
-      .from(appointments)
-      .where(eq(appointments.id, appointmentId))
-      .limit(1);
-
-    if (!apt) return;
-
-    const { doctorUserId, patientUserId } = await resolveUserIds({
-      doctorId: apt.doctorId ?? null,
-      patientId: apt.patientId ?? null,
-    });
-
+const selectAppointmentRows = (appointmentIds: number[]): Promise<AppointmentRow[]> =>
+  db
+    .select({
+      id: appointments.id,
+      status: appointments.status,
+      hospitalId: appointments.hospitalId,
+      doctorId: appointments.doctorId,
+      patientId: appointments.patientId,
+      appointmentDate: appointments.appointmentDate,
+    })
+    .from(appointments)
+    .where(inArray(appointments.id, appointmentIds));
+
+async function emitForRows(rows: AppointmentRow[], action: AppointmentEventAction) {
+  if (rows.length === 0) return;
+  const userIds = await resolveUserIds(rows);
+  const occurredAt = new Date().toISOString();
+
+  for (const apt of rows) {
     const evt: AppointmentEvent = {
       type: "appointment.changed",
       action,
@@ -92,19 +133,41 @@ export async function emitAppointmentChanged(
       hospitalId: apt.hospitalId ?? null,
       doctorId: apt.doctorId ?? null,
       patientId: apt.patientId ?? null,
-      doctorUserId,
-      patientUserId,
-      occurredAt: new Date().toISOString(),
+      appointmentDate: apt.appointmentDate ?? null,
+      doctorUserId: userIds.doctorUserId(apt.doctorId ?? null),
+      patientUserId: userIds.patientUserId(apt.patientId ?? null),
+      occurredAt,
     };
-
     emitter.emit("appointment", evt);
+  }
+}
+
+export async function emitAppointmentChanged(
+  appointmentId: number,
+  action: AppointmentEventAction
+) {
+  try {
+    await emitForRows(await selectAppointmentRows([appointmentId]), action);
   } catch (e) {
     // Best-effort: events must never break the main request flow.
     console.error("❌ Failed to emit appointment event:", e);
   }
 }
 
-
-
-
-
+/**
+ * Emit one event per appointment for a bulk operation, with a single appointments query and
+ * a single user-id resolution for the whole batch.
+ */
+export async function emitAppointmentsChanged(
+  appointmentIds: number[],
+  action: AppointmentEventAction
+) {
+  const ids = [...new Set(appointmentIds)];
+  if (ids.length === 0) return;
+  try {
+    await emitForRows(await selectAppointmentRows(ids), action);
+  } catch (e) {
+    // Best-effort: events must never break the main request flow.
+    console.error("❌ Failed to emit appointment events:", e);
+  }
+}
@@ -0,0 +1,96 @@
+import { EventEmitter } from "events";
+import type { QueueDiff } from "../services/opd-queue-live.js";
+
+export type QueueEventAction =
+  | "checked-in"
+  | "called"
+  | "consultation-started"
+  | "consultation-completed"
+  | "no-show"
+  | "skipped"
+  | "reordered";
+
+/**
+ * Compact queue change: the queue entry's own columns (no joined rows) plus where it now sits.
+ * op "reset" means the receiver should refetch the queue.
+ */
+export type QueueEventDiff =
+  | { op: "upsert"; index: number; entry: Record<string, unknown>; appointmentStatus: string | null }
+  | { op: "remove"; id: number }
+  | { op: "reset" };
+
+export type QueueEvent = {
+  id: number; // SSE event id, increasing; used for Last-Event-ID resume
+  type: "queue.changed";
+  action: QueueEventAction;
+  hospitalId: number;
+  doctorId: number;
+  queueDate: string;
+  queueEntryId: number | null;
+  diff: QueueEventDiff;
+  occurredAt: string;
+};
+
+// Enough to cover a reconnect after a few minutes of a busy OPD.
+const RESUME_BUFFER_SIZE = 1000;
+
+const emitter = new EventEmitter();
+emitter.setMaxListeners(0);
+
+const buffer: QueueEvent[] = [];
+let lastId = 0;
+
+export function onQueueEvent(listener: (evt: QueueEvent) => void) {
+  emitter.on("queue", listener);
+  return () => emitter.off("queue", listener);
+}
+
+/**
+ * Events after lastEventId still in the resume buffer, or null if some were already evicted
+ * or lastEventId is from before a server restart (the client must then refetch the queue).
+ */
+export function getQueueEventsSince(lastEventId: number): QueueEvent[] | null {
+  if (lastEventId === lastId) return [];
+  if (lastEventId > lastId) return null; // ids restart from 0 with the process
+  if (buffer.length === 0 || buffer[0].id > lastEventId + 1) return null;
+  return buffer.filter((evt) => evt.id > lastEventId);
+}
+
+const compactDiff = (diff: QueueDiff | null): QueueEventDiff => {
+  if (diff?.op === "upsert") {
+    return {
+      op: "upsert",
+      index: diff.index,
+      entry: diff.row.queue as Record<string, unknown>,
+      appointmentStatus: diff.row.appointment?.status ?? null,
+    };
+  }
+  if (diff?.op === "remove") return { op: "remove", id: diff.id };
+  return { op: "reset" };
+};
+
+export function emitQueueChanged(
+  action: QueueEventAction,
+  entry: { id: number | null; hospitalId: number; doctorId: number; queueDate: string },
+  diff: QueueDiff | null
+) {
+  try {
+    const evt: QueueEvent = {
+      id: ++lastId,
+      type: "queue.changed",
+      action,
+      hospitalId: entry.hospitalId,
+      doctorId: entry.doctorId,
+      queueDate: entry.queueDate,
+      queueEntryId: entry.id,
+      diff: compactDiff(diff),
+      occurredAt: new Date().toISOString(),
+    };
+    buffer.push(evt);
+    if (buffer.length > RESUME_BUFFER_SIZE) buffer.shift();
+    emitter.emit("queue", evt);
+  } catch (e) {
+    // Best-effort: events must never break the main request flow.
+    console.error("❌ Failed to emit queue event:", e);
+  }
+}
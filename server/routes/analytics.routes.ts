@@ -2,6 +2,7 @@
 import { Router } from 'express';
 import { authenticateToken, authorizeRoles, type AuthenticatedRequest } from '../middleware/auth.js';
 import * as analyticsService from '../services/analytics.service.js';
+import { getCachedAnalytics } from '../services/analytics-cache.js';
 import { db } from '../db.js';
 import { eq } from 'drizzle-orm';
 import { hospitals, receptionists, doctors } from '../../shared/schema.js';
@@ -59,12 +60,16 @@ router.get('/revenue-trend', authorizeRoles('HOSPITAL', 'ADMIN'), async (req: Au
       return res.status(400).json({ message: 'dateFrom and dateTo are required' });
     }
 
-    const trend = await analyticsService.getRevenueTrend({
+    const filters = {
       hospitalId,
       dateFrom: new Date(dateFrom as string),
       dateTo: new Date(dateTo as string),
       period: period as 'daily' | 'weekly' | 'monthly',
-    });
+    };
+    const trend = await getCachedAnalytics(
+      { ...filters, metric: 'revenue-trend', variant: filters.period },
+      () => analyticsService.getRevenueTrend(filters),
+    );
 
     res.json(trend);
   } catch (err: any) {
@@ -89,12 +94,16 @@ router.get('/appointment-trend', authorizeRoles('HOSPITAL', 'ADMIN'), async (req
       return res.status(400).json({ message: 'dateFrom and dateTo are required' });
     }
 
-    const trend = await analyticsService.getAppointmentTrend({
+    const filters = {
       hospitalId,
       dateFrom: new Date(dateFrom as string),
       dateTo: new Date(dateTo as string),
       period: period as 'daily' | 'weekly' | 'monthly',
-    });
+    };
+    const trend = await getCachedAnalytics(
+      { ...filters, metric: 'appointment-trend', variant: filters.period },
+      () => analyticsService.getAppointmentTrend(filters),
+    );
 
     res.json(trend);
   } catch (err: any) {
@@ -119,12 +128,23 @@ router.get('/performance', authorizeRoles('HOSPITAL', 'ADMIN'), async (req: Auth
       return res.status(400).json({ message: 'dateFrom and dateTo are required' });
     }
 
-    const metrics = await analyticsService.getPerformanceMetrics({
+    const filters = {
       hospitalId,
       dateFrom: new Date(dateFrom as string),
       dateTo: new Date(dateTo as string),
       compareWithPrevious: compareWithPrevious === 'true',
-    });
+    };
+    const metrics = await getCachedAnalytics(
+      {
+        ...filters,
+        metric: 'performance',
+        variant: String(filters.compareWithPrevious),
+        readsFrom: filters.compareWithPrevious
+          ? analyticsService.getPreviousPeriodStart(filters.dateFrom, filters.dateTo)
+          : undefined,
+      },
+      () => analyticsService.getPerformanceMetrics(filters),
+    );
 
     res.json(metrics);
   } catch (err: any) {
@@ -149,11 +169,15 @@ router.get('/department-performance', authorizeRoles('HOSPITAL', 'ADMIN'), async
       return res.status(400).json({ message: 'dateFrom and dateTo are required' });
     }
 
-    const performance = await analyticsService.getDepartmentPerformance({
+    const filters = {
       hospitalId,
       dateFrom: new Date(dateFrom as string),
       dateTo: new Date(dateTo as string),
-    });
+    };
+    const performance = await getCachedAnalytics(
+      { ...filters, metric: 'department-performance' },
+      () => analyticsService.getDepartmentPerformance(filters),
+    );
 
     res.json(performance);
   } catch (err: any) {
@@ -417,6 +417,51 @@ router.patch('/:appointmentId/reschedule', authorizeRoles('RECEPTIONIST'), async
   }
 });
 
+// Reschedule several appointments in one request (for receptionist)
+// Body: { items: [{ appointmentId, appointmentDate, appointmentTime, timeSlot }], rescheduleReason }
+router.post('/reschedule-bulk', authorizeRoles('RECEPTIONIST'), async (req: AuthenticatedRequest, res) => {
+  try {
+    const { items, rescheduleReason } = req.body || {};
+    if (!Array.isArray(items) || items.length === 0 || !rescheduleReason) {
+      return res.status(400).json({ message: 'items and rescheduleReason are required' });
+    }
+    if (items.some((item: any) => !item?.appointmentId)) {
+      return res.status(400).json({ message: 'Each item needs an appointmentId' });
+    }
+
+    const receptionist = await db
+      .select()
+      .from(receptionists)
+      .where(eq(receptionists.userId, req.user?.id || 0))
+      .limit(1);
+    if (receptionist.length === 0) {
+      return res.status(403).json({ message: 'Receptionist not found' });
+    }
+
+    const results = await appointmentService.rescheduleAppointmentsBulk(
+      items.map((item: any) => ({
+        appointmentId: +item.appointmentId,
+        appointmentDate: item.appointmentDate,
+        appointmentTime: item.appointmentTime,
+        timeSlot: item.timeSlot,
+      })),
+      rescheduleReason,
+      { userId: req.user?.id || 0, receptionistId: receptionist[0].id, actorRole: req.user?.role },
+    );
+    res.json({
+      results,
+      successful: results.filter((r) => r.success).length,
+      failed: results.filter((r) => !r.success).length,
+    });
+  } catch (err: any) {
+    console.error('❌ Bulk reschedule error:', err);
+    res.status(400).json({
+      message: err.message || 'Failed to reschedule appointments',
+      error: err.toString(),
+    });
+  }
+});
+
 // Get appointments by status
 router.get('/status/:status', async (req, res) => {
   try {
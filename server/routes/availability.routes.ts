@@ -1,6 +1,7 @@
 import { Router } from 'express';
 import { authenticateToken, authorizeRoles, type AuthenticatedRequest } from '../middleware/auth.js';
 import * as availabilityService from '../services/availability.service.js';
+import { writeWithBackpressure } from '../utils/tabular-stream.js';
 import { db } from '../db.js';
 import { eq } from 'drizzle-orm';
 import { receptionists, hospitals, doctors, nurses } from '../../shared/schema.js';
@@ -206,4 +207,80 @@ router.get('/doctor/:doctorId/slots/:date', authenticateToken, async (req: Authe
   }
 });
 
+const MAX_BATCH_DOCTORS = 200;
+
+// Parse ?doctorIds=1,2,3&dateFrom=YYYY-MM-DD&dateTo=YYYY-MM-DD for the batched slot endpoints
+const parseSlotRangeQuery = (query: any): { doctorIds: number[]; dateFrom: string; dateTo: string } => {
+  const doctorIds = String(query.doctorIds || '')
+    .split(',')
+    .map((id) => parseInt(id.trim(), 10))
+    .filter((id) => !isNaN(id) && id > 0);
+  const dateFrom = String(query.dateFrom || '');
+  const dateTo = String(query.dateTo || dateFrom);
+
+  if (doctorIds.length === 0) {
+    throw new Error('doctorIds is required');
+  }
+  if (doctorIds.length > MAX_BATCH_DOCTORS) {
+    throw new Error(`At most ${MAX_BATCH_DOCTORS} doctorIds per request`);
+  }
+  if (!/^\d{4}-\d{2}-\d{2}$/.test(dateFrom) || !/^\d{4}-\d{2}-\d{2}$/.test(dateTo)) {
+    throw new Error('Invalid date format. Use YYYY-MM-DD');
+  }
+  return { doctorIds, dateFrom, dateTo };
+};
+
+// Get available slots for several doctors over a date range (one batched lookup)
+// GET /slots?doctorIds=1,2,3&dateFrom=YYYY-MM-DD&dateTo=YYYY-MM-DD
+router.get('/slots', authenticateToken, async (req: AuthenticatedRequest, res) => {
+  try {
+    const { doctorIds, dateFrom, dateTo } = parseSlotRangeQuery(req.query);
+    const slots = await availabilityService.getAvailableSlotsForRange(doctorIds, dateFrom, dateTo);
+    res.json({ slots, dateFrom, dateTo });
+  } catch (err: any) {
+    console.error('❌ Get available slots for range error:', err);
+    res.status(400).json({ message: err.message || 'Failed to get available slots' });
+  }
+});
+
+// Stream free/booked/capacity per slot for several doctors over a date range
+// GET /slots/stream?doctorIds=1,2,3&dateFrom=YYYY-MM-DD&dateTo=YYYY-MM-DD
+// Responds with NDJSON: one {"doctorId","date","slots":[{slot,capacity,booked,free}]} line per doctor-day
+router.get('/slots/stream', authenticateToken, async (req: AuthenticatedRequest, res) => {
+  let range: ReturnType<typeof parseSlotRangeQuery>;
+  try {
+    range = parseSlotRangeQuery(req.query);
+  } catch (err: any) {
+    return res.status(400).json({ message: err.message });
+  }
+
+  const days = availabilityService.getSlotAvailabilityForRange(range.doctorIds, range.dateFrom, range.dateTo);
+  try {
+    // Pull the first line before committing to a 200 so query errors still get a JSON 400
+    let next = await days.next();
+
+    res.status(200);
+    res.setHeader('Content-Type', 'application/x-ndjson');
+    res.setHeader('Cache-Control', 'no-cache');
+
+    while (!next.done) {
+      // Rejects if the client goes away while the response is backpressured
+      await writeWithBackpressure(res, JSON.stringify(next.value) + '\n');
+      if (req.destroyed) return;
+      next = await days.next();
+    }
+    res.end();
+  } catch (err: any) {
+    if (res.destroyed) return; // client disconnected; nothing left to tell it
+    console.error('❌ Stream slot availability error:', err);
+    if (!res.headersSent) {
+      return res.status(400).json({ message: err.message || 'Failed to get slot availability' });
+    }
+    res.end(JSON.stringify({ error: err.message || 'Failed to get slot availability' }) + '\n');
+  } finally {
+    // Stops the generator (and its queries) when the loop ended early
+    await days.return(undefined);
+  }
+});
+
 export default router;
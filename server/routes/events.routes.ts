@@ -2,10 +2,11 @@ import { Router } from "express";
 import jwt from "jsonwebtoken";
 import { getJwtSecret } from "../env.js";
 import { onAppointmentEvent } from "../events/appointments.events.js";
+import { onQueueEvent, getQueueEventsSince, type QueueEvent } from "../events/queue.events.js";
 import { setOnline, setOffline, heartbeat } from "../presence/store.js";
 import { db } from "../db.js";
 import { eq } from "drizzle-orm";
-import { hospitals, receptionists } from "../../shared/schema.js";
+import { doctors, hospitals, receptionists } from "../../shared/schema.js";
 
 const router = Router();
 
@@ -21,64 +22,67 @@ function authenticateFromQueryToken(req: any): { id: number; role: string } | nu
   }
 }
 
-router.get("/appointments", async (req, res) => {
-  const user = authenticateFromQueryToken(req);
-  if (!user) {
-    return res.status(401).json({ message: "Access token required" });
-  }
-
-  // Resolve hospital context once for hospital/receptionist/nurse roles.
-  let hospitalId: number | null = null;
-  const role = (user.role || "").toUpperCase();
-
+/**
+ * Hospital an SSE user belongs to (hospital/receptionist/nurse roles); null for other roles.
+ */
+async function resolveHospitalId(userId: number, role: string): Promise<number | null> {
   if (role === "RECEPTIONIST") {
-    try {
-      const rec = await db
-        .select({ hospitalId: receptionists.hospitalId })
-        .from(receptionists)
-        .where(eq(receptionists.userId, user.id))
-        .limit(1);
-      hospitalId = rec[0]?.hospitalId ?? null;
-    } catch (e) {
-      console.error("❌ SSE: Failed to resolve receptionist hospital context:", e);
-      return res.status(503).json({ message: "Database unavailable. Please retry shortly." });
-    }
+    const rec = await db
+      .select({ hospitalId: receptionists.hospitalId })
+      .from(receptionists)
+      .where(eq(receptionists.userId, userId))
+      .limit(1);
+    return rec[0]?.hospitalId ?? null;
   }
 
   if (role === "HOSPITAL") {
-    try {
-      const hosp = await db
-        .select({ id: hospitals.id })
-        .from(hospitals)
-        .where(eq(hospitals.userId, user.id))
-        .limit(1);
-      hospitalId = hosp[0]?.id ?? null;
-    } catch (e) {
-      console.error("❌ SSE: Failed to resolve hospital context:", e);
-      return res.status(503).json({ message: "Database unavailable. Please retry shortly." });
-    }
+    const hosp = await db
+      .select({ id: hospitals.id })
+      .from(hospitals)
+      .where(eq(hospitals.userId, userId))
+      .limit(1);
+    return hosp[0]?.id ?? null;
   }
 
   if (role === "NURSE") {
-    try {
-      const { nurses } = await import('../../shared/schema.js');
-      const nurse = await db
-        .select({ hospitalId: nurses.hospitalId })
-        .from(nurses)
-        .where(eq(nurses.userId, user.id))
-        .limit(1);
-      hospitalId = nurse[0]?.hospitalId ?? null;
-    } catch (e) {
-      console.error("❌ SSE: Failed to resolve nurse hospital context:", e);
-      return res.status(503).json({ message: "Database unavailable. Please retry shortly." });
-    }
+    const { nurses } = await import('../../shared/schema.js');
+    const nurse = await db
+      .select({ hospitalId: nurses.hospitalId })
+      .from(nurses)
+      .where(eq(nurses.userId, userId))
+      .limit(1);
+    return nurse[0]?.hospitalId ?? null;
   }
 
+  return null;
+}
+
+function openEventStream(res: any) {
   res.setHeader("Content-Type", "text/event-stream");
   res.setHeader("Cache-Control", "no-cache");
   res.setHeader("Connection", "keep-alive");
   // flushHeaders exists in Node response (not typed on Express Response)
   (res as any).flushHeaders?.();
+}
+
+router.get("/appointments", async (req, res) => {
+  const user = authenticateFromQueryToken(req);
+  if (!user) {
+    return res.status(401).json({ message: "Access token required" });
+  }
+
+  // Resolve hospital context once for hospital/receptionist/nurse roles.
+  let hospitalId: number | null = null;
+  const role = (user.role || "").toUpperCase();
+
+  try {
+    hospitalId = await resolveHospitalId(user.id, role);
+  } catch (e) {
+    console.error(`❌ SSE: Failed to resolve ${role.toLowerCase()} hospital context:`, e);
+    return res.status(503).json({ message: "Database unavailable. Please retry shortly." });
+  }
+
+  openEventStream(res);
 
   const send = (payload: any) => {
     res.write(`data: ${JSON.stringify(payload)}\n\n`);
@@ -106,14 +110,12 @@ router.get("/appointments", async (req, res) => {
 
   // Send periodic keep-alive to prevent connection timeout; also refresh presence
   const keepAliveInterval = setInterval(() => {
-    if (!res.headersSent) {
-      try {
-        heartbeat(user.id);
-        res.write(': keep-alive\n\n');
-      } catch (e) {
-        clearInterval(keepAliveInterval);
-        unsubscribe();
-      }
+    try {
+      heartbeat(user.id);
+      res.write(': keep-alive\n\n');
+    } catch (e) {
+      clearInterval(keepAliveInterval);
+      unsubscribe();
     }
   }, 30000); // Every 30 seconds
 
@@ -121,9 +123,95 @@ router.get("/appointments", async (req, res) => {
     setOffline(user.id);
     clearInterval(keepAliveInterval);
     unsubscribe();
-    if (!res.headersSent) {
-      res.end();
+    res.end();
+  };
+
+  req.on("close", cleanup);
+  req.on("aborted", cleanup);
+});
+
+/**
+ * GET /api/events/queue?token=...&doctorId=&queueDate=
+ * OPD queue changes as compact diffs. Hospital staff get their hospital's queues, doctors
+ * their own; doctorId/queueDate narrow further. Reconnects resume from Last-Event-ID
+ * (header, or ?lastEventId=); if the gap is no longer buffered a "queue.resync" is sent.
+ */
+router.get("/queue", async (req, res) => {
+  const user = authenticateFromQueryToken(req);
+  if (!user) {
+    return res.status(401).json({ message: "Access token required" });
+  }
+
+  const role = (user.role || "").toUpperCase();
+  let hospitalId: number | null = null;
+  let ownDoctorId: number | null = null;
+
+  try {
+    if (role === "DOCTOR") {
+      const doc = await db
+        .select({ id: doctors.id })
+        .from(doctors)
+        .where(eq(doctors.userId, user.id))
+        .limit(1);
+      ownDoctorId = doc[0]?.id ?? null;
+    } else {
+      hospitalId = await resolveHospitalId(user.id, role);
     }
+  } catch (e) {
+    console.error("❌ SSE: Failed to resolve queue context:", e);
+    return res.status(503).json({ message: "Database unavailable. Please retry shortly." });
+  }
+
+  if (hospitalId == null && ownDoctorId == null) {
+    return res.status(403).json({ message: "Queue events are available to hospital staff and doctors only" });
+  }
+
+  const doctorFilter = req.query.doctorId ? Number(req.query.doctorId) : null;
+  const dateFilter = (req.query.queueDate as string | undefined) || null;
+
+  const matches = (evt: QueueEvent) => {
+    if (ownDoctorId != null && evt.doctorId !== ownDoctorId) return false;
+    if (hospitalId != null && evt.hospitalId !== hospitalId) return false;
+    if (doctorFilter != null && evt.doctorId !== doctorFilter) return false;
+    if (dateFilter && evt.queueDate !== dateFilter) return false;
+    return true;
+  };
+
+  openEventStream(res);
+
+  const sendEvent = (evt: QueueEvent) => {
+    res.write(`id: ${evt.id}\ndata: ${JSON.stringify(evt)}\n\n`);
+  };
+
+  const lastEventId = Number(req.headers["last-event-id"] ?? req.query.lastEventId);
+  if (Number.isFinite(lastEventId) && lastEventId > 0) {
+    const missed = getQueueEventsSince(lastEventId);
+    if (missed === null) {
+      res.write(`data: ${JSON.stringify({ type: "queue.resync", at: new Date().toISOString() })}\n\n`);
+    } else {
+      missed.filter(matches).forEach(sendEvent);
+    }
+  } else {
+    res.write(`data: ${JSON.stringify({ type: "connected", at: new Date().toISOString() })}\n\n`);
+  }
+
+  const unsubscribe = onQueueEvent((evt) => {
+    if (matches(evt)) sendEvent(evt);
+  });
+
+  const keepAliveInterval = setInterval(() => {
+    try {
+      res.write(": keep-alive\n\n");
+    } catch (e) {
+      clearInterval(keepAliveInterval);
+      unsubscribe();
+    }
+  }, 30000);
+
+  const cleanup = () => {
+    clearInterval(keepAliveInterval);
+    unsubscribe();
+    res.end();
   };
 
   req.on("close", cleanup);
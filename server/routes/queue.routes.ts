@@ -2,8 +2,8 @@ import { Router } from 'express';
 import * as queueService from '../services/queue.service.js';
 import { authenticateToken, authorizeRoles, type AuthenticatedRequest } from '../middleware/auth.js';
 import { db } from '../db.js';
-import { eq } from 'drizzle-orm';
-import { receptionists, hospitals } from '../../shared/schema.js';
+import { and, eq } from 'drizzle-orm';
+import { receptionists, hospitals, appointments, patients } from '../../shared/schema.js';
 
 const router = Router();
 
@@ -82,6 +82,34 @@ router.get('/doctor/:doctorId/date/:date', async (req: AuthenticatedRequest, res
   }
 });
 
+// Queue status for an appointment (patient view): place in line and estimated wait
+router.get('/appointment/:appointmentId', async (req: AuthenticatedRequest, res) => {
+  try {
+    const appointmentId = +req.params.appointmentId;
+
+    if (req.user?.role === 'PATIENT') {
+      const [own] = await db
+        .select({ id: appointments.id })
+        .from(appointments)
+        .innerJoin(patients, eq(appointments.patientId, patients.id))
+        .where(and(eq(appointments.id, appointmentId), eq(patients.userId, req.user.id)))
+        .limit(1);
+      if (!own) {
+        return res.status(403).json({ message: 'Not your appointment' });
+      }
+    }
+
+    const status = await queueService.getQueueStatusForAppointment(appointmentId);
+    res.json({ checkedIn: status != null, ...status });
+  } catch (err: any) {
+    console.error('❌ Get queue status error:', err);
+    res.status(400).json({
+      message: err.message || 'Failed to get queue status',
+      error: err.toString(),
+    });
+  }
+});
+
 // Call token
 router.patch('/:queueEntryId/call', authorizeRoles('RECEPTIONIST', 'ADMIN', 'DOCTOR'), async (req: AuthenticatedRequest, res) => {
   try {
@@ -163,6 +191,27 @@ router.patch('/:queueEntryId/reorder', authorizeRoles('RECEPTIONIST', 'ADMIN'),
   }
 });
 
+// Apply a full manual order (drag-and-drop reshuffle) in one call
+router.put('/doctor/:doctorId/date/:date/order', authorizeRoles('RECEPTIONIST', 'ADMIN'), async (req: AuthenticatedRequest, res) => {
+  try {
+    const { doctorId, date } = req.params;
+    const { entryIds } = req.body;
+
+    if (!Array.isArray(entryIds) || entryIds.some((id: unknown) => typeof id !== 'number')) {
+      return res.status(400).json({ message: 'entryIds (number[]) is required' });
+    }
+
+    const updated = await queueService.applyQueueOrder(+doctorId, date, entryIds);
+    res.json(updated);
+  } catch (err: any) {
+    console.error('❌ Apply queue order error:', err);
+    res.status(400).json({
+      message: err.message || 'Failed to apply queue order',
+      error: err.toString(),
+    });
+  }
+});
+
 // Skip token (return to waiting)
 router.patch('/:queueEntryId/skip', authorizeRoles('RECEPTIONIST', 'ADMIN', 'DOCTOR'), async (req: AuthenticatedRequest, res) => {
   try {
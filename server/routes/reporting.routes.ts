@@ -2,6 +2,7 @@
 import { Router } from 'express';
 import { authenticateToken, authorizeRoles, type AuthenticatedRequest } from '../middleware/auth.js';
 import * as reportingService from '../services/reporting.service.js';
+import { createTabularWriter } from '../utils/tabular-stream.js';
 import { db } from '../db.js';
 import { eq } from 'drizzle-orm';
 import { hospitals, receptionists, doctors } from '../../shared/schema.js';
@@ -143,75 +144,61 @@ router.get('/ipd/census', authorizeRoles('HOSPITAL', 'ADMIN'), async (req: Authe
 });
 
 /**
- * GET /api/reports/:type/export - Export report as CSV
+ * GET /api/reports/:type/export - Export report as CSV or XLSX
+ * Rows are read through a database cursor and streamed to the response with backpressure.
  */
 router.get('/:type/export', authorizeRoles('HOSPITAL', 'ADMIN', 'RECEPTIONIST', 'LAB'), async (req: AuthenticatedRequest, res) => {
+  let batches: AsyncGenerator<unknown[][]> | null = null;
   try {
     const { type } = req.params;
     const { format = 'csv', ...queryParams } = req.query;
 
-    if (format !== 'csv') {
-      return res.status(400).json({ message: 'Only CSV format is supported' });
+    if (format !== 'csv' && format !== 'xlsx') {
+      return res.status(400).json({ message: 'Supported formats are csv and xlsx' });
+    }
+    if (!reportingService.isReportExportType(type)) {
+      return res.status(400).json({ message: `Unknown report type: ${type}` });
     }
 
     const hospitalId = await getHospitalId(req);
-    let csvData = '';
-    let filename = '';
-
-    switch (type) {
-      case 'opd': {
-        const report = await reportingService.getOpdReport({
-          hospitalId,
-          dateFrom: queryParams.dateFrom ? new Date(queryParams.dateFrom as string) : undefined,
-          dateTo: queryParams.dateTo ? new Date(queryParams.dateTo as string) : undefined,
-          doctorId: queryParams.doctorId ? parseInt(queryParams.doctorId as string) : undefined,
-        });
-        csvData = reportingService.exportReportToCsv(
-          report.appointments,
-          ['id', 'patientId', 'doctorId', 'appointmentDate', 'status', 'type', 'createdAt']
-        );
-        filename = `opd-report-${new Date().toISOString().slice(0, 10)}.csv`;
-        break;
-      }
-      case 'lab': {
-        const report = await reportingService.getLabReport({
-          hospitalId,
-          dateFrom: queryParams.dateFrom ? new Date(queryParams.dateFrom as string) : undefined,
-          dateTo: queryParams.dateTo ? new Date(queryParams.dateTo as string) : undefined,
-        });
-        csvData = reportingService.exportReportToCsv(
-          report.orders,
-          ['id', 'orderNumber', 'patientId', 'doctorId', 'status', 'createdAt', 'releasedAt']
-        );
-        filename = `lab-report-${new Date().toISOString().slice(0, 10)}.csv`;
-        break;
-      }
-      case 'finance': {
-        const report = await reportingService.getFinanceReport({
-          hospitalId,
-          dateFrom: queryParams.dateFrom ? new Date(queryParams.dateFrom as string) : undefined,
-          dateTo: queryParams.dateTo ? new Date(queryParams.dateTo as string) : undefined,
-        });
-        csvData = reportingService.exportReportToCsv(
-          report.invoices,
-          ['id', 'invoiceNumber', 'patientId', 'status', 'total', 'paidAmount', 'balanceAmount', 'createdAt']
-        );
-        filename = `finance-report-${new Date().toISOString().slice(0, 10)}.csv`;
-        break;
-      }
-      default:
-        return res.status(400).json({ message: `Unknown report type: ${type}` });
-    }
+    batches = reportingService.streamReportExport(type, {
+      hospitalId,
+      dateFrom: queryParams.dateFrom ? new Date(queryParams.dateFrom as string) : undefined,
+      dateTo: queryParams.dateTo ? new Date(queryParams.dateTo as string) : undefined,
+      doctorId: queryParams.doctorId ? parseInt(queryParams.doctorId as string) : undefined,
+      date: queryParams.date ? new Date(queryParams.date as string) : undefined,
+    });
 
-    res.setHeader('Content-Type', 'text/csv');
+    // Fetch the first batch before sending headers so query errors still get a JSON response
+    let batch = await batches.next();
+
+    const writer = createTabularWriter(format, res, `${type} report`);
+    const filename = `${type}-report-${new Date().toISOString().slice(0, 10)}.${format}`;
+    res.setHeader('Content-Type', writer.contentType);
     res.setHeader('Content-Disposition', `attachment; filename="${filename}"`);
-    res.send(csvData);
+
+    await writer.start(reportingService.getReportExportHeaders(type));
+    while (!batch.done && !req.destroyed) {
+      await writer.writeRows(batch.value);
+      batch = await batches.next();
+    }
+    if (req.destroyed) return;
+    await writer.finish();
+    res.end();
   } catch (err: any) {
     console.error('❌ Export report error:', err);
+    if (res.headersSent) {
+      // Part of the file is already out; abort so the client sees a failed download, not a truncated file
+      res.destroy(err);
+      return;
+    }
     res.status(400).json({
       message: err.message || 'Failed to export report',
       error: err.toString(),
     });
+  } finally {
+    // Closes the cursor if the loop stopped early
+    await batches?.return(undefined);
   }
 });
 
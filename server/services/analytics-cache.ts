@@ -0,0 +1,124 @@
+/**
+ * Result cache in front of analytics.service, keyed by (hospitalId, metric, date range).
+ *
+ * - Ranges that ended before today are closed: their results are kept until invalidated
+ *   (or evicted by the LRU). Ranges touching today are fresh for OPEN_RANGE_TTL_MS.
+ * - An expired or invalidated entry is still returned while one background refresh recomputes
+ *   it (stale-while-revalidate), unless it is older than MAX_STALE_MS.
+ * - Concurrent misses for the same key share one computation.
+ * - Appointment events and billing writes (billing.service) invalidate by day: only a
+ *   hospital's entries whose days include the changed day go stale, so today's check-ins and
+ *   payments leave closed past ranges cached.
+ */
+import { onAppointmentEvent } from '../events/appointments.events.js';
+import { LruCache } from '../utils/lru-cache.js';
+import { toDayKey } from './revenue-rollup.service.js';
+
+const MAX_ENTRIES = 1000;
+const OPEN_RANGE_TTL_MS = 60 * 1000;
+// Past this age a stale entry is not served; the caller waits for a fresh result instead.
+const MAX_STALE_MS = 15 * 60 * 1000;
+
+export type AnalyticsCacheKey = {
+  hospitalId: number;
+  metric: string;
+  dateFrom: Date;
+  dateTo: Date;
+  variant?: string; // Other parameters that change the result (period, comparison)
+  readsFrom?: Date; // Earliest day the result reads, if before dateFrom (previous-period comparison)
+};
+
+// Days (YYYY-MM-DD, inclusive) a cached result depends on
+type DayRange = { hospitalId: number; dayFrom: string; dayTo: string };
+
+type Entry = DayRange & {
+  value: unknown;
+  computedAt: number;
+  closed: boolean;
+  stale: boolean;
+};
+
+type Computation = DayRange & { promise: Promise<unknown>; invalidated: boolean };
+
+const entries = new LruCache<string, Entry>(MAX_ENTRIES);
+const computing = new Map<string, Computation>();
+
+const cacheKey = ({ hospitalId, metric, dateFrom, dateTo, variant }: AnalyticsCacheKey) =>
+  `${hospitalId}|${metric}|${dateFrom.toISOString()}|${dateTo.toISOString()}|${variant ?? ''}`;
+
+const dayRangeOf = (params: AnalyticsCacheKey): DayRange => ({
+  hospitalId: params.hospitalId,
+  dayFrom: toDayKey(params.readsFrom && params.readsFrom < params.dateFrom ? params.readsFrom : params.dateFrom),
+  dayTo: toDayKey(params.dateTo),
+});
+
+const isFresh = (entry: Entry, now: number) =>
+  !entry.stale && (entry.closed || now - entry.computedAt <= OPEN_RANGE_TTL_MS);
+
+const affects = (range: DayRange, hospitalId: number, day: string | null) =>
+  range.hospitalId === hospitalId && (day === null || (range.dayFrom <= day && day <= range.dayTo));
+
+/**
+ * Mark a hospital's cached analytics results stale if they cover the given day
+ * (the day an appointment is on, a payment was received, ...). Without a day, all of them.
+ */
+export const invalidateHospitalAnalytics = (hospitalId: number | null | undefined, day?: Date | null) => {
+  if (!hospitalId) return;
+  const dayKey = day && !isNaN(day.getTime()) ? toDayKey(day) : null;
+  entries.forEach((entry) => {
+    if (affects(entry, hospitalId, dayKey)) entry.stale = true;
+  });
+  // A computation already running may have read the old rows
+  computing.forEach((computation) => {
+    if (affects(computation, hospitalId, dayKey)) computation.invalidated = true;
+  });
+};
+
+onAppointmentEvent((evt) => {
+  // A reschedule also changes the day it moved away from, which the event does not carry
+  const day = evt.action === 'rescheduled' || !evt.appointmentDate ? null : new Date(evt.appointmentDate);
+  invalidateHospitalAnalytics(evt.hospitalId, day);
+});
+
+const compute = <T>(key: string, params: AnalyticsCacheKey, load: () => Promise<T>): Promise<T> => {
+  const pending = computing.get(key);
+  if (pending) return pending.promise as Promise<T>;
+
+  const range = dayRangeOf(params);
+  const closed = range.dayTo < toDayKey(new Date());
+  const computation: Computation = { ...range, promise: Promise.resolve(), invalidated: false };
+  computation.promise = load()
+    .then((value) => {
+      // An invalidation during the load still stores the value, but as stale
+      entries.set(key, { ...range, value, computedAt: Date.now(), closed, stale: computation.invalidated });
+      return value;
+    })
+    .finally(() => {
+      computing.delete(key);
+    });
+  computing.set(key, computation);
+  return computation.promise as Promise<T>;
+};
+
+/**
+ * Return the cached result for params, computing it with load on a miss.
+ * Stale results are returned immediately while load refreshes them in the background.
+ */
+export const getCachedAnalytics = async <T>(params: AnalyticsCacheKey, load: () => Promise<T>): Promise<T> => {
+  const key = cacheKey(params);
+  const entry = entries.get(key);
+  const now = Date.now();
+
+  if (entry && isFresh(entry, now)) {
+    return entry.value as T;
+  }
+
+  if (entry && now - entry.computedAt <= MAX_STALE_MS) {
+    compute(key, params, load).catch((error) => {
+      console.error(`❌ Failed to refresh cached analytics (${params.metric}, hospital ${params.hospitalId}):`, error);
+    });
+    return entry.value as T;
+  }
+
+  return compute(key, params, load);
+};
@@ -5,7 +5,6 @@ import { db } from '../db.js';
 import {
   appointments,
   invoices,
-  payments,
   labOrders,
   ipdEncounters,
   prescriptions,
@@ -13,7 +12,8 @@ import {
   doctors,
   users,
 } from '../../shared/schema.js';
-import { eq, and, gte, lte, sql, desc, count, between } from 'drizzle-orm';
+import { eq, and, gte, lt, lte, sql, desc, count, between } from 'drizzle-orm';
+import { getDailyRevenue, toDayKey } from './revenue-rollup.service.js';
 
 export interface TrendDataPoint {
   date: string;
@@ -58,6 +58,13 @@ export interface PerformanceMetrics {
   };
 }
 
+// Same days as DATE(created_at) BETWEEN dateFrom AND dateTo, but as a plain range the index can use
+const invoiceCreatedInRange = (dateFrom: Date, dateTo: Date) => {
+  const start = new Date(dateFrom.getFullYear(), dateFrom.getMonth(), dateFrom.getDate());
+  const end = new Date(dateTo.getFullYear(), dateTo.getMonth(), dateTo.getDate() + 1);
+  return [gte(invoices.createdAt, start), lt(invoices.createdAt, end)];
+};
+
 /**
  * Get trend analysis for revenue
  */
@@ -69,39 +76,26 @@ export const getRevenueTrend = async (filters: {
 }): Promise<TrendAnalysis> => {
   const { hospitalId, dateFrom, dateTo, period } = filters;
 
-  // Get all payments in the date range
-  const allPayments = await db
-    .select({
-      amount: payments.amount,
-      receivedAt: payments.receivedAt,
-    })
-    .from(payments)
-    .innerJoin(invoices, eq(payments.invoiceId, invoices.id))
-    .where(
-      and(
-        eq(invoices.hospitalId, hospitalId),
-        gte(sql`DATE(${payments.receivedAt})`, dateFrom),
-        lte(sql`DATE(${payments.receivedAt})`, dateTo)
-      )
-    );
+  // One pre-aggregated row per day (hospital_daily_revenue) instead of every payment
+  const days = await getDailyRevenue(hospitalId, toDayKey(dateFrom), toDayKey(dateTo));
 
   // Group by period
   const grouped: Record<string, number> = {};
-  allPayments.forEach((pay: any) => {
-    const date = pay.receivedAt instanceof Date ? pay.receivedAt : new Date(pay.receivedAt);
+  days.forEach((row) => {
+    const date = new Date(row.day + 'T00:00:00');
     let key: string;
 
     if (period === 'daily') {
-      key = date.toISOString().slice(0, 10);
+      key = row.day;
     } else if (period === 'weekly') {
       const weekStart = new Date(date);
       weekStart.setDate(date.getDate() - date.getDay());
-      key = weekStart.toISOString().slice(0, 10);
+      key = toDayKey(weekStart);
     } else {
-      key = `${date.getFullYear()}-${String(date.getMonth() + 1).padStart(2, '0')}`;
+      key = row.day.slice(0, 7);
     }
 
-    grouped[key] = (grouped[key] || 0) + parseFloat(pay.amount || '0');
+    grouped[key] = (grouped[key] || 0) + row.collected;
   });
 
   // Convert to data points
@@ -275,6 +269,18 @@ export const getAppointmentTrend = async (filters: {
   };
 };
 
+const getPeriodDays = (dateFrom: Date, dateTo: Date) =>
+  Math.ceil((dateTo.getTime() - dateFrom.getTime()) / (1000 * 60 * 60 * 24));
+
+/**
+ * Start of the previous period getPerformanceMetrics compares against (it ends at dateFrom)
+ */
+export const getPreviousPeriodStart = (dateFrom: Date, dateTo: Date) => {
+  const previousDateFrom = new Date(dateFrom);
+  previousDateFrom.setDate(previousDateFrom.getDate() - getPeriodDays(dateFrom, dateTo));
+  return previousDateFrom;
+};
+
 /**
  * Get comprehensive performance metrics
  */
@@ -287,58 +293,23 @@ export const getPerformanceMetrics = async (filters: {
   const { hospitalId, dateFrom, dateTo, compareWithPrevious = true } = filters;
 
   // Calculate period duration
-  const periodDays = Math.ceil((dateTo.getTime() - dateFrom.getTime()) / (1000 * 60 * 60 * 24));
-  const previousDateFrom = new Date(dateFrom);
-  previousDateFrom.setDate(previousDateFrom.getDate() - periodDays);
+  const periodDays = getPeriodDays(dateFrom, dateTo);
+  const previousDateFrom = getPreviousPeriodStart(dateFrom, dateTo);
   const previousDateTo = new Date(dateFrom);
 
-  // Revenue metrics
-  const currentPayments = await db
-    .select({
-      amount: payments.amount,
-      receivedAt: payments.receivedAt,
-    })
-    .from(payments)
-    .innerJoin(invoices, eq(payments.invoiceId, invoices.id))
-    .where(
-      and(
-        eq(invoices.hospitalId, hospitalId),
-        gte(sql`DATE(${payments.receivedAt})`, dateFrom),
-        lte(sql`DATE(${payments.receivedAt})`, dateTo)
-      )
-    );
-
-  const previousPayments = compareWithPrevious
-    ? await db
-        .select({
-          amount: payments.amount,
-          receivedAt: payments.receivedAt,
-        })
-        .from(payments)
-        .innerJoin(invoices, eq(payments.invoiceId, invoices.id))
-        .where(
-          and(
-            eq(invoices.hospitalId, hospitalId),
-            gte(sql`DATE(${payments.receivedAt})`, previousDateFrom),
-            lte(sql`DATE(${payments.receivedAt})`, previousDateTo)
-          )
-        )
+  // Revenue metrics (from the daily rollup)
+  const currentDays = await getDailyRevenue(hospitalId, toDayKey(dateFrom), toDayKey(dateTo));
+  const previousDays = compareWithPrevious
+    ? await getDailyRevenue(hospitalId, toDayKey(previousDateFrom), toDayKey(previousDateTo))
     : [];
 
-  const totalRevenue = currentPayments.reduce((sum, p: any) => sum + parseFloat(p.amount || '0'), 0);
-  const previousRevenue = previousPayments.reduce((sum, p: any) => sum + parseFloat(p.amount || '0'), 0);
+  const totalRevenue = currentDays.reduce((sum, d) => sum + d.collected, 0);
+  const previousRevenue = previousDays.reduce((sum, d) => sum + d.collected, 0);
   const revenueGrowth = previousRevenue > 0 ? ((totalRevenue - previousRevenue) / previousRevenue) * 100 : 0;
 
   // Find peak day
-  const dailyRevenue: Record<string, number> = {};
-  currentPayments.forEach((pay: any) => {
-    const date = pay.receivedAt instanceof Date ? pay.receivedAt : new Date(pay.receivedAt);
-    const dateStr = date.toISOString().slice(0, 10);
-    dailyRevenue[dateStr] = (dailyRevenue[dateStr] || 0) + parseFloat(pay.amount || '0');
-  });
-
-  const peakDayEntry = Object.entries(dailyRevenue).reduce(
-    (max, [date, amount]) => (amount > max[1] ? [date, amount] : max),
+  const peakDayEntry = currentDays.reduce<[string, number]>(
+    (max, d) => (d.collected > max[1] ? [d.day, d.collected] : max),
     ['', 0]
   );
 
@@ -447,8 +418,7 @@ export const getPerformanceMetrics = async (filters: {
     .where(
       and(
         eq(invoices.hospitalId, hospitalId),
-        gte(sql`DATE(${invoices.createdAt})`, dateFrom),
-        lte(sql`DATE(${invoices.createdAt})`, dateTo)
+        ...invoiceCreatedInRange(dateFrom, dateTo)
       )
     );
 
@@ -585,8 +555,7 @@ export const getDepartmentPerformance = async (filters: {
     .where(
       and(
         eq(invoices.hospitalId, hospitalId),
-        gte(sql`DATE(${invoices.createdAt})`, dateFrom),
-        lte(sql`DATE(${invoices.createdAt})`, dateTo)
+        ...invoiceCreatedInRange(dateFrom, dateTo)
       )
     );
 
@@ -5,7 +5,7 @@ import { appointments, patients, doctors, hospitals, users, receptionists, invoi
 import { eq, and, desc, ne, gte, lte } from 'drizzle-orm';
 import { sql } from 'drizzle-orm';
 import type { InsertAppointment } from '../../shared/schema.js';
-import { emitAppointmentChanged } from '../events/appointments.events.js';
+import { emitAppointmentChanged, emitAppointmentsChanged } from '../events/appointments.events.js';
 import { createNotification } from './notifications.service.js';
 import { smsService } from './sms.service.js';
 import { emailService } from './email.service.js';
@@ -1481,7 +1481,8 @@ export const rescheduleAppointment = async (
     timeSlot: string; // HH:mm-HH:mm
     rescheduleReason: string;
   },
-  actor: { userId: number; receptionistId?: number; actorRole?: string }
+  actor: { userId: number; receptionistId?: number; actorRole?: string },
+  options: { emitEvent?: boolean } = {}
 ) => {
   const { appointmentDate, appointmentTime, timeSlot, rescheduleReason } = input;
   if (!appointmentDate || !appointmentTime || !timeSlot) {
@@ -1583,10 +1584,14 @@ export const rescheduleAppointment = async (
     const [updated] = await tx.update(appointments).set(updateData).where(eq(appointments.id, appointmentId)).returning();
     if (!updated) throw new Error('Failed to reschedule appointment');
 
-    await emitAppointmentChanged((updated as any).id, 'rescheduled');
     return updated;
   });
 
+  // After commit, so listeners read the new date/slot. Bulk callers emit once for the batch.
+  if (options.emitEvent !== false) {
+    await emitAppointmentChanged((updated as any).id, 'rescheduled');
+  }
+
   // Notify patient + doctor (in-app notifications stored in DB)
   // Best-effort: reschedule should succeed even if notification write fails.
   try {
@@ -1673,6 +1678,38 @@ export const rescheduleAppointment = async (
   return updated;
 };
 
+/**
+ * Reschedule several appointments (e.g. everyone booked on a doctor's leave day).
+ * Items are applied one by one so slot conflict checks see earlier moves; a failed item does
+ * not stop the rest. Realtime events go out once for the whole batch.
+ */
+export const rescheduleAppointmentsBulk = async (
+  items: Array<{ appointmentId: number; appointmentDate: string; appointmentTime: string; timeSlot: string }>,
+  rescheduleReason: string,
+  actor: { userId: number; receptionistId?: number; actorRole?: string }
+) => {
+  const results: Array<{ appointmentId: number; success: boolean; appointment?: any; error?: string }> = [];
+  for (const item of items) {
+    try {
+      const appointment = await rescheduleAppointment(
+        item.appointmentId,
+        { ...item, rescheduleReason },
+        actor,
+        { emitEvent: false },
+      );
+      results.push({ appointmentId: item.appointmentId, success: true, appointment });
+    } catch (err: any) {
+      results.push({ appointmentId: item.appointmentId, success: false, error: err.message || 'Failed to reschedule' });
+    }
+  }
+
+  await emitAppointmentsChanged(
+    results.filter((r) => r.success).map((r) => r.appointmentId),
+    'rescheduled',
+  );
+  return results;
+};
+
 /**
  * Get appointments by status.
  */
@@ -5,7 +5,8 @@ import {
   doctors,
   appointments,
 } from '../../shared/schema.js';
-import { eq, and, sql, or, gte, lte } from 'drizzle-orm';
+import { eq, and, sql, or, gte, lte, inArray, type InferSelectModel } from 'drizzle-orm';
+import { parseSlotStartToMinutes } from './opd-token.js';
 
 /**
  * Get all availability rules for a doctor
@@ -65,6 +66,7 @@ export const upsertAvailabilityRule = async (data: {
       .where(eq(doctorAvailabilityRules.id, existing[0].id))
       .returning();
 
+    invalidateDoctorCalendar(data.doctorId);
     return updated;
   } else {
     // Create new rule
@@ -83,6 +85,7 @@ export const upsertAvailabilityRule = async (data: {
       })
       .returning();
 
+    invalidateDoctorCalendar(data.doctorId);
     return created;
   }
 };
@@ -157,6 +160,7 @@ export const createAvailabilityException = async (data: {
     })
     .returning();
 
+  invalidateDoctorCalendar(data.doctorId);
   return exception;
 };
 
@@ -173,55 +177,142 @@ export const deleteAvailabilityException = async (exceptionId: number) => {
     throw new Error('Exception not found');
   }
 
+  invalidateDoctorCalendar(deleted.doctorId);
   return deleted;
 };
 
+type AvailabilityRule = InferSelectModel<typeof doctorAvailabilityRules>;
+type AvailabilityException = InferSelectModel<typeof doctorAvailabilityExceptions>;
+
 /**
- * Get available slots for a doctor on a specific date
- * This combines rules and exceptions to calculate actual availability
+ * A doctor's weekly rules (indexed by day of week) and exceptions (by date),
+ * loaded together so slot lookups for any day need no further queries.
  */
-export const getAvailableSlots = async (
-  doctorId: number,
-  date: string // YYYY-MM-DD
-): Promise<string[]> => {
-  // Get day of week (0 = Sunday, 1 = Monday, ..., 6 = Saturday)
-  const dateObj = new Date(date + 'T00:00:00');
-  const dayOfWeek = dateObj.getDay();
+type DoctorCalendar = {
+  rules: (AvailabilityRule | undefined)[];
+  exceptions: Map<string, AvailabilityException>;
+  loadedAt: number;
+};
 
-  // Get weekly rule for this day
-  const rules = await db
-    .select()
-    .from(doctorAvailabilityRules)
-    .where(
-      and(
-        eq(doctorAvailabilityRules.doctorId, doctorId),
-        eq(doctorAvailabilityRules.dayOfWeek, dayOfWeek),
-        eq(doctorAvailabilityRules.isActive, true)
-      )
-    )
-    .limit(1);
+// Writes through this service invalidate immediately; the TTL only bounds
+// staleness after edits made outside it (scripts, other instances).
+const CALENDAR_TTL_MS = 5 * 60 * 1000;
+const MAX_RANGE_DAYS = 62;
 
-  if (rules.length === 0) {
-    return []; // No rule = not available
+const calendarCache = new Map<number, DoctorCalendar>();
+const calendarLoads = new Map<number, Promise<Map<number, DoctorCalendar>>>();
+// Bumped on every invalidation so a load that raced a write is not cached.
+const calendarVersions = new Map<number, number>();
+const slotTemplates = new Map<string, readonly string[]>();
+
+/**
+ * Drop a doctor's cached calendar after their rules or exceptions change
+ */
+export const invalidateDoctorCalendar = (doctorId: number) => {
+  calendarCache.delete(doctorId);
+  calendarLoads.delete(doctorId);
+  calendarVersions.set(doctorId, (calendarVersions.get(doctorId) ?? 0) + 1);
+};
+
+/**
+ * Load calendars for all given doctors with one rules query and one exceptions query
+ */
+const loadCalendars = async (doctorIds: number[]): Promise<Map<number, DoctorCalendar>> => {
+  const versions = doctorIds.map((id) => calendarVersions.get(id) ?? 0);
+  const [rules, exceptions] = await Promise.all([
+    db
+      .select()
+      .from(doctorAvailabilityRules)
+      .where(
+        and(
+          inArray(doctorAvailabilityRules.doctorId, doctorIds),
+          eq(doctorAvailabilityRules.isActive, true)
+        )
+      ),
+    db
+      .select()
+      .from(doctorAvailabilityExceptions)
+      .where(inArray(doctorAvailabilityExceptions.doctorId, doctorIds)),
+  ]);
+
+  const loadedAt = Date.now();
+  const calendars = new Map<number, DoctorCalendar>(
+    doctorIds.map((id) => [id, { rules: new Array(7), exceptions: new Map(), loadedAt }])
+  );
+  for (const rule of rules) {
+    const calendar = calendars.get(rule.doctorId)!;
+    calendar.rules[rule.dayOfWeek] ??= rule;
+  }
+  for (const exception of exceptions) {
+    const calendar = calendars.get(exception.doctorId)!;
+    if (!calendar.exceptions.has(exception.date)) {
+      calendar.exceptions.set(exception.date, exception);
+    }
   }
 
-  const rule = rules[0];
+  doctorIds.forEach((id, i) => {
+    if ((calendarVersions.get(id) ?? 0) === versions[i]) {
+      calendarCache.set(id, calendars.get(id)!);
+    }
+  });
+  return calendars;
+};
 
-  // Check for exceptions on this date
-  const exceptions = await db
-    .select()
-    .from(doctorAvailabilityExceptions)
-    .where(
-      and(
-        eq(doctorAvailabilityExceptions.doctorId, doctorId),
-        eq(doctorAvailabilityExceptions.date, date)
-      )
-    )
-    .limit(1);
+/**
+ * Get calendars for the given doctors, loading the missing or stale ones in one batch
+ * Concurrent callers share in-flight loads instead of querying again.
+ */
+const getCalendars = async (doctorIds: number[]): Promise<Map<number, DoctorCalendar>> => {
+  const now = Date.now();
+  const result = new Map<number, DoctorCalendar>();
+  const pending = new Map<number, Promise<Map<number, DoctorCalendar>>>();
+  const missing: number[] = [];
+
+  for (const id of doctorIds) {
+    const cached = calendarCache.get(id);
+    if (cached && now - cached.loadedAt <= CALENDAR_TTL_MS) {
+      result.set(id, cached);
+    } else if (calendarLoads.has(id)) {
+      pending.set(id, calendarLoads.get(id)!);
+    } else {
+      missing.push(id);
+    }
+  }
 
-  if (exceptions.length > 0) {
-    const exception = exceptions[0];
-    
+  if (missing.length > 0) {
+    const load = loadCalendars(missing);
+    missing.forEach((id) => {
+      calendarLoads.set(id, load);
+      pending.set(id, load);
+    });
+    load
+      .finally(() => missing.forEach((id) => {
+        if (calendarLoads.get(id) === load) calendarLoads.delete(id);
+      }))
+      .catch(() => {});
+  }
+
+  for (const [id, load] of Array.from(pending.entries())) {
+    result.set(id, (await load).get(id)!);
+  }
+  return result;
+};
+
+/**
+ * Calculate slots for one day from a doctor's calendar (rules + exceptions)
+ */
+const slotsForDate = (calendar: DoctorCalendar | undefined, date: string): string[] => {
+  // Get day of week (0 = Sunday, 1 = Monday, ..., 6 = Saturday)
+  const dayOfWeek = new Date(date + 'T00:00:00').getDay();
+  const rule = calendar?.rules[dayOfWeek];
+
+  if (!rule) {
+    return []; // No rule = not available
+  }
+
+  const exception = calendar!.exceptions.get(date);
+
+  if (exception) {
     // If full-day leave or blocked, no slots available
     if (exception.type === 'leave' && !exception.startTime) {
       return [];
@@ -229,7 +320,7 @@ export const getAvailableSlots = async (
     
     // If override_hours, use exception times instead of rule
     if (exception.type === 'override_hours' && exception.startTime && exception.endTime) {
-      return generateTimeSlots(exception.startTime, exception.endTime, rule.slotDurationMinutes || 30);
+      return [...generateTimeSlots(exception.startTime, exception.endTime, rule.slotDurationMinutes || 30)];
     }
     
     // If partial leave (has startTime/endTime), exclude those hours
@@ -249,53 +340,177 @@ export const getAvailableSlots = async (
   }
 
   // No exceptions, use rule times
-  return generateTimeSlots(rule.startTime, rule.endTime, rule.slotDurationMinutes || 30);
+  return [...generateTimeSlots(rule.startTime, rule.endTime, rule.slotDurationMinutes || 30)];
 };
 
+/**
+ * List YYYY-MM-DD dates from dateFrom to dateTo inclusive
+ */
+const datesInRange = (dateFrom: string, dateTo: string): string[] => {
+  const dates: string[] = [];
+  const cursor = new Date(dateFrom + 'T00:00:00Z');
+  const end = new Date(dateTo + 'T00:00:00Z');
+  while (cursor <= end) {
+    dates.push(cursor.toISOString().slice(0, 10));
+    cursor.setUTCDate(cursor.getUTCDate() + 1);
+  }
+  return dates;
+};
+
+/**
+ * Get available slots for a doctor on a specific date
+ * This combines rules and exceptions to calculate actual availability
+ */
+export const getAvailableSlots = async (
+  doctorId: number,
+  date: string // YYYY-MM-DD
+): Promise<string[]> => {
+  const calendars = await getCalendars([doctorId]);
+  return slotsForDate(calendars.get(doctorId), date);
+};
+
+/**
+ * Get available slots for several doctors over a date range in one call
+ * Returns { [doctorId]: { [date]: slots } }; calendars are loaded in a single batch
+ */
+export const getAvailableSlotsForRange = async (
+  doctorIds: number[],
+  dateFrom: string, // YYYY-MM-DD
+  dateTo: string // YYYY-MM-DD
+): Promise<Record<number, Record<string, string[]>>> => {
+  const dates = datesInRange(dateFrom, dateTo);
+  if (dates.length > MAX_RANGE_DAYS) {
+    throw new Error(`Date range cannot exceed ${MAX_RANGE_DAYS} days`);
+  }
+
+  const uniqueIds = Array.from(new Set(doctorIds));
+  const calendars = uniqueIds.length > 0 ? await getCalendars(uniqueIds) : new Map<number, DoctorCalendar>();
+
+  const result: Record<number, Record<string, string[]>> = {};
+  for (const doctorId of uniqueIds) {
+    const calendar = calendars.get(doctorId);
+    result[doctorId] = {};
+    for (const date of dates) {
+      result[doctorId][date] = slotsForDate(calendar, date);
+    }
+  }
+  return result;
+};
+
+export type SlotAvailability = {
+  slot: string; // "HH:mm - HH:mm"
+  capacity: number;
+  booked: number;
+  free: number;
+};
+
+export type DoctorDayAvailability = {
+  doctorId: number;
+  date: string; // YYYY-MM-DD
+  slots: SlotAvailability[];
+};
+
+/**
+ * Get non-cancelled bookings for several doctors over a date range in one query
+ * Returns slot start minutes keyed by "doctorId|YYYY-MM-DD"
+ */
+const getBookedStartsForRange = async (
+  doctorIds: number[],
+  dateFrom: string,
+  dateTo: string
+): Promise<Map<string, number[]>> => {
+  const rows = await db
+    .select({
+      doctorId: appointments.doctorId,
+      date: sql<string>`to_char(DATE(${appointments.appointmentDate}), 'YYYY-MM-DD')`,
+      appointmentTime: appointments.appointmentTime,
+      timeSlot: appointments.timeSlot,
+    })
+    .from(appointments)
+    .where(
+      and(
+        inArray(appointments.doctorId, doctorIds),
+        sql`DATE(${appointments.appointmentDate}) BETWEEN ${dateFrom}::date AND ${dateTo}::date`,
+        sql`${appointments.status} != 'cancelled'`
+      )
+    );
+
+  const booked = new Map<string, number[]>();
+  for (const row of rows) {
+    const key = `${row.doctorId}|${row.date}`;
+    if (!booked.has(key)) booked.set(key, []);
+    booked.get(key)!.push(parseSlotStartToMinutes(row.appointmentTime, row.timeSlot));
+  }
+  return booked;
+};
+
+/**
+ * Get free/booked/capacity per slot for several doctors over a date range
+ * Uses one rules query, one exceptions query and one appointments query in total,
+ * then yields one doctor-day at a time so callers can stream the result.
+ */
+export async function* getSlotAvailabilityForRange(
+  doctorIds: number[],
+  dateFrom: string, // YYYY-MM-DD
+  dateTo: string // YYYY-MM-DD
+): AsyncGenerator<DoctorDayAvailability> {
+  const dates = datesInRange(dateFrom, dateTo);
+  if (dates.length > MAX_RANGE_DAYS) {
+    throw new Error(`Date range cannot exceed ${MAX_RANGE_DAYS} days`);
+  }
+
+  const uniqueIds = Array.from(new Set(doctorIds));
+  if (uniqueIds.length === 0) return;
+
+  const [calendars, bookedStarts] = await Promise.all([
+    getCalendars(uniqueIds),
+    getBookedStartsForRange(uniqueIds, dateFrom, dateTo),
+  ]);
+
+  for (const doctorId of uniqueIds) {
+    const calendar = calendars.get(doctorId);
+    for (const date of dates) {
+      const rule = calendar?.rules[new Date(date + 'T00:00:00').getDay()];
+      const capacity = rule?.maxPatientsPerSlot || 1;
+      const starts = bookedStarts.get(`${doctorId}|${date}`) ?? [];
+
+      const slots = slotsForDate(calendar, date).map((slot) => {
+        const [slotStart, slotEnd] = slot.split('-').map((part) => parseSlotStartToMinutes(part.trim(), null));
+        const booked = starts.filter((start) => start >= slotStart && start < slotEnd).length;
+        return { slot, capacity, booked, free: Math.max(0, capacity - booked) };
+      });
+      yield { doctorId, date, slots };
+    }
+  }
+}
+
 /**
  * Generate time slots between start and end time
+ * Memoized per (start, end, duration); callers must copy before mutating.
  */
-const generateTimeSlots = (startTime: string, endTime: string, durationMinutes: number): string[] => {
+const generateTimeSlots = (startTime: string, endTime: string, durationMinutes: number): readonly string[] => {
+  const key = `${startTime}|${endTime}|${durationMinutes}`;
+  const cached = slotTemplates.get(key);
+  if (cached) return cached;
+
   const slots: string[] = [];
   const [startHour, startMin] = startTime.split(':').map(Number);
   const [endHour, endMin] = endTime.split(':').map(Number);
-  
-  let currentHour = startHour;
-  let currentMin = startMin;
-  
-  while (
-    currentHour < endHour ||
-    (currentHour === endHour && currentMin < endMin)
-  ) {
-    const slotStart = `${String(currentHour).padStart(2, '0')}:${String(currentMin).padStart(2, '0')}`;
-    
-    // Calculate end time
-    let slotEndHour = currentHour;
-    let slotEndMin = currentMin + durationMinutes;
-    
-    while (slotEndMin >= 60) {
-      slotEndMin -= 60;
-      slotEndHour += 1;
-    }
-    
-    const slotEnd = `${String(slotEndHour).padStart(2, '0')}:${String(slotEndMin).padStart(2, '0')}`;
-    
-    // Check if slot end is before or equal to endTime
-    if (
-      slotEndHour < endHour ||
-      (slotEndHour === endHour && slotEndMin <= endMin)
-    ) {
-      slots.push(`${slotStart} - ${slotEnd}`);
-    }
-    
-    // Move to next slot
-    currentMin += durationMinutes;
-    while (currentMin >= 60) {
-      currentMin -= 60;
-      currentHour += 1;
+  const endMinutes = endHour * 60 + endMin;
+  const pad = (minutes: number) =>
+    `${String(Math.floor(minutes / 60)).padStart(2, '0')}:${String(minutes % 60).padStart(2, '0')}`;
+
+  if (durationMinutes > 0) {
+    for (let current = startHour * 60 + startMin; current < endMinutes; current += durationMinutes) {
+      const slotEnd = current + durationMinutes;
+      // Check if slot end is before or equal to endTime
+      if (slotEnd <= endMinutes) {
+        slots.push(`${pad(current)} - ${pad(slotEnd)}`);
+      }
     }
   }
-  
+
+  slotTemplates.set(key, Object.freeze(slots));
   return slots;
 };
 
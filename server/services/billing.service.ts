@@ -13,6 +13,8 @@ import {
 import { eq, and, sql, desc } from 'drizzle-orm';
 import * as auditService from './audit.service.js';
 import { retryDbOperation } from '../utils/db-retry.js';
+import { applyPaymentToRollup, applyRefundToRollup } from './revenue-rollup.service.js';
+import { invalidateHospitalAnalytics } from './analytics-cache.js';
 
 /**
  * Generate unique invoice number for hospital
@@ -287,22 +289,28 @@ export const createInvoice = async (data: {
       // Create payment record
       // Note: receivedByUserId should be the user who created the invoice (receptionist)
       // For online payments, we don't have the original user, so we use the actorUserId or a system user
-      await db.insert(payments).values({
-        invoiceId: invoice.id,
-        method: paymentMethod,
-        amount: initialPaidAmount.toString(),
-        reference: paymentReference,
-        receivedByUserId: data.actorUserId || 1, // Use actorUserId or fallback to system user
-        receivedAt: paymentDate,
-        notes: `Online payment completed during appointment booking. Amount: ₹${initialPaidAmount}`,
-        createdAt: sql`NOW()`,
+      await db.transaction(async (tx) => {
+        const [payment] = await tx.insert(payments).values({
+          invoiceId: invoice.id,
+          method: paymentMethod,
+          amount: initialPaidAmount.toString(),
+          reference: paymentReference,
+          receivedByUserId: data.actorUserId || 1, // Use actorUserId or fallback to system user
+          receivedAt: paymentDate,
+          notes: `Online payment completed during appointment booking. Amount: ₹${initialPaidAmount}`,
+          createdAt: sql`NOW()`,
+        }).returning();
+        await applyPaymentToRollup(tx, payment.id);
       });
+      invalidateHospitalAnalytics(data.hospitalId, paymentDate);
     } catch (paymentError) {
       // Log error but don't fail invoice creation
       console.error('Failed to create payment record for pre-paid appointment:', paymentError);
     }
   }
   
+  invalidateHospitalAnalytics(data.hospitalId, new Date());
+  
   // Log audit event
   if (data.actorUserId && data.actorRole) {
     await auditService.logPatientAudit({
@@ -414,6 +422,8 @@ export const createLabTestInvoice = async (data: {
     )
   );
   
+  invalidateHospitalAnalytics(data.hospitalId, new Date());
+  
   // Log audit event
   if (data.actorUserId && data.actorRole) {
     await auditService.logPatientAudit({
@@ -461,6 +471,8 @@ export const issueInvoice = async (invoiceId: number, actorUserId?: number, acto
     throw new Error('Invoice not found');
   }
   
+  invalidateHospitalAnalytics(invoice.hospitalId, invoice.createdAt);
+  
   // Log audit event
   if (actorUserId && actorRole) {
     await auditService.logPatientAudit({
@@ -534,20 +546,24 @@ export const recordPayment = async (data: {
     paymentDate = new Date(); // For counter payments, use current time
   }
   
-  // Create payment record
-  const [payment] = await db
-    .insert(payments)
-    .values({
-      invoiceId: data.invoiceId,
-      method: data.method,
-      amount: data.amount.toString(),
-      reference: data.reference || null,
-      receivedByUserId: data.receivedByUserId,
-      receivedAt: paymentDate,
-      notes: data.notes || null,
-      createdAt: sql`NOW()`,
-    })
-    .returning();
+  // Create payment record (and count it in the daily revenue rollup)
+  const payment = await db.transaction(async (tx) => {
+    const [inserted] = await tx
+      .insert(payments)
+      .values({
+        invoiceId: data.invoiceId,
+        method: data.method,
+        amount: data.amount.toString(),
+        reference: data.reference || null,
+        receivedByUserId: data.receivedByUserId,
+        receivedAt: paymentDate,
+        notes: data.notes || null,
+        createdAt: sql`NOW()`,
+      })
+      .returning();
+    await applyPaymentToRollup(tx, inserted.id);
+    return inserted;
+  });
   
   // Update invoice
   const [updatedInvoice] = await db
@@ -561,6 +577,8 @@ export const recordPayment = async (data: {
     .where(eq(invoices.id, data.invoiceId))
     .returning();
   
+  invalidateHospitalAnalytics(invoice.hospitalId, paymentDate);
+  
   // Log audit event
   if (data.actorUserId && data.actorRole) {
     await auditService.logPatientAudit({
@@ -819,18 +837,22 @@ export const processRefund = async (data: {
     throw new Error('Refund amount cannot exceed paid amount');
   }
   
-  // Create refund record
-  const [refund] = await db
-    .insert(refunds)
-    .values({
-      invoiceId: data.invoiceId,
-      amount: data.amount.toString(),
-      reason: data.reason,
-      processedByUserId: data.processedByUserId,
-      processedAt: sql`NOW()`,
-      createdAt: sql`NOW()`,
-    })
-    .returning();
+  // Create refund record (and count it in the daily revenue rollup)
+  const refund = await db.transaction(async (tx) => {
+    const [inserted] = await tx
+      .insert(refunds)
+      .values({
+        invoiceId: data.invoiceId,
+        amount: data.amount.toString(),
+        reason: data.reason,
+        processedByUserId: data.processedByUserId,
+        processedAt: sql`NOW()`,
+        createdAt: sql`NOW()`,
+      })
+      .returning();
+    await applyRefundToRollup(tx, inserted.id);
+    return inserted;
+  });
   
   // Update invoice
   const newPaidAmount = paidAmount - data.amount;
@@ -847,6 +869,8 @@ export const processRefund = async (data: {
     .where(eq(invoices.id, data.invoiceId))
     .returning();
   
+  invalidateHospitalAnalytics(invoice.hospitalId, new Date());
+  
   // Log audit event
   if (data.actorUserId && data.actorRole) {
     await auditService.logPatientAudit({
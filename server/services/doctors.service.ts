@@ -3,6 +3,7 @@ import { db } from '../db.js';
 import { doctors, appointments, users, hospitals } from '../../shared/schema.js';
 import type { InsertDoctor } from '../../shared/schema-types.js';
 import { eq, like, and, or, sql } from 'drizzle-orm';
+import { invalidateDoctorUserId } from '../events/appointments.events.js';
 
 /**
  * Create a new doctor profile.
@@ -371,6 +372,7 @@ export const updateDoctorProfile = async (doctorId: number, data: Partial<Insert
     .set(rest)
     .where(eq(doctors.id, doctorId))
     .returning();
+  invalidateDoctorUserId(doctorId);
   
   console.log(`✅ Doctor ${doctorId} profile updated`);
   return result;
@@ -12,7 +12,7 @@ import {
   users,
   nurses,
 } from '../../shared/schema.js';
-import { eq, and, sql, isNull, asc, desc, inArray, or } from 'drizzle-orm';
+import { eq, and, sql, isNull, asc, desc, inArray, or, getTableColumns } from 'drizzle-orm';
 import * as auditService from './audit.service.js';
 
 /**
@@ -36,6 +36,8 @@ export const createFloor = async (data: {
     })
     .returning();
 
+  invalidateBedStructure(data.hospitalId);
+
   return floor;
 };
 
@@ -77,6 +79,8 @@ export const createWard = async (data: {
     })
     .returning();
 
+  invalidateBedStructure(data.hospitalId);
+
   return ward;
 };
 
@@ -125,6 +129,8 @@ export const createRoom = async (data: {
     })
     .returning();
 
+  invalidateBedStructure();
+
   return room;
 };
 
@@ -169,6 +175,8 @@ export const updateRoom = async (
     .where(eq(rooms.id, roomId))
     .returning();
 
+  invalidateBedStructure();
+
   return updated;
 };
 
@@ -197,6 +205,8 @@ export const createBed = async (data: {
     })
     .returning();
 
+  invalidateBedStructure();
+
   return bed;
 };
 
@@ -242,152 +252,128 @@ export const getAvailableBeds = async (hospitalId: number) => {
   return availableBeds;
 };
 
+// Bed structure cache. Writes through this service invalidate immediately; the TTL only bounds
+// staleness after edits made outside it (scripts, other instances).
+const BED_STRUCTURE_TTL_MS = 60 * 1000;
+
+type BedStructure = Awaited<ReturnType<typeof loadBedStructure>>;
+
+const bedStructureCache = new Map<number, { structure: BedStructure; loadedAt: number }>();
+const bedStructureLoads = new Map<number, Promise<BedStructure>>();
+// Bumped on every invalidation so a load that raced a write is not cached.
+const bedStructureVersions = new Map<number, number>();
+let bedStructureGeneration = 0;
+
+const bedStructureVersion = (hospitalId: number) =>
+  `${bedStructureGeneration}|${bedStructureVersions.get(hospitalId) ?? 0}`;
+
 /**
- * Get complete bed structure for hospital (hierarchical view)
+ * Drop cached bed structure after a floor/ward/room/bed or occupancy change.
+ * Without a hospital id (room/bed edits only know their own id) every hospital is dropped.
  */
-export const getBedStructure = async (hospitalId: number) => {
-  
-  // Get all floors
-  const floorsList = await getFloors(hospitalId);
-  
-  // Get all wards (with floor info)
-  const wardsListRaw = await getWards(hospitalId);
-  
-  // Flatten wards structure
-  const wardsList = wardsListRaw.map((row: any) => {
-    if (!row.ward) {
-      console.warn('⚠️ Ward row missing ward data:', row);
-      return null;
-    }
-    return {
-      ...row.ward,
-      floorId: row.ward.floorId || row.floor?.id || null,
-      floor: row.floor || null,
-    };
-  }).filter((w: any) => w !== null);
-  
-  // Get all rooms - flatten the nested structure
-  const roomsListRaw = await db
-    .select({
-      room: rooms,
-      ward: wards,
-    })
-    .from(rooms)
-    .leftJoin(wards, eq(rooms.wardId, wards.id))
-    .where(and(eq(wards.hospitalId, hospitalId), eq(rooms.isActive, true)))
-    .orderBy(asc(rooms.roomNumber));
-  
-  // Flatten rooms structure
-  const roomsList = roomsListRaw.map((row: any) => {
-    if (!row.room) {
-      console.warn('⚠️ Room row missing room data:', row);
-      return null;
-    }
-    return {
-      ...row.room,
-      wardId: row.ward?.id || row.room.wardId || null,
-    };
-  }).filter((r: any) => r !== null);
-  
-  // Get all beds with occupancy info
-  // First get all rooms for this hospital, then get beds for those rooms
-  const hospitalRoomIds = await db
-    .select({ id: rooms.id })
-    .from(rooms)
-    .leftJoin(wards, eq(rooms.wardId, wards.id))
-    .where(and(
-      eq(wards.hospitalId, hospitalId),
-      eq(rooms.isActive, true)
-    ));
-  
-  const roomIdList = hospitalRoomIds.map((r: any) => r.id);
-  
-  const bedsListRaw = roomIdList.length > 0 ? await db
-    .select({
-      bed: beds,
-      room: rooms,
-      ward: wards,
-      floor: floors,
-      currentAllocation: bedAllocations,
-      currentEncounter: ipdEncounters,
-      currentPatient: patients,
-    })
-    .from(beds)
-    .leftJoin(rooms, eq(beds.roomId, rooms.id))
-    .leftJoin(wards, eq(rooms.wardId, wards.id))
-    .leftJoin(floors, eq(wards.floorId, floors.id))
-    .leftJoin(bedAllocations, and(
-      eq(bedAllocations.bedId, beds.id),
-      isNull(bedAllocations.toAt)
-    ))
-    .leftJoin(ipdEncounters, eq(bedAllocations.encounterId, ipdEncounters.id))
-    .leftJoin(patients, eq(ipdEncounters.patientId, patients.id))
-    .where(inArray(beds.roomId, roomIdList))
-    .orderBy(asc(floors.floorNumber), asc(wards.name), asc(rooms.roomNumber), asc(beds.bedNumber)) : [];
-
-  // Flatten beds structure and determine status
-  const bedsList = bedsListRaw.map((row: any) => {
-    if (!row.bed) {
-      console.warn('⚠️ Bed row missing bed data:', row);
-      return null;
-    }
-    
-    const bed = row.bed;
-    const isOccupied = !!row.currentAllocation;
-    
-    // Determine bed status
-    // Priority: occupied > blocked > cleaning > available
-    // If there's an active allocation, bed is occupied regardless of bed.status
-    // If no active allocation, use bed.status but ensure it's not showing as occupied
-    let status = bed.status || 'available';
-    
-    // Log bed status determination for debugging
-    if (bedsListRaw.length <= 3 || bedsListRaw.indexOf(row) < 3) {
-    }
-    
-    if (isOccupied) {
-      // Active allocation exists - bed is definitely occupied
-      status = 'occupied';
-    } else {
-      // No active allocation - bed should not be occupied
-      // Priority: blocked > available (cleaning beds should be available for new patients if no allocation)
-      if (bed.status === 'blocked') {
-        // Keep blocked status
-        status = 'blocked';
-      } else if (bed.status === 'occupied') {
-        // Bed status says occupied but no active allocation - fix inconsistency
-        status = 'available';
-      } else {
-        // If no active allocation, bed should be available (even if status says 'cleaning')
-        // Cleaning is a temporary state - if there's no active allocation, the bed is available for new patients
-        status = 'available';
-        if (bed.status && bed.status !== 'available' && bed.status !== 'blocked') {
-        }
-      }
-    }
-    
-    return {
-      ...bed,
-      roomId: bed.roomId || null,
-      status,
-      currentPatient: row.currentPatient ? {
-        id: row.currentPatient.id,
-        user: row.currentPatient.userId ? {
-          fullName: row.currentPatient.userId, // Will need to fetch separately if needed
+export const invalidateBedStructure = (hospitalId?: number | null) => {
+  if (hospitalId) {
+    bedStructureCache.delete(hospitalId);
+    bedStructureLoads.delete(hospitalId);
+    bedStructureVersions.set(hospitalId, (bedStructureVersions.get(hospitalId) ?? 0) + 1);
+  } else {
+    bedStructureCache.clear();
+    bedStructureLoads.clear();
+    bedStructureGeneration++;
+  }
+};
+
+// Bed status shown on the map: an open allocation means occupied; otherwise only 'blocked'
+// survives (a 'cleaning' or stale 'occupied' bed without an allocation can take a patient).
+const displayBedStatus = (status: string | null, hasAllocation: boolean) => {
+  if (hasAllocation) return 'occupied';
+  return status === 'blocked' ? 'blocked' : 'available';
+};
+
+const loadBedStructure = async (hospitalId: number) => {
+  const [floorsList, wardsList, roomsList, bedRows] = await Promise.all([
+    getFloors(hospitalId),
+    db
+      .select({ ...getTableColumns(wards), floor: floors })
+      .from(wards)
+      .leftJoin(floors, eq(wards.floorId, floors.id))
+      .where(and(eq(wards.hospitalId, hospitalId), eq(wards.isActive, true)))
+      .orderBy(asc(wards.name)),
+    db
+      .select(getTableColumns(rooms))
+      .from(rooms)
+      .innerJoin(wards, eq(rooms.wardId, wards.id))
+      .where(and(eq(wards.hospitalId, hospitalId), eq(rooms.isActive, true)))
+      .orderBy(asc(rooms.roomNumber)),
+    // Beds of the hospital's active rooms with their open allocation's patient, if any
+    db
+      .select({
+        bed: beds,
+        allocationId: bedAllocations.id,
+        patientId: patients.id,
+        patientUserId: patients.userId,
+      })
+      .from(beds)
+      .innerJoin(rooms, eq(beds.roomId, rooms.id))
+      .innerJoin(wards, eq(rooms.wardId, wards.id))
+      .leftJoin(floors, eq(wards.floorId, floors.id))
+      .leftJoin(bedAllocations, and(eq(bedAllocations.bedId, beds.id), isNull(bedAllocations.toAt)))
+      .leftJoin(ipdEncounters, eq(bedAllocations.encounterId, ipdEncounters.id))
+      .leftJoin(patients, eq(ipdEncounters.patientId, patients.id))
+      .where(and(eq(wards.hospitalId, hospitalId), eq(rooms.isActive, true)))
+      .orderBy(asc(floors.floorNumber), asc(wards.name), asc(rooms.roomNumber), asc(beds.bedNumber)),
+  ]);
+
+  // One pass over the (ordered) bed rows; a bed with more than one open allocation keeps its first row
+  const bedsById = new Map<number, typeof bedRows[number]['bed'] & {
+    currentPatient: { id: number; user: { fullName: number } | null } | null;
+  }>();
+  for (const row of bedRows) {
+    if (bedsById.has(row.bed.id)) continue;
+    bedsById.set(row.bed.id, Object.assign(row.bed, {
+      status: displayBedStatus(row.bed.status, row.allocationId != null),
+      currentPatient: row.patientId != null ? {
+        id: row.patientId,
+        user: row.patientUserId ? {
+          fullName: row.patientUserId, // Will need to fetch separately if needed
         } : null,
       } : null,
-    };
-  }).filter((b: any) => b !== null);
-  
+    }));
+  }
 
-  const structure = {
+  return {
     floors: floorsList,
     wards: wardsList,
     rooms: roomsList,
-    beds: bedsList,
+    beds: [...bedsById.values()],
   };
-  
-  return structure;
+};
+
+/**
+ * Get complete bed structure for hospital (hierarchical view), cached per hospital
+ */
+export const getBedStructure = async (hospitalId: number): Promise<BedStructure> => {
+  const cached = bedStructureCache.get(hospitalId);
+  if (cached && Date.now() - cached.loadedAt <= BED_STRUCTURE_TTL_MS) {
+    return cached.structure;
+  }
+
+  let load = bedStructureLoads.get(hospitalId);
+  if (!load) {
+    const version = bedStructureVersion(hospitalId);
+    load = loadBedStructure(hospitalId)
+      .then((structure) => {
+        if (bedStructureVersion(hospitalId) === version) {
+          bedStructureCache.set(hospitalId, { structure, loadedAt: Date.now() });
+        }
+        return structure;
+      })
+      .finally(() => {
+        if (bedStructureLoads.get(hospitalId) === load) bedStructureLoads.delete(hospitalId);
+      });
+    bedStructureLoads.set(hospitalId, load);
+  }
+  return load;
 };
 
 /**
@@ -478,6 +464,8 @@ export const admitPatient = async (data: {
     });
   }
 
+  invalidateBedStructure(data.hospitalId);
+
   return encounter;
 };
 
@@ -924,6 +912,8 @@ export const transferPatient = async (data: {
     });
   }
 
+  invalidateBedStructure(enc.hospitalId);
+
   return await getIpdEncounterById(data.encounterId);
 };
 
@@ -1120,6 +1110,8 @@ export const dischargePatient = async (data: {
     });
   }
 
+  invalidateBedStructure(enc.hospitalId);
+
   return updated;
 };
 
@@ -1144,6 +1136,8 @@ export const deleteFloor = async (floorId: number) => {
     .where(eq(floors.id, floorId))
     .returning();
 
+  invalidateBedStructure(deleted?.hospitalId);
+
   return deleted;
 };
 
@@ -1169,6 +1163,8 @@ export const deleteWard = async (wardId: number) => {
     .where(eq(wards.id, wardId))
     .returning();
 
+  invalidateBedStructure(deleted?.hospitalId);
+
   return deleted;
 };
 
@@ -1193,6 +1189,8 @@ export const deleteRoom = async (roomId: number) => {
     .where(eq(rooms.id, roomId))
     .returning();
 
+  invalidateBedStructure();
+
   return deleted;
 };
 
@@ -1212,6 +1210,8 @@ export const deleteBed = async (bedId: number) => {
   }
 
   await db.delete(beds).where(eq(beds.id, bedId));
+  invalidateBedStructure();
+
   return { id: bedId };
 };
 
@@ -1244,6 +1244,8 @@ export const updateBed = async (
     .where(eq(beds.id, bedId))
     .returning();
 
+  invalidateBedStructure();
+
   return updated;
 };
 
@@ -1281,6 +1283,8 @@ export const updateBedStatus = async (
     .where(eq(beds.id, bedId))
     .returning();
 
+  invalidateBedStructure();
+
   return updated;
 };
 
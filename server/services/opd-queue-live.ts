@@ -0,0 +1,295 @@
+/**
+ * Live OPD queue model, one per (doctorId, queueDate).
+ *
+ * - Built once from the 4-way join, then kept ordered by the queue rank (on-time before late,
+ *   then slot start, then check-in time). Once staff reorder a queue by hand
+ *   (opd_queue_manual_order) its rank is the manual order key, position. Either rank only
+ *   changes when the row itself is written, so entries are placed by binary search and never
+ *   re-sorted.
+ * - queue.service.ts applies each change by refetching only the touched row; reads return the
+ *   cached ordered snapshot.
+ * - Every change is published as a diff (upsert at index / remove / reset) via onQueueDiff.
+ * - A model older than LIVE_QUEUE_TTL_MS is rebuilt on next read, which bounds staleness from
+ *   writes that bypass queue.service.ts.
+ */
+import { EventEmitter } from 'events';
+import { db } from '../db.js';
+import { opdQueueEntries, opdQueueManualOrder, appointments, patients, doctors } from '../../shared/schema.js';
+import { eq, and, type SQL } from 'drizzle-orm';
+import {
+  parseTokenIdentifier,
+  slotKeyToMinutes,
+  isLateArrival,
+  getSlotKeyFromAppointment,
+  type SlotKey,
+} from './opd-token.js';
+import { onAppointmentEvent } from '../events/appointments.events.js';
+
+const LIVE_QUEUE_TTL_MS = 2 * 60 * 1000;
+// Models nobody has read for this long are dropped.
+const LIVE_QUEUE_IDLE_MS = 30 * 60 * 1000;
+
+const selectQueueRows = (where: SQL | undefined) =>
+  db
+    .select({
+      queue: opdQueueEntries,
+      appointment: appointments,
+      patient: patients,
+      doctor: doctors,
+    })
+    .from(opdQueueEntries)
+    .leftJoin(appointments, eq(opdQueueEntries.appointmentId, appointments.id))
+    .leftJoin(patients, eq(opdQueueEntries.patientId, patients.id))
+    .leftJoin(doctors, eq(opdQueueEntries.doctorId, doctors.id))
+    .where(where);
+
+export type QueueRow = Awaited<ReturnType<typeof selectQueueRows>>[number];
+
+export type QueueDiff =
+  | { version: number; op: 'upsert'; index: number; row: QueueRow }
+  | { version: number; op: 'remove'; id: number }
+  | { version: number; op: 'reset'; rows: QueueRow[] };
+
+export type QueueDiffEvent = {
+  doctorId: number;
+  queueDate: string;
+  hospitalId: number | null;
+  diff: QueueDiff;
+};
+
+type RankedRow = {
+  row: QueueRow;
+  late: boolean;
+  slotMinutes: number;
+  checkedInMs: number;
+  position: number;
+};
+
+/**
+ * Slot of a queue row: from its token identifier, else from the appointment time.
+ */
+export const slotKeyForRow = (row: QueueRow): SlotKey | null => {
+  const tokenId = (row.queue as any).tokenIdentifier;
+  return tokenId
+    ? parseTokenIdentifier(tokenId)?.slotKey ?? null
+    : row.appointment
+      ? getSlotKeyFromAppointment(
+          (row.appointment as any).appointmentTime,
+          (row.appointment as any).timeSlot,
+        )
+      : null;
+};
+
+const rankRow = (row: QueueRow, queueDate: string): RankedRow => {
+  const slotKey = slotKeyForRow(row);
+  const checkedInAt = (row.queue as any).checkedInAt;
+  return {
+    row,
+    late: slotKey ? isLateArrival(slotKey, queueDate, checkedInAt) : false,
+    slotMinutes: slotKey ? slotKeyToMinutes(slotKey) : 0,
+    checkedInMs: checkedInAt ? new Date(checkedInAt).getTime() : 0,
+    position: row.queue.position,
+  };
+};
+
+/**
+ * Manual order: position, then id.
+ * Computed order: Layer 0 = on-time before late, Layer 1 = slot priority, Layer 2 = arrival; id keeps ties stable.
+ */
+const compareRanked = (a: RankedRow, b: RankedRow, manualOrder: boolean) => {
+  if (manualOrder) return a.position - b.position || a.row.queue.id - b.row.queue.id;
+  if (a.late !== b.late) return a.late ? 1 : -1;
+  if (a.slotMinutes !== b.slotMinutes) return a.slotMinutes - b.slotMinutes;
+  if (a.checkedInMs !== b.checkedInMs) return a.checkedInMs - b.checkedInMs;
+  return a.row.queue.id - b.row.queue.id;
+};
+
+const emitter = new EventEmitter();
+emitter.setMaxListeners(0);
+
+class LiveQueue {
+  private entries: RankedRow[] = [];
+  private byId = new Map<number, RankedRow>();
+  private rows: QueueRow[] | null = null;
+  hospitalId: number | null = null;
+  manualOrder = false;
+  version = 0;
+  builtAt = 0;
+  lastReadAt = Date.now();
+
+  constructor(readonly doctorId: number, readonly queueDate: string) {}
+
+  reset(rows: QueueRow[], manualOrder: boolean): QueueDiff {
+    this.manualOrder = manualOrder;
+    this.entries = rows
+      .map((row) => rankRow(row, this.queueDate))
+      .sort((a, b) => compareRanked(a, b, manualOrder));
+    this.byId = new Map(this.entries.map((e) => [e.row.queue.id, e]));
+    this.hospitalId = rows[0]?.queue.hospitalId ?? this.hospitalId;
+    this.rows = null;
+    this.builtAt = Date.now();
+    return this.publish({ version: ++this.version, op: 'reset', rows: this.snapshot() });
+  }
+
+  snapshot(): QueueRow[] {
+    if (!this.rows) this.rows = this.entries.map((e) => e.row);
+    return this.rows;
+  }
+
+  entryIdForAppointment(appointmentId: number): number | null {
+    for (const e of this.entries) {
+      if (e.row.queue.appointmentId === appointmentId) return e.row.queue.id;
+    }
+    return null;
+  }
+
+  upsert(row: QueueRow): QueueDiff {
+    const ranked = rankRow(row, this.queueDate);
+    const previous = this.byId.get(row.queue.id);
+    if (previous) {
+      this.entries.splice(this.entries.indexOf(previous), 1);
+    }
+    let lo = 0;
+    let hi = this.entries.length;
+    while (lo < hi) {
+      const mid = (lo + hi) >>> 1;
+      if (compareRanked(this.entries[mid], ranked, this.manualOrder) < 0) lo = mid + 1;
+      else hi = mid;
+    }
+    this.entries.splice(lo, 0, ranked);
+    this.byId.set(row.queue.id, ranked);
+    this.hospitalId = row.queue.hospitalId;
+    this.rows = null;
+    return this.publish({ version: ++this.version, op: 'upsert', index: lo, row });
+  }
+
+  remove(id: number): QueueDiff | null {
+    const previous = this.byId.get(id);
+    if (!previous) return null;
+    this.entries.splice(this.entries.indexOf(previous), 1);
+    this.byId.delete(id);
+    this.rows = null;
+    return this.publish({ version: ++this.version, op: 'remove', id });
+  }
+
+  private publish(diff: QueueDiff): QueueDiff {
+    const evt: QueueDiffEvent = {
+      doctorId: this.doctorId,
+      queueDate: this.queueDate,
+      hospitalId: this.hospitalId,
+      diff,
+    };
+    emitter.emit('diff', evt);
+    return diff;
+  }
+}
+
+const liveQueues = new Map<string, LiveQueue>();
+const builds = new Map<string, Promise<LiveQueue>>();
+
+const keyOf = (doctorId: number, queueDate: string) => `${doctorId}|${queueDate}`;
+
+const sweepIdle = () => {
+  const now = Date.now();
+  liveQueues.forEach((queue, key) => {
+    if (now - queue.lastReadAt > LIVE_QUEUE_IDLE_MS) liveQueues.delete(key);
+  });
+};
+
+/**
+ * Get the live queue for a doctor/date, building (or rebuilding after the TTL) from the DB.
+ * Concurrent callers share one build.
+ */
+const getLiveQueue = async (doctorId: number, queueDate: string): Promise<LiveQueue> => {
+  const key = keyOf(doctorId, queueDate);
+  const existing = liveQueues.get(key);
+  if (existing && Date.now() - existing.builtAt <= LIVE_QUEUE_TTL_MS) return existing;
+
+  let build = builds.get(key);
+  if (!build) {
+    build = (async () => {
+      const [rows, manual] = await Promise.all([
+        selectQueueRows(
+          and(eq(opdQueueEntries.doctorId, doctorId), eq(opdQueueEntries.queueDate, queueDate)),
+        ),
+        db
+          .select({ doctorId: opdQueueManualOrder.doctorId })
+          .from(opdQueueManualOrder)
+          .where(and(eq(opdQueueManualOrder.doctorId, doctorId), eq(opdQueueManualOrder.queueDate, queueDate)))
+          .limit(1),
+      ]);
+      const queue = liveQueues.get(key) ?? new LiveQueue(doctorId, queueDate);
+      queue.reset(rows, manual.length > 0);
+      sweepIdle();
+      liveQueues.set(key, queue);
+      return queue;
+    })().finally(() => builds.delete(key));
+    builds.set(key, build);
+  }
+  return build;
+};
+
+/**
+ * Ordered queue rows for a doctor/date (same shape as the join rows). Served from memory.
+ */
+export const getLiveQueueRows = async (doctorId: number, queueDate: string): Promise<QueueRow[]> => {
+  const queue = await getLiveQueue(doctorId, queueDate);
+  queue.lastReadAt = Date.now();
+  return queue.snapshot();
+};
+
+/**
+ * Re-read one queue entry (with its joins) and move it into place in its live queue.
+ * Returns the published diff. Best-effort: on failure the model is dropped, rebuilt on
+ * next read, and null is returned.
+ */
+export const refreshQueueEntry = async (
+  entry: { id: number; doctorId: number; queueDate: string },
+): Promise<QueueDiff | null> => {
+  const key = keyOf(entry.doctorId, entry.queueDate);
+  try {
+    const queue = await getLiveQueue(entry.doctorId, entry.queueDate);
+    const [row] = await selectQueueRows(eq(opdQueueEntries.id, entry.id));
+    if (row && row.queue.doctorId === entry.doctorId && row.queue.queueDate === entry.queueDate) {
+      return queue.upsert(row);
+    }
+    return queue.remove(entry.id);
+  } catch (e) {
+    console.error('❌ Live queue refresh failed; dropping model:', e);
+    liveQueues.delete(key);
+    return null;
+  }
+};
+
+/**
+ * Rebuild a doctor/date queue from the DB (for changes that touch many rows).
+ */
+export const reloadLiveQueue = async (doctorId: number, queueDate: string) => {
+  const key = keyOf(doctorId, queueDate);
+  const existing = liveQueues.get(key);
+  if (existing) existing.builtAt = 0; // force the next getLiveQueue to rebuild
+  try {
+    await getLiveQueue(doctorId, queueDate);
+  } catch (e) {
+    console.error('❌ Live queue reload failed; dropping model:', e);
+    liveQueues.delete(key);
+  }
+};
+
+/**
+ * Subscribe to queue diffs for every live queue. Returns an unsubscribe function.
+ */
+export function onQueueDiff(listener: (evt: QueueDiffEvent) => void) {
+  emitter.on('diff', listener);
+  return () => emitter.off('diff', listener);
+}
+
+// Appointment status/time changes show up in the joined appointment columns.
+onAppointmentEvent((evt) => {
+  liveQueues.forEach((queue) => {
+    const entryId = queue.entryIdForAppointment(evt.appointmentId);
+    if (entryId != null) {
+      void refreshQueueEntry({ id: entryId, doctorId: queue.doctorId, queueDate: queue.queueDate });
+    }
+  });
+});
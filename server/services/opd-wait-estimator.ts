@@ -0,0 +1,176 @@
+/**
+ * Per-doctor consultation-duration estimator for OPD wait times.
+ *
+ * - Exponentially weighted mean of (completedAt - consultationStartedAt), bucketed by weekday
+ *   and slot hour, with a per-doctor overall mean as fallback.
+ * - Seeded once per doctor from the last SEED_DAYS of completed queue entries, then updated
+ *   in memory on every completeConsultation.
+ * - Estimated wait for a queued patient = remaining time of the consultation in progress plus
+ *   the expected duration of everyone ahead of them.
+ */
+import { db } from '../db.js';
+import { opdQueueEntries } from '../../shared/schema.js';
+import { and, eq, gte, isNotNull, sql } from 'drizzle-orm';
+import { slotKeyForRow, type QueueRow } from './opd-queue-live.js';
+import { parseTokenIdentifier } from './opd-token.js';
+
+const ALPHA = 0.2;
+const SEED_DAYS = 60;
+// A bucket needs this many samples before it is trusted over the doctor's overall mean.
+const MIN_BUCKET_SAMPLES = 3;
+const DEFAULT_CONSULT_MINUTES = 10;
+// Durations outside this range are data-entry noise (forgot to press complete, double click).
+const MIN_SAMPLE_MINUTES = 1;
+const MAX_SAMPLE_MINUTES = 120;
+
+const WAITING_STATUSES = new Set(['waiting', 'called']);
+
+type Ewma = { mean: number; n: number };
+
+type DoctorStats = {
+  overall: Ewma;
+  buckets: Map<string, Ewma>;
+  seededThrough: number; // completedAt (ms) of the newest seeded sample
+};
+
+const stats = new Map<number, DoctorStats>();
+const seeding = new Map<number, Promise<DoctorStats>>();
+let version = 0;
+
+const bucketKey = (weekday: number, hour: number) => `${weekday}|${hour}`;
+
+const weekdayOf = (queueDate: string) => new Date(queueDate + 'T00:00:00').getDay();
+
+const fold = (ewma: Ewma, minutes: number) => {
+  ewma.mean = ewma.n === 0 ? minutes : ALPHA * minutes + (1 - ALPHA) * ewma.mean;
+  ewma.n += 1;
+};
+
+const addSample = (doctorStats: DoctorStats, weekday: number, hour: number | null, minutes: number) => {
+  if (!(minutes >= MIN_SAMPLE_MINUTES && minutes <= MAX_SAMPLE_MINUTES)) return;
+  fold(doctorStats.overall, minutes);
+  if (hour != null) {
+    const key = bucketKey(weekday, hour);
+    if (!doctorStats.buckets.has(key)) doctorStats.buckets.set(key, { mean: 0, n: 0 });
+    fold(doctorStats.buckets.get(key)!, minutes);
+  }
+  version++;
+};
+
+const minutesBetween = (from: Date | string, to: Date | string) =>
+  (new Date(to).getTime() - new Date(from).getTime()) / 60000;
+
+/**
+ * Load (once) a doctor's recent completed consultations in completion order
+ */
+const getDoctorStats = async (doctorId: number): Promise<DoctorStats> => {
+  const cached = stats.get(doctorId);
+  if (cached) return cached;
+
+  let seed = seeding.get(doctorId);
+  if (!seed) {
+    seed = (async () => {
+      const since = new Date(Date.now() - SEED_DAYS * 86400000);
+      const rows = await db
+        .select({
+          queueDate: opdQueueEntries.queueDate,
+          tokenIdentifier: opdQueueEntries.tokenIdentifier,
+          consultationStartedAt: opdQueueEntries.consultationStartedAt,
+          completedAt: opdQueueEntries.completedAt,
+        })
+        .from(opdQueueEntries)
+        .where(
+          and(
+            eq(opdQueueEntries.doctorId, doctorId),
+            eq(opdQueueEntries.status, 'completed'),
+            isNotNull(opdQueueEntries.consultationStartedAt),
+            gte(opdQueueEntries.completedAt, since),
+          ),
+        )
+        .orderBy(sql`${opdQueueEntries.completedAt} ASC`);
+
+      const doctorStats: DoctorStats = { overall: { mean: 0, n: 0 }, buckets: new Map(), seededThrough: 0 };
+      for (const row of rows) {
+        const hour = parseTokenIdentifier(row.tokenIdentifier)?.slotKey.hour
+          ?? new Date(row.consultationStartedAt!).getHours();
+        addSample(doctorStats, weekdayOf(row.queueDate), hour, minutesBetween(row.consultationStartedAt!, row.completedAt!));
+        doctorStats.seededThrough = new Date(row.completedAt!).getTime();
+      }
+      stats.set(doctorId, doctorStats);
+      return doctorStats;
+    })().finally(() => seeding.delete(doctorId));
+    seeding.set(doctorId, seed);
+  }
+  return seed;
+};
+
+/**
+ * Fold a just-completed consultation into the doctor's estimate. Best-effort.
+ */
+export const recordConsultation = async (entry: {
+  doctorId: number;
+  queueDate: string;
+  tokenIdentifier: string | null;
+  consultationStartedAt: Date | null;
+  completedAt: Date | null;
+}) => {
+  if (!entry.consultationStartedAt || !entry.completedAt) return;
+  try {
+    const doctorStats = await getDoctorStats(entry.doctorId);
+    // Already counted if the seed query ran after this completion was committed
+    if (new Date(entry.completedAt).getTime() <= doctorStats.seededThrough) return;
+    const hour = parseTokenIdentifier(entry.tokenIdentifier)?.slotKey.hour
+      ?? new Date(entry.consultationStartedAt).getHours();
+    addSample(doctorStats, weekdayOf(entry.queueDate), hour, minutesBetween(entry.consultationStartedAt, entry.completedAt));
+  } catch (e) {
+    console.error('❌ Failed to record consultation duration:', e);
+  }
+};
+
+const expectedMinutes = (doctorStats: DoctorStats, weekday: number, hour: number | null) => {
+  const bucket = hour != null ? doctorStats.buckets.get(bucketKey(weekday, hour)) : undefined;
+  if (bucket && bucket.n >= MIN_BUCKET_SAMPLES) return bucket.mean;
+  if (doctorStats.overall.n > 0) return doctorStats.overall.mean;
+  return DEFAULT_CONSULT_MINUTES;
+};
+
+export type QueueRowWithWait = QueueRow & { estimatedWaitMinutes: number | null };
+
+// Annotated rows are reused until the queue, the estimates or the clock minute change.
+const annotated = new WeakMap<QueueRow[], { version: number; minute: number; rows: QueueRowWithWait[] }>();
+
+/**
+ * Add estimatedWaitMinutes to each row of an ordered queue (null for entries no longer waiting)
+ */
+export const withEstimatedWaits = async (
+  doctorId: number,
+  queueDate: string,
+  rows: QueueRow[],
+): Promise<QueueRowWithWait[]> => {
+  const doctorStats = await getDoctorStats(doctorId);
+  const now = Date.now();
+  const minute = Math.floor(now / 60000);
+  const cached = annotated.get(rows);
+  if (cached && cached.version === version && cached.minute === minute) return cached.rows;
+
+  const weekday = weekdayOf(queueDate);
+  let ahead = 0;
+  for (const row of rows) {
+    if (row.queue.status !== 'in_consultation') continue;
+    const expected = expectedMinutes(doctorStats, weekday, slotKeyForRow(row)?.hour ?? null);
+    const elapsed = row.queue.consultationStartedAt ? minutesBetween(row.queue.consultationStartedAt, new Date(now)) : 0;
+    ahead += Math.max(0, expected - elapsed);
+  }
+
+  const result = rows.map((row) => {
+    if (!WAITING_STATUSES.has(row.queue.status)) {
+      return { ...row, estimatedWaitMinutes: null };
+    }
+    const wait = Math.round(ahead);
+    ahead += expectedMinutes(doctorStats, weekday, slotKeyForRow(row)?.hour ?? null);
+    return { ...row, estimatedWaitMinutes: wait };
+  });
+
+  annotated.set(rows, { version, minute, rows: result });
+  return result;
+};
@@ -4,6 +4,7 @@ import { patients, users, patientFamilyMembers } from "../../shared/schema.js";
 import { InsertPatient } from "../../shared/schema-types.js";
 import { eq, and, sql } from "drizzle-orm";
 import { hashPassword, verifyOtp } from "./auth.service.js";
+import { invalidatePatientUserId } from "../events/appointments.events.js";
 
 /**
  * Get patient by ID.
@@ -99,6 +100,7 @@ export const updatePatientByUserId = async (userId: number, data: Partial<Insert
     .set(data)
     .where(eq(patients.userId, userId))
     .returning();
+  result.forEach((patient) => invalidatePatientUserId(patient.id));
   
   console.log(`✅ Patient updated for user ${userId}`);
   return result[0] || null;
@@ -114,6 +116,7 @@ export const updatePatientById = async (patientId: number, data: Partial<InsertP
     .set(data)
     .where(eq(patients.id, patientId))
     .returning();
+  invalidatePatientUserId(patientId);
   
   console.log(`✅ Patient ${patientId} updated`);
   return result[0] || null;
@@ -1,12 +1,13 @@
 import { db } from '../db.js';
-import { opdQueueEntries, appointments, patients, doctors, users } from '../../shared/schema.js';
+import { opdQueueEntries, opdQueueManualOrder, appointments, patients, doctors, users } from '../../shared/schema.js';
 import { eq, and, sql, desc, ne, inArray, not } from 'drizzle-orm';
-import {
-  parseTokenIdentifier,
-  slotKeyToMinutes,
-  isLateArrival,
-  getSlotKeyFromAppointment,
-} from './opd-token.js';
+import { getLiveQueueRows, refreshQueueEntry, reloadLiveQueue } from './opd-queue-live.js';
+import { recordConsultation, withEstimatedWaits } from './opd-wait-estimator.js';
+import { emitQueueChanged } from '../events/queue.events.js';
+
+// Manual order keys are sparse integers: a move writes the midpoint between its new neighbours,
+// so it touches one row. Keys are only renumbered when a gap is used up.
+const POSITION_GAP = 1024;
 
 /**
  * Check-in appointment into OPD queue. Uses token_identifier from appointment (assigned at book).
@@ -44,7 +45,7 @@ export const checkInToQueue = async (
     .select({ maxPosition: sql<number>`COALESCE(MAX(${opdQueueEntries.position}), 0)` })
     .from(opdQueueEntries)
     .where(and(eq(opdQueueEntries.doctorId, apt.doctorId), eq(opdQueueEntries.queueDate, queueDate)));
-  const nextPosition = (maxPositionResult[0]?.maxPosition ?? 0) + 1;
+  const nextPosition = (maxPositionResult[0]?.maxPosition ?? 0) + POSITION_GAP;
 
   const tokenIdentifier = (apt as any).tokenIdentifier ?? null;
 
@@ -70,6 +71,7 @@ export const checkInToQueue = async (
     .set({ checkedInAt: sql`NOW()`, status: 'checked-in' })
     .where(eq(appointments.id, appointmentId));
 
+  emitQueueChanged('checked-in', queueEntry, await refreshQueueEntry(queueEntry));
   return queueEntry;
 };
 
@@ -77,54 +79,42 @@ export const checkInToQueue = async (
  * Get queue for doctor and date. Only ACTIVE (checked-in) entries.
  * Order: Layer 1 = slot priority (earlier slot first), Layer 2 = arrival (earlier check-in first).
  * Late arrival (check-in after slot start): slot priority expired, ordered after on-time patients by check-in time.
+ * Served from the live queue model (opd-queue-live.ts), which the mutations below keep current.
+ * Each row carries estimatedWaitMinutes (opd-wait-estimator.ts); null once the patient is no longer waiting.
  */
 export const getQueueForDoctor = async (
   doctorId: number,
   queueDate: string // YYYY-MM-DD
 ) => {
-  const rows = await db
-    .select({
-      queue: opdQueueEntries,
-      appointment: appointments,
-      patient: patients,
-      doctor: doctors,
-    })
-    .from(opdQueueEntries)
-    .leftJoin(appointments, eq(opdQueueEntries.appointmentId, appointments.id))
-    .leftJoin(patients, eq(opdQueueEntries.patientId, patients.id))
-    .leftJoin(doctors, eq(opdQueueEntries.doctorId, doctors.id))
-    .where(
-      and(
-        eq(opdQueueEntries.doctorId, doctorId),
-        eq(opdQueueEntries.queueDate, queueDate),
-      ),
-    );
-
-  const parsed = rows.map((row) => {
-    const tokenId = (row.queue as any).tokenIdentifier;
-    const slotKey = tokenId
-      ? parseTokenIdentifier(tokenId)?.slotKey ?? null
-      : row.appointment
-        ? getSlotKeyFromAppointment(
-            (row.appointment as any).appointmentTime,
-            (row.appointment as any).timeSlot,
-          )
-        : null;
-    const slotMinutes = slotKey ? slotKeyToMinutes(slotKey) : 0;
-    const checkedInAt = (row.queue as any).checkedInAt;
-    const late = slotKey ? isLateArrival(slotKey, queueDate, checkedInAt) : false;
-    return { row, slotKey, slotMinutes, checkedInAt, late };
-  });
-
-  parsed.sort((a, b) => {
-    if (a.late !== b.late) return a.late ? 1 : -1;
-    if (a.slotMinutes !== b.slotMinutes) return a.slotMinutes - b.slotMinutes;
-    const tA = a.checkedInAt ? new Date(a.checkedInAt).getTime() : 0;
-    const tB = b.checkedInAt ? new Date(b.checkedInAt).getTime() : 0;
-    return tA - tB;
-  });
+  const rows = await getLiveQueueRows(doctorId, queueDate);
+  return withEstimatedWaits(doctorId, queueDate, rows);
+};
 
-  return parsed.map((p) => p.row);
+/**
+ * Queue status for one appointment (patient view): status, place in line and estimated wait.
+ * Returns null if the appointment has not been checked in.
+ */
+export const getQueueStatusForAppointment = async (appointmentId: number) => {
+  const [entry] = await db
+    .select({ id: opdQueueEntries.id, doctorId: opdQueueEntries.doctorId, queueDate: opdQueueEntries.queueDate })
+    .from(opdQueueEntries)
+    .where(eq(opdQueueEntries.appointmentId, appointmentId))
+    .limit(1);
+  if (!entry) return null;
+
+  const rows = await getQueueForDoctor(entry.doctorId, entry.queueDate);
+  const waiting = rows.filter((r) => r.estimatedWaitMinutes != null);
+  const index = waiting.findIndex((r) => r.queue.id === entry.id);
+  const row = rows.find((r) => r.queue.id === entry.id);
+
+  return {
+    queueEntryId: entry.id,
+    queueDate: entry.queueDate,
+    status: row?.queue.status ?? null,
+    tokenIdentifier: row?.queue.tokenIdentifier ?? null,
+    patientsAhead: index >= 0 ? index : null,
+    estimatedWaitMinutes: row?.estimatedWaitMinutes ?? null,
+  };
 };
 
 /**
@@ -188,6 +178,7 @@ export const callToken = async (queueEntryId: number) => {
     .where(eq(opdQueueEntries.id, queueEntryId))
     .returning();
 
+  if (updated) emitQueueChanged('called', updated, await refreshQueueEntry(updated));
   return updated;
 };
 
@@ -223,6 +214,7 @@ export const startConsultation = async (queueEntryId: number) => {
       .where(eq(appointments.id, queueEntry[0].appointmentId));
   }
 
+  if (updated) emitQueueChanged('consultation-started', updated, await refreshQueueEntry(updated));
   return updated;
 };
 
@@ -258,6 +250,10 @@ export const completeConsultation = async (queueEntryId: number) => {
       .where(eq(appointments.id, queueEntry[0].appointmentId));
   }
 
+  if (updated) {
+    await recordConsultation(updated);
+    emitQueueChanged('consultation-completed', updated, await refreshQueueEntry(updated));
+  }
   return updated;
 };
 
@@ -274,98 +270,211 @@ export const markNoShow = async (queueEntryId: number) => {
     .where(eq(opdQueueEntries.id, queueEntryId))
     .returning();
 
+  if (updated) emitQueueChanged('no-show', updated, await refreshQueueEntry(updated));
   return updated;
 };
 
+/**
+ * Serialize order changes for one doctor/date queue for the rest of the transaction
+ */
+const lockQueueOrder = async (tx: any, doctorId: number, queueDate: string) => {
+  await tx.execute(sql`SELECT pg_advisory_xact_lock(hashtext(${`opd_queue_order:${doctorId}:${queueDate}`}))`);
+};
+
+/**
+ * Write order keys GAP, 2*GAP, ... following entryIds
+ */
+const writeQueueOrder = (tx: any, entryIds: number[]) =>
+  tx.execute(sql`
+    UPDATE ${opdQueueEntries} AS q
+    SET position = o.ord * ${POSITION_GAP}, updated_at = NOW()
+    FROM unnest(ARRAY[${sql.join(entryIds.map((id) => sql`${id}`), sql`, `)}]::int[])
+      WITH ORDINALITY AS o(id, ord)
+    WHERE q.id = o.id
+    RETURNING q.id, q.position
+  `);
+
+/**
+ * Switch a doctor/date queue to manual order (ranked by position from now on).
+ * Returns true if it was not manually ordered before.
+ */
+const markQueueManuallyOrdered = async (tx: any, doctorId: number, queueDate: string) => {
+  const inserted = await tx
+    .insert(opdQueueManualOrder)
+    .values({ doctorId, queueDate, updatedAt: sql`NOW()` })
+    .onConflictDoUpdate({
+      target: [opdQueueManualOrder.doctorId, opdQueueManualOrder.queueDate],
+      set: { updatedAt: sql`NOW()` },
+    })
+    .returning({ isNew: sql<boolean>`(xmax = 0)` });
+  return Boolean(inserted[0]?.isNew);
+};
+
+/**
+ * Rewrite a queue's order keys as GAP, 2*GAP, ... keeping the current order
+ */
+const renumberQueuePositions = async (tx: any, doctorId: number, queueDate: string) => {
+  await tx.execute(sql`
+    UPDATE ${opdQueueEntries} AS q
+    SET position = r.rn * ${POSITION_GAP}, updated_at = NOW()
+    FROM (
+      SELECT id, ROW_NUMBER() OVER (ORDER BY position, id) AS rn
+      FROM ${opdQueueEntries}
+      WHERE doctor_id = ${doctorId} AND queue_date = ${queueDate}
+    ) AS r
+    WHERE q.id = r.id
+  `);
+};
+
 /**
  * Reorder queue entry
+ * newPosition is the 1-based rank in the queue as getQueueForDoctor returns it; after the first
+ * move the queue is ranked by the manual order (position, then id).
  */
 export const reorderQueue = async (
   queueEntryId: number,
   newPosition: number,
 ) => {
-  const queueEntry = await db
-    .select()
-    .from(opdQueueEntries)
-    .where(eq(opdQueueEntries.id, queueEntryId))
-    .limit(1);
-
-  if (queueEntry.length === 0) {
-    throw new Error('Queue entry not found');
-  }
-
-  const entry = queueEntry[0];
-
-  // Get all entries for this doctor/date (all statuses for reordering)
-  const allEntries = await db
-    .select()
-    .from(opdQueueEntries)
-    .where(
-      and(
-        eq(opdQueueEntries.doctorId, entry.doctorId),
-        eq(opdQueueEntries.queueDate, entry.queueDate),
-      ),
-    )
-    .orderBy(opdQueueEntries.position);
-
-  // Validate new position
-  if (newPosition < 1 || newPosition > allEntries.length) {
-    throw new Error('Invalid position');
-  }
-
-  // Reorder positions
-  const oldPosition = entry.position;
-  if (newPosition === oldPosition) {
-    return entry;
-  }
-
-  // Simple reorder: shift entries between old and new position
-  if (newPosition < oldPosition) {
-    // Moving up: shift entries down (increase position)
-    await db
+  let renumbered = false;
+
+  const result = await db.transaction(async (tx) => {
+    const [entry] = await tx
+      .select()
+      .from(opdQueueEntries)
+      .where(eq(opdQueueEntries.id, queueEntryId))
+      .limit(1);
+
+    if (!entry) {
+      throw new Error('Queue entry not found');
+    }
+
+    await lockQueueOrder(tx, entry.doctorId, entry.queueDate);
+
+    // First manual move: seed the order keys from the order staff are looking at (the computed
+    // rank), so the move is relative to that rather than to check-in order.
+    if (await markQueueManuallyOrdered(tx, entry.doctorId, entry.queueDate)) {
+      const shown = (await getLiveQueueRows(entry.doctorId, entry.queueDate)).map((row) => row.queue.id);
+      const all = await tx
+        .select({ id: opdQueueEntries.id })
+        .from(opdQueueEntries)
+        .where(and(eq(opdQueueEntries.doctorId, entry.doctorId), eq(opdQueueEntries.queueDate, entry.queueDate)))
+        .orderBy(opdQueueEntries.position, opdQueueEntries.id);
+      const existingIds = new Set(all.map((row: { id: number }) => row.id));
+      const shownIds = shown.filter((id) => existingIds.has(id));
+      const shownSet = new Set(shownIds);
+      await writeQueueOrder(tx, [...shownIds, ...all.map((row: { id: number }) => row.id).filter((id: number) => !shownSet.has(id))]);
+      renumbered = true;
+    }
+
+    const loadOthers = () =>
+      tx
+        .select({ id: opdQueueEntries.id, position: opdQueueEntries.position })
+        .from(opdQueueEntries)
+        .where(
+          and(
+            eq(opdQueueEntries.doctorId, entry.doctorId),
+            eq(opdQueueEntries.queueDate, entry.queueDate),
+            ne(opdQueueEntries.id, queueEntryId),
+          ),
+        )
+        .orderBy(opdQueueEntries.position, opdQueueEntries.id);
+
+    let others = await loadOthers();
+
+    // Validate new position
+    if (newPosition < 1 || newPosition > others.length + 1) {
+      throw new Error('Invalid position');
+    }
+
+    // Re-read under the lock; the row may have moved since the first read
+    const [current] = await tx
+      .select()
+      .from(opdQueueEntries)
+      .where(eq(opdQueueEntries.id, queueEntryId))
+      .for('update');
+
+    const index = newPosition - 1;
+    const keyBetween = () => {
+      const prev = others[index - 1]?.position;
+      const next = others[index]?.position;
+      if (prev === undefined && next === undefined) return POSITION_GAP;
+      if (prev === undefined) return next! - POSITION_GAP;
+      if (next === undefined) return prev + POSITION_GAP;
+      return next - prev >= 2 ? Math.floor((prev + next) / 2) : null;
+    };
+
+    let key = keyBetween();
+    if (key === null) {
+      await renumberQueuePositions(tx, entry.doctorId, entry.queueDate);
+      renumbered = true;
+      others = await loadOthers();
+      key = keyBetween()!;
+    }
+
+    if (current.position === key) {
+      return current;
+    }
+
+    const [updated] = await tx
       .update(opdQueueEntries)
       .set({
-        position: sql`${opdQueueEntries.position} + 1`,
+        position: key,
         updatedAt: sql`NOW()`,
       })
-      .where(
-        and(
-          eq(opdQueueEntries.doctorId, entry.doctorId),
-          eq(opdQueueEntries.queueDate, entry.queueDate),
-          sql`${opdQueueEntries.position} >= ${newPosition}`,
-          sql`${opdQueueEntries.position} < ${oldPosition}`,
-          ne(opdQueueEntries.id, queueEntryId),
-        ),
-      );
+      .where(eq(opdQueueEntries.id, queueEntryId))
+      .returning();
+
+    return updated;
+  });
+
+  if (renumbered) {
+    await reloadLiveQueue(result.doctorId, result.queueDate);
+    emitQueueChanged('reordered', result, null);
   } else {
-    // Moving down: shift entries up (decrease position)
-    await db
-      .update(opdQueueEntries)
-      .set({
-        position: sql`${opdQueueEntries.position} - 1`,
-        updatedAt: sql`NOW()`,
-      })
-      .where(
-        and(
-          eq(opdQueueEntries.doctorId, entry.doctorId),
-          eq(opdQueueEntries.queueDate, entry.queueDate),
-          sql`${opdQueueEntries.position} > ${oldPosition}`,
-          sql`${opdQueueEntries.position} <= ${newPosition}`,
-          ne(opdQueueEntries.id, queueEntryId),
-        ),
-      );
+    emitQueueChanged('reordered', result, await refreshQueueEntry(result));
   }
+  return result;
+};
 
-  // Update this entry's position
-  const [updated] = await db
-    .update(opdQueueEntries)
-    .set({
-      position: newPosition,
-      updatedAt: sql`NOW()`,
-    })
-    .where(eq(opdQueueEntries.id, queueEntryId))
-    .returning();
+/**
+ * Apply a full manual order to a doctor/date queue in one statement (drag-and-drop reshuffle)
+ * entryIds must list every entry of that queue exactly once.
+ */
+export const applyQueueOrder = async (
+  doctorId: number,
+  queueDate: string, // YYYY-MM-DD
+  entryIds: number[],
+) => {
+  let hospitalId: number | null = null;
+  const updated = await db.transaction(async (tx) => {
+    await lockQueueOrder(tx, doctorId, queueDate);
+
+    const existing = await tx
+      .select({ id: opdQueueEntries.id, hospitalId: opdQueueEntries.hospitalId })
+      .from(opdQueueEntries)
+      .where(and(eq(opdQueueEntries.doctorId, doctorId), eq(opdQueueEntries.queueDate, queueDate)))
+      .for('update');
+
+    const existingIds = new Set(existing.map((e) => e.id));
+    const requested = new Set(entryIds);
+    if (
+      requested.size !== entryIds.length ||
+      requested.size !== existingIds.size ||
+      entryIds.some((id) => !existingIds.has(id))
+    ) {
+      throw new Error('entryIds must list every entry in this queue exactly once');
+    }
+    if (entryIds.length === 0) return [];
+    hospitalId = existing[0].hospitalId;
+
+    await markQueueManuallyOrdered(tx, doctorId, queueDate);
+    return writeQueueOrder(tx, entryIds);
+  });
 
+  await reloadLiveQueue(doctorId, queueDate);
+  if (hospitalId != null) {
+    emitQueueChanged('reordered', { id: null, hospitalId, doctorId, queueDate }, null);
+  }
   return updated;
 };
 
@@ -404,12 +513,13 @@ export const skipToken = async (queueEntryId: number) => {
     .update(opdQueueEntries)
     .set({
       status: 'waiting',
-      position: maxPosition + 1,
+      position: maxPosition + POSITION_GAP,
       updatedAt: sql`NOW()`,
     })
     .where(eq(opdQueueEntries.id, queueEntryId))
     .returning();
 
+  if (updated) emitQueueChanged('skipped', updated, await refreshQueueEntry(updated));
   return updated;
 };
 
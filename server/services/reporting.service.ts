@@ -5,12 +5,66 @@ import {
   labOrders,
   labReports,
   invoices,
-  payments,
   ipdEncounters,
   opdQueueEntries,
   bedAllocations,
 } from '../../shared/schema.js';
-import { eq, and, gte, lte, sql, desc, count } from 'drizzle-orm';
+import { eq, and, gte, lt, lte, sql, desc, count, type SQLWrapper } from 'drizzle-orm';
+import { getDailyRevenue, getRevenueBreakdown, toDayKey } from './revenue-rollup.service.js';
+
+type ReportFilters = {
+  hospitalId: number;
+  dateFrom?: Date;
+  dateTo?: Date;
+  doctorId?: number;
+};
+
+// Report filters are shared by the JSON reports and the streaming exports
+
+const opdReportConditions = ({ hospitalId, dateFrom, dateTo, doctorId }: ReportFilters) => {
+  const conditions = [eq(appointments.hospitalId, hospitalId)];
+  if (dateFrom) {
+    conditions.push(gte(sql`DATE(${appointments.appointmentDate})`, dateFrom));
+  }
+  if (dateTo) {
+    conditions.push(lte(sql`DATE(${appointments.appointmentDate})`, dateTo));
+  }
+  if (doctorId) {
+    conditions.push(eq(appointments.doctorId, doctorId));
+  }
+  return and(...conditions);
+};
+
+const labReportConditions = ({ hospitalId, dateFrom, dateTo }: ReportFilters) => {
+  const conditions = [eq(labOrders.hospitalId, hospitalId)];
+  if (dateFrom) {
+    conditions.push(gte(sql`DATE(${labOrders.createdAt})`, dateFrom));
+  }
+  if (dateTo) {
+    conditions.push(lte(sql`DATE(${labOrders.createdAt})`, dateTo));
+  }
+  return and(...conditions);
+};
+
+const financeReportConditions = ({ hospitalId, dateFrom, dateTo }: ReportFilters) => {
+  const conditions = [eq(invoices.hospitalId, hospitalId)];
+  // Day-bounded ranges (same days as DATE(created_at) >= / <= the filter) so the index applies
+  if (dateFrom) {
+    conditions.push(gte(invoices.createdAt, new Date(dateFrom.getFullYear(), dateFrom.getMonth(), dateFrom.getDate())));
+  }
+  if (dateTo) {
+    conditions.push(lt(invoices.createdAt, new Date(dateTo.getFullYear(), dateTo.getMonth(), dateTo.getDate() + 1)));
+  }
+  return and(...conditions);
+};
+
+// dateStr is YYYY-MM-DD; same day semantics as comparing toISOString() dates
+const ipdCensusConditions = (hospitalId: number, dateStr: string) =>
+  and(
+    eq(ipdEncounters.hospitalId, hospitalId),
+    sql`(${ipdEncounters.admittedAt} IS NULL OR ${ipdEncounters.admittedAt} < ${dateStr}::date + 1)`,
+    sql`(${ipdEncounters.dischargedAt} IS NULL OR ${ipdEncounters.dischargedAt} >= ${dateStr}::date)`,
+  );
 
 /**
  * Get OPD operations report
@@ -21,9 +75,7 @@ export const getOpdReport = async (filters: {
   dateTo?: Date;
   doctorId?: number;
 }) => {
-  const { hospitalId, dateFrom, dateTo, doctorId } = filters;
-
-  let query = db
+  const allAppointments = await db
     .select({
       id: appointments.id,
       patientId: appointments.patientId,
@@ -36,23 +88,8 @@ export const getOpdReport = async (filters: {
       completedAt: appointments.completedAt,
     })
     .from(appointments)
-    .where(eq(appointments.hospitalId, hospitalId));
-
-  const conditions = [eq(appointments.hospitalId, hospitalId)];
-
-  if (dateFrom) {
-    conditions.push(gte(sql`DATE(${appointments.appointmentDate})`, dateFrom));
-  }
-  if (dateTo) {
-    conditions.push(lte(sql`DATE(${appointments.appointmentDate})`, dateTo));
-  }
-  if (doctorId) {
-    conditions.push(eq(appointments.doctorId, doctorId));
-  }
-
-  query = (query as any).where(and(...conditions));
-
-  const allAppointments = await query.orderBy(desc(appointments.appointmentDate));
+    .where(opdReportConditions(filters))
+    .orderBy(desc(appointments.appointmentDate));
 
   // Calculate statistics
   // No-show calculation (confirmed but never checked in and appointment time passed)
@@ -101,25 +138,11 @@ export const getLabReport = async (filters: {
   dateFrom?: Date;
   dateTo?: Date;
 }) => {
-  const { hospitalId, dateFrom, dateTo } = filters;
-
-  let query = db
+  const allOrders = await db
     .select()
     .from(labOrders)
-    .where(eq(labOrders.hospitalId, hospitalId));
-
-  const conditions = [eq(labOrders.hospitalId, hospitalId)];
-
-  if (dateFrom) {
-    conditions.push(gte(sql`DATE(${labOrders.createdAt})`, dateFrom));
-  }
-  if (dateTo) {
-    conditions.push(lte(sql`DATE(${labOrders.createdAt})`, dateTo));
-  }
-
-  query = (query as any).where(and(...conditions));
-
-  const allOrders = await query.orderBy(desc(labOrders.createdAt));
+    .where(labReportConditions(filters))
+    .orderBy(desc(labOrders.createdAt));
 
   // Calculate statistics
   const stats = {
@@ -194,41 +217,26 @@ export const getFinanceReport = async (filters: {
 }) => {
   const { hospitalId, dateFrom, dateTo } = filters;
 
-  let query = db
+  const allInvoices = await db
     .select()
     .from(invoices)
-    .where(eq(invoices.hospitalId, hospitalId));
+    .where(financeReportConditions(filters))
+    .orderBy(desc(invoices.createdAt));
 
-  const conditions = [eq(invoices.hospitalId, hospitalId)];
-
-  if (dateFrom) {
-    conditions.push(gte(sql`DATE(${invoices.createdAt})`, dateFrom));
-  }
-  if (dateTo) {
-    conditions.push(lte(sql`DATE(${invoices.createdAt})`, dateTo));
-  }
-
-  query = (query as any).where(and(...conditions));
-
-  const allInvoices = await query.orderBy(desc(invoices.createdAt));
-
-  // Get payments for these invoices
-  const invoiceIds = allInvoices.map((inv: any) => inv.id);
-  const allPayments = invoiceIds.length > 0
-    ? await db
-        .select()
-        .from(payments)
-        .where(sql`${payments.invoiceId} IN (${sql.join(invoiceIds.map(id => sql`${id}`), sql`, `)})`)
-    : [];
+  // Collections come from the daily revenue rollup (payments received in the range)
+  const dayFrom = dateFrom ? toDayKey(dateFrom) : undefined;
+  const dayTo = dateTo ? toDayKey(dateTo) : undefined;
+  const [collectionDays, breakdown] = await Promise.all([
+    getDailyRevenue(hospitalId, dayFrom, dayTo),
+    getRevenueBreakdown(hospitalId, dayFrom, dayTo),
+  ]);
 
   // Calculate statistics
   const totalBilled = allInvoices.reduce((sum, inv: any) => {
     return sum + parseFloat(inv.total || '0');
   }, 0);
 
-  const totalPaid = allPayments.reduce((sum, pay: any) => {
-    return sum + parseFloat(pay.amount || '0');
-  }, 0);
+  const totalPaid = collectionDays.reduce((sum, day) => sum + day.collected, 0);
 
   const totalDiscount = allInvoices.reduce((sum, inv: any) => {
     return sum + parseFloat(inv.discountAmount || '0');
@@ -240,11 +248,8 @@ export const getFinanceReport = async (filters: {
 
   // Daily collections
   const dailyCollections: Record<string, number> = {};
-  allPayments.forEach((pay: any) => {
-    const date = pay.receivedAt instanceof Date 
-      ? pay.receivedAt.toISOString().slice(0, 10)
-      : new Date(pay.receivedAt).toISOString().slice(0, 10);
-    dailyCollections[date] = (dailyCollections[date] || 0) + parseFloat(pay.amount || '0');
+  collectionDays.forEach((day) => {
+    dailyCollections[day.day] = day.collected;
   });
 
   // Discounts by user
@@ -258,10 +263,10 @@ export const getFinanceReport = async (filters: {
 
   return {
     invoices: allInvoices,
-    payments: allPayments,
     statistics: {
       totalBilled,
       totalPaid,
+      totalRefunded: breakdown.refunded,
       totalDiscount,
       outstandingBalance,
       invoiceCount: allInvoices.length,
@@ -270,6 +275,8 @@ export const getFinanceReport = async (filters: {
       unpaidCount: allInvoices.filter((inv: any) => inv.status === 'issued' || inv.status === 'draft').length,
     },
     dailyCollections,
+    collectionsBySource: breakdown.bySource,
+    collectionsByMethod: breakdown.byMethod,
     discountsByUser,
   };
 };
@@ -286,27 +293,13 @@ export const getIpdCensusReport = async (filters: {
   const targetDate = date || new Date();
   const dateStr = targetDate.toISOString().slice(0, 10);
 
-  // Get all IPD encounters
-  const allEncounters = await db
+  // Encounters active on the target date (admitted on/before it, not discharged before it)
+  const activeOnDate = await db
     .select()
     .from(ipdEncounters)
-    .where(eq(ipdEncounters.hospitalId, hospitalId))
+    .where(ipdCensusConditions(hospitalId, dateStr))
     .orderBy(desc(ipdEncounters.admittedAt));
 
-  // Filter encounters active on target date
-  const activeOnDate = allEncounters.filter((enc: any) => {
-    const admittedAt = enc.admittedAt instanceof Date ? enc.admittedAt : new Date(enc.admittedAt);
-    const dischargedAt = enc.dischargedAt 
-      ? (enc.dischargedAt instanceof Date ? enc.dischargedAt : new Date(enc.dischargedAt))
-      : null;
-    
-    const admittedDate = admittedAt.toISOString().slice(0, 10);
-    const dischargedDate = dischargedAt ? dischargedAt.toISOString().slice(0, 10) : null;
-    
-    // Active if admitted on or before target date and (not discharged or discharged after target date)
-    return admittedDate <= dateStr && (!dischargedDate || dischargedDate >= dateStr);
-  });
-
   // Get bed allocations for active encounters
   const encounterIds = activeOnDate.map((e: any) => e.id);
   const allocationsList = encounterIds.length > 0
@@ -324,13 +317,13 @@ export const getIpdCensusReport = async (filters: {
     bedOccupancy[alloc.bedId] = (bedOccupancy[alloc.bedId] || 0) + 1;
   });
 
-  // Admissions/discharges on target date
-  const admissionsOnDate = allEncounters.filter((enc: any) => {
+  // Admissions/discharges on target date (both are active on that date)
+  const admissionsOnDate = activeOnDate.filter((enc: any) => {
     const admittedAt = enc.admittedAt instanceof Date ? enc.admittedAt : new Date(enc.admittedAt);
     return admittedAt.toISOString().slice(0, 10) === dateStr;
   });
 
-  const dischargesOnDate = allEncounters.filter((enc: any) => {
+  const dischargesOnDate = activeOnDate.filter((enc: any) => {
     if (!enc.dischargedAt) return false;
     const dischargedAt = enc.dischargedAt instanceof Date ? enc.dischargedAt : new Date(enc.dischargedAt);
     return dischargedAt.toISOString().slice(0, 10) === dateStr;
@@ -349,27 +342,99 @@ export const getIpdCensusReport = async (filters: {
   };
 };
 
+// Rows held in memory per cursor fetch during an export
+const EXPORT_BATCH_SIZE = 500;
+
+// Export columns per report; the keys are the header row. Money is cast so XLSX gets numbers.
+const REPORT_EXPORT_COLUMNS = {
+  opd: {
+    id: appointments.id,
+    patientId: appointments.patientId,
+    doctorId: appointments.doctorId,
+    appointmentDate: appointments.appointmentDate,
+    status: appointments.status,
+    type: appointments.type,
+    createdAt: appointments.createdAt,
+  },
+  lab: {
+    id: labOrders.id,
+    orderNumber: labOrders.orderNumber,
+    patientId: labOrders.patientId,
+    doctorId: labOrders.doctorId,
+    status: labOrders.status,
+    createdAt: labOrders.createdAt,
+    releasedAt: sql`NULL`, // lab_orders has no release timestamp; kept so the column layout is unchanged
+  },
+  finance: {
+    id: invoices.id,
+    invoiceNumber: invoices.invoiceNumber,
+    patientId: invoices.patientId,
+    status: invoices.status,
+    total: sql`${invoices.total}::float8`,
+    paidAmount: sql`${invoices.paidAmount}::float8`,
+    balanceAmount: sql`${invoices.balanceAmount}::float8`,
+    createdAt: invoices.createdAt,
+  },
+  ipd: {
+    id: ipdEncounters.id,
+    patientId: ipdEncounters.patientId,
+    attendingDoctorId: ipdEncounters.attendingDoctorId,
+    admissionType: ipdEncounters.admissionType,
+    status: ipdEncounters.status,
+    admittedAt: ipdEncounters.admittedAt,
+    dischargedAt: ipdEncounters.dischargedAt,
+  },
+} satisfies Record<string, Record<string, SQLWrapper>>;
+
+export type ReportExportType = keyof typeof REPORT_EXPORT_COLUMNS;
+
+export const isReportExportType = (type: string): type is ReportExportType =>
+  Object.prototype.hasOwnProperty.call(REPORT_EXPORT_COLUMNS, type);
+
+export const getReportExportHeaders = (type: ReportExportType): string[] =>
+  Object.keys(REPORT_EXPORT_COLUMNS[type]);
+
+const buildReportExportQuery = (type: ReportExportType, filters: ReportFilters & { date?: Date }) => {
+  // Alias every column to its header so raw driver rows are keyed like the header row
+  const fields = Object.fromEntries(
+    Object.entries(REPORT_EXPORT_COLUMNS[type] as Record<string, SQLWrapper>).map(([header, column]) => [
+      header,
+      sql`${column}`.as(header),
+    ]),
+  );
+
+  switch (type) {
+    case 'opd':
+      return db.select(fields).from(appointments).where(opdReportConditions(filters)).orderBy(desc(appointments.appointmentDate));
+    case 'lab':
+      return db.select(fields).from(labOrders).where(labReportConditions(filters)).orderBy(desc(labOrders.createdAt));
+    case 'finance':
+      return db.select(fields).from(invoices).where(financeReportConditions(filters)).orderBy(desc(invoices.createdAt));
+    case 'ipd': {
+      const dateStr = (filters.date || new Date()).toISOString().slice(0, 10);
+      return db
+        .select(fields)
+        .from(ipdEncounters)
+        .where(ipdCensusConditions(filters.hospitalId, dateStr))
+        .orderBy(desc(ipdEncounters.admittedAt));
+    }
+  }
+};
+
 /**
- * Export report to CSV format
+ * Stream a report's export rows (in getReportExportHeaders order) in batches, read through a
+ * server-side cursor so only EXPORT_BATCH_SIZE rows are in memory at a time.
+ * Stop early with .return() to close the cursor.
  */
-export const exportReportToCsv = (data: any[], headers: string[]): string => {
-  const csvRows: string[] = [];
-  
-  // Add headers
-  csvRows.push(headers.join(','));
-  
-  // Add data rows
-  data.forEach((row: any) => {
-    const values = headers.map(header => {
-      const value = row[header] || '';
-      // Escape commas and quotes in CSV
-      if (typeof value === 'string' && (value.includes(',') || value.includes('"'))) {
-        return `"${value.replace(/"/g, '""')}"`;
-      }
-      return value;
-    });
-    csvRows.push(values.join(','));
-  });
-  
-  return csvRows.join('\n');
-};
+export async function* streamReportExport(
+  type: ReportExportType,
+  filters: ReportFilters & { date?: Date },
+): AsyncGenerator<unknown[][]> {
+  const headers = getReportExportHeaders(type);
+  const query = buildReportExportQuery(type, filters).toSQL();
+  // drizzle has no cursor API; run the compiled query on the underlying postgres-js client
+  const cursor = (db as any).$client.unsafe(query.sql, query.params).cursor(EXPORT_BATCH_SIZE);
+  for await (const rows of cursor as AsyncIterable<Record<string, unknown>[]>) {
+    yield rows.map((row) => headers.map((header) => row[header]));
+  }
+}
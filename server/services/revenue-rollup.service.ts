@@ -0,0 +1,183 @@
+/**
+ * hospital_daily_revenue: collections and refunds per (hospital, day, source, method).
+ *
+ * - billing.service applies each payment/refund inside the transaction that inserts it, so the
+ *   rollup never counts a row that was rolled back.
+ * - rebuildHospitalDailyRevenue recomputes it from payments/refunds (backfill, or repair after a
+ *   failed incremental update). It holds an EXCLUSIVE lock on the rollup for its duration, so
+ *   incremental updates either commit before its snapshot or apply on top of its result.
+ * - Dashboards read day rows from here instead of rescanning payments.
+ *
+ * Source is classified per invoice the same way revenue.service#getRevenueTransactions does.
+ */
+import { db } from '../db.js';
+import { hospitalDailyRevenue } from '../../shared/schema.js';
+import { and, eq, gte, lte, sql, type SQL } from 'drizzle-orm';
+
+// Expects the invoice aliased as "i"
+const SOURCE_SQL = sql.raw(`CASE
+    WHEN i.appointment_id IS NOT NULL THEN 'appointment'
+    WHEN EXISTS (SELECT 1 FROM invoice_items ii WHERE ii.invoice_id = i.id AND ii.type LIKE '%lab%') THEN 'test'
+    WHEN EXISTS (SELECT 1 FROM invoice_items ii WHERE ii.invoice_id = i.id
+      AND (ii.type LIKE '%pharmacy%' OR ii.type LIKE '%medicine%' OR ii.type LIKE '%medication%')) THEN 'pharmacy'
+    WHEN EXISTS (SELECT 1 FROM invoice_items ii WHERE ii.invoice_id = i.id AND ii.type LIKE '%consultation%') THEN 'appointment'
+    ELSE 'opd'
+  END`);
+
+const PAYMENT_DAY_SQL = sql.raw(`to_char(COALESCE(p.received_at, p.created_at, NOW()), 'YYYY-MM-DD')`);
+const REFUND_DAY_SQL = sql.raw(`to_char(COALESCE(r.processed_at, r.created_at, NOW()), 'YYYY-MM-DD')`);
+
+const ROLLUP_COLUMNS = sql.raw(
+  `hospital_daily_revenue (hospital_id, day, source, method, collected_amount, payment_count, refunded_amount, refund_count, updated_at)`,
+);
+
+const ADD_ON_CONFLICT = sql.raw(`ON CONFLICT (hospital_id, day, source, method) DO UPDATE SET
+    collected_amount = hospital_daily_revenue.collected_amount + EXCLUDED.collected_amount,
+    payment_count = hospital_daily_revenue.payment_count + EXCLUDED.payment_count,
+    refunded_amount = hospital_daily_revenue.refunded_amount + EXCLUDED.refunded_amount,
+    refund_count = hospital_daily_revenue.refund_count + EXCLUDED.refund_count,
+    updated_at = NOW()`);
+
+/**
+ * Local calendar day of a Date as YYYY-MM-DD (the rollup's day key)
+ */
+export const toDayKey = (date: Date): string =>
+  `${date.getFullYear()}-${String(date.getMonth() + 1).padStart(2, '0')}-${String(date.getDate()).padStart(2, '0')}`;
+
+/**
+ * Run one incremental update in a savepoint: a rollup failure is logged and must not roll back
+ * the payment/refund itself (the rebuild command repairs the rollup).
+ */
+const applyInSavepoint = async (tx: any, label: string, statement: SQL) => {
+  try {
+    await tx.transaction(async (sp: any) => {
+      await sp.execute(statement);
+    });
+  } catch (e) {
+    console.error(`❌ Failed to update daily revenue rollup for ${label}:`, e);
+  }
+};
+
+/**
+ * Add a just-inserted payment to the rollup. Call inside the transaction that inserted it.
+ */
+export const applyPaymentToRollup = async (tx: any, paymentId: number) => {
+  await applyInSavepoint(tx, `payment ${paymentId}`, sql`
+    INSERT INTO ${ROLLUP_COLUMNS}
+    SELECT i.hospital_id, ${PAYMENT_DAY_SQL}, ${SOURCE_SQL}, p.method, p.amount, 1, 0, 0, NOW()
+    FROM payments p
+    JOIN invoices i ON i.id = p.invoice_id
+    WHERE p.id = ${paymentId}
+    ${ADD_ON_CONFLICT}
+  `);
+};
+
+/**
+ * Add a just-inserted refund to the rollup. Call inside the transaction that inserted it.
+ */
+export const applyRefundToRollup = async (tx: any, refundId: number) => {
+  await applyInSavepoint(tx, `refund ${refundId}`, sql`
+    INSERT INTO ${ROLLUP_COLUMNS}
+    SELECT i.hospital_id, ${REFUND_DAY_SQL}, ${SOURCE_SQL}, 'unknown', 0, 0, r.amount, 1, NOW()
+    FROM refunds r
+    JOIN invoices i ON i.id = r.invoice_id
+    WHERE r.id = ${refundId}
+    ${ADD_ON_CONFLICT}
+  `);
+};
+
+/**
+ * Recompute the rollup from payments and refunds, for one hospital or all of them.
+ */
+export const rebuildHospitalDailyRevenue = async (hospitalId?: number) => {
+  const hospitalFilter = hospitalId ? sql`WHERE i.hospital_id = ${hospitalId}` : sql``;
+
+  return db.transaction(async (tx) => {
+    await tx.execute(sql`LOCK TABLE hospital_daily_revenue IN EXCLUSIVE MODE`);
+    await tx.execute(
+      hospitalId
+        ? sql`DELETE FROM hospital_daily_revenue WHERE hospital_id = ${hospitalId}`
+        : sql`DELETE FROM hospital_daily_revenue`,
+    );
+    const inserted = await tx.execute(sql`
+      INSERT INTO ${ROLLUP_COLUMNS}
+      SELECT hospital_id, day, source, method,
+        SUM(collected_amount), SUM(payment_count), SUM(refunded_amount), SUM(refund_count), NOW()
+      FROM (
+        SELECT i.hospital_id, ${PAYMENT_DAY_SQL} AS day, ${SOURCE_SQL} AS source, p.method AS method,
+          p.amount AS collected_amount, 1 AS payment_count, 0 AS refunded_amount, 0 AS refund_count
+        FROM payments p
+        JOIN invoices i ON i.id = p.invoice_id
+        ${hospitalFilter}
+        UNION ALL
+        SELECT i.hospital_id, ${REFUND_DAY_SQL}, ${SOURCE_SQL}, 'unknown',
+          0, 0, r.amount, 1
+        FROM refunds r
+        JOIN invoices i ON i.id = r.invoice_id
+        ${hospitalFilter}
+      ) AS t
+      GROUP BY hospital_id, day, source, method
+      RETURNING hospital_id
+    `);
+    return { rowCount: (inserted as any).length ?? 0 };
+  });
+};
+
+const dayRange = (hospitalId: number, dayFrom?: string, dayTo?: string) => {
+  const conditions = [eq(hospitalDailyRevenue.hospitalId, hospitalId)];
+  if (dayFrom) conditions.push(gte(hospitalDailyRevenue.day, dayFrom));
+  if (dayTo) conditions.push(lte(hospitalDailyRevenue.day, dayTo));
+  return and(...conditions);
+};
+
+/**
+ * Collections per day for a hospital (inclusive YYYY-MM-DD bounds), oldest first.
+ * Days without payments or refunds are absent.
+ */
+export const getDailyRevenue = async (hospitalId: number, dayFrom?: string, dayTo?: string) => {
+  const rows = await db
+    .select({
+      day: hospitalDailyRevenue.day,
+      collected: sql<string>`SUM(${hospitalDailyRevenue.collectedAmount})`,
+      refunded: sql<string>`SUM(${hospitalDailyRevenue.refundedAmount})`,
+      payments: sql<number>`SUM(${hospitalDailyRevenue.paymentCount})::int`,
+    })
+    .from(hospitalDailyRevenue)
+    .where(dayRange(hospitalId, dayFrom, dayTo))
+    .groupBy(hospitalDailyRevenue.day)
+    .orderBy(hospitalDailyRevenue.day);
+
+  return rows.map((row) => ({
+    day: row.day,
+    collected: parseFloat(row.collected || '0'),
+    refunded: parseFloat(row.refunded || '0'),
+    payments: Number(row.payments) || 0,
+  }));
+};
+
+/**
+ * Collections and refunds per source and per method for a hospital over a day range.
+ */
+export const getRevenueBreakdown = async (hospitalId: number, dayFrom?: string, dayTo?: string) => {
+  const rows = await db
+    .select({
+      source: hospitalDailyRevenue.source,
+      method: hospitalDailyRevenue.method,
+      collected: sql<string>`SUM(${hospitalDailyRevenue.collectedAmount})`,
+      refunded: sql<string>`SUM(${hospitalDailyRevenue.refundedAmount})`,
+    })
+    .from(hospitalDailyRevenue)
+    .where(dayRange(hospitalId, dayFrom, dayTo))
+    .groupBy(hospitalDailyRevenue.source, hospitalDailyRevenue.method);
+
+  const bySource: Record<string, number> = {};
+  const byMethod: Record<string, number> = {};
+  let refunded = 0;
+  for (const row of rows) {
+    const collected = parseFloat(row.collected || '0');
+    bySource[row.source] = (bySource[row.source] || 0) + collected;
+    if (collected > 0) byMethod[row.method] = (byMethod[row.method] || 0) + collected;
+    refunded += parseFloat(row.refunded || '0');
+  }
+  return { bySource, byMethod, refunded };
+};
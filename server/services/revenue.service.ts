@@ -9,14 +9,6 @@ function getISTStartOfDay(date: Date): Date {
   return istDate;
 }
 
-function isSameDayIST(date1: Date, date2: Date): boolean {
-  const d1 = new Date(date1);
-  const d2 = new Date(date2);
-  return d1.getFullYear() === d2.getFullYear() &&
-         d1.getMonth() === d2.getMonth() &&
-         d1.getDate() === d2.getDate();
-}
-
 /**
  * Get revenue statistics for a hospital
  */
@@ -25,47 +17,32 @@ export const getRevenueStats = async (hospitalId: number) => {
   const weekStart = new Date(today);
   weekStart.setDate(weekStart.getDate() - weekStart.getDay()); // Start of week (Sunday)
   const monthStart = new Date(today.getFullYear(), today.getMonth(), 1);
-
-  // Get all payments for this hospital
-  // Payments are linked to invoices, which are linked to appointments or encounters
-  const allPayments = await db
+  // "Today" = the same local calendar day
+  const dayStart = new Date(today.getFullYear(), today.getMonth(), today.getDate());
+  const dayEnd = new Date(dayStart);
+  dayEnd.setDate(dayEnd.getDate() + 1);
+
+  // One row of sums, bucketed in SQL (payments are linked to the hospital via their invoice).
+  // Served by idx_payments_invoice_received_at (see drizzle/0026_revenue_stats_indexes.sql).
+  const paidAt = sql`COALESCE(${payments.receivedAt}, ${payments.createdAt})`;
+  // Raw sql params skip the column's Date mapping, so bind ISO strings the way drizzle
+  // serializes timestamp columns (a bare Date reaches postgres-js unserialized).
+  const since = (date: Date) => sql`${date.toISOString()}::timestamp`;
+  const [row] = await db
     .select({
-      payment: payments,
-      invoice: invoices,
+      daily: sql<string>`COALESCE(SUM(${payments.amount}) FILTER (WHERE ${paidAt} >= ${since(dayStart)} AND ${paidAt} < ${since(dayEnd)}), 0)`,
+      weekly: sql<string>`COALESCE(SUM(${payments.amount}) FILTER (WHERE ${paidAt} >= ${since(weekStart)}), 0)`,
+      monthly: sql<string>`COALESCE(SUM(${payments.amount}) FILTER (WHERE ${paidAt} >= ${since(monthStart)}), 0)`,
+      total: sql<string>`COALESCE(SUM(${payments.amount}), 0)`,
     })
     .from(payments)
-    .leftJoin(invoices, eq(payments.invoiceId, invoices.id))
+    .innerJoin(invoices, eq(payments.invoiceId, invoices.id))
     .where(eq(invoices.hospitalId, hospitalId));
 
-  // Calculate daily revenue (today)
-  const dailyPayments = allPayments.filter((p) => {
-    if (!p.payment.receivedAt && !p.payment.createdAt) return false;
-    const paymentDate = p.payment.receivedAt || p.payment.createdAt;
-    if (!paymentDate) return false;
-    return isSameDayIST(new Date(paymentDate), today);
-  });
-  const dailyRevenue = dailyPayments.reduce((sum, p) => sum + parseFloat(p.payment.amount.toString()), 0);
-
-  // Calculate weekly revenue
-  const weeklyPayments = allPayments.filter((p) => {
-    if (!p.payment.receivedAt && !p.payment.createdAt) return false;
-    const paymentDate = p.payment.receivedAt || p.payment.createdAt;
-    if (!paymentDate) return false;
-    return new Date(paymentDate) >= weekStart;
-  });
-  const weeklyRevenue = weeklyPayments.reduce((sum, p) => sum + parseFloat(p.payment.amount.toString()), 0);
-
-  // Calculate monthly revenue
-  const monthlyPayments = allPayments.filter((p) => {
-    if (!p.payment.receivedAt && !p.payment.createdAt) return false;
-    const paymentDate = p.payment.receivedAt || p.payment.createdAt;
-    if (!paymentDate) return false;
-    return new Date(paymentDate) >= monthStart;
-  });
-  const monthlyRevenue = monthlyPayments.reduce((sum, p) => sum + parseFloat(p.payment.amount.toString()), 0);
-
-  // Calculate total revenue (all time)
-  const totalRevenue = allPayments.reduce((sum, p) => sum + parseFloat(p.payment.amount.toString()), 0);
+  const dailyRevenue = parseFloat(String(row?.daily ?? 0));
+  const weeklyRevenue = parseFloat(String(row?.weekly ?? 0));
+  const monthlyRevenue = parseFloat(String(row?.monthly ?? 0));
+  const totalRevenue = parseFloat(String(row?.total ?? 0));
 
   return {
     daily: dailyRevenue,
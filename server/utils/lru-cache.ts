@@ -0,0 +1,47 @@
+// server/utils/lru-cache.ts
+// Small in-process LRU cache (Map insertion order = recency order)
+
+export class LruCache<K, V> {
+  private entries = new Map<K, V>();
+
+  constructor(private readonly maxEntries: number) {}
+
+  get(key: K): V | undefined {
+    if (!this.entries.has(key)) return undefined;
+    const value = this.entries.get(key) as V;
+    // Re-insert to mark as most recently used
+    this.entries.delete(key);
+    this.entries.set(key, value);
+    return value;
+  }
+
+  has(key: K): boolean {
+    return this.entries.has(key);
+  }
+
+  set(key: K, value: V): void {
+    this.entries.delete(key);
+    this.entries.set(key, value);
+    if (this.entries.size > this.maxEntries) {
+      // Oldest entry is first in iteration order
+      this.entries.delete(this.entries.keys().next().value as K);
+    }
+  }
+
+  delete(key: K): boolean {
+    return this.entries.delete(key);
+  }
+
+  // Iterates oldest first without touching recency
+  forEach(callback: (value: V, key: K) => void): void {
+    this.entries.forEach(callback);
+  }
+
+  clear(): void {
+    this.entries.clear();
+  }
+
+  get size(): number {
+    return this.entries.size;
+  }
+}
@@ -0,0 +1,320 @@
+// server/utils/tabular-stream.ts
+// Streaming CSV / XLSX writers for large exports: rows go straight to a Writable (e.g. the
+// HTTP response) and every write waits for 'drain' when the destination is full.
+
+import { once } from 'events';
+import { createDeflateRaw } from 'zlib';
+import type { Writable } from 'stream';
+
+export type TabularFormat = 'csv' | 'xlsx';
+
+export interface TabularStreamWriter {
+  readonly contentType: string;
+  start(headers: string[]): Promise<void>;
+  writeRows(rows: unknown[][]): Promise<void>;
+  finish(): Promise<void>;
+}
+
+export const writeWithBackpressure = async (out: Writable, chunk: string | Buffer) => {
+  if (out.destroyed) throw new Error('Output stream closed');
+  if (!out.write(chunk)) {
+    // 'drain' never fires once the client has gone away, so also stop on 'close'/'error'
+    await new Promise<void>((resolve, reject) => {
+      const onDrain = () => {
+        cleanup();
+        resolve();
+      };
+      const onClose = () => {
+        cleanup();
+        reject(new Error('Output stream closed'));
+      };
+      const onError = (err: Error) => {
+        cleanup();
+        reject(err);
+      };
+      const cleanup = () => {
+        out.off('drain', onDrain);
+        out.off('close', onClose);
+        out.off('error', onError);
+      };
+      out.on('drain', onDrain);
+      out.on('close', onClose);
+      out.on('error', onError);
+    });
+  }
+};
+
+/**
+ * Cell text for exports: null/undefined -> '', Date -> ISO, objects -> JSON, everything else String().
+ */
+const cellText = (value: unknown): string => {
+  if (value === null || value === undefined) return '';
+  if (value instanceof Date) return isNaN(value.getTime()) ? '' : value.toISOString();
+  if (typeof value === 'object') return JSON.stringify(value);
+  return String(value);
+};
+
+/**
+ * Escape one CSV field (RFC 4180): quote when it contains a comma, quote, CR or LF.
+ */
+export const csvEscape = (value: unknown): string => {
+  const text = cellText(value);
+  return /[",\r\n]/.test(text) ? `"${text.replace(/"/g, '""')}"` : text;
+};
+
+export const csvLine = (values: unknown[]): string => values.map(csvEscape).join(',');
+
+export class CsvStreamWriter implements TabularStreamWriter {
+  readonly contentType = 'text/csv; charset=utf-8';
+
+  constructor(private readonly out: Writable) {}
+
+  async start(headers: string[]) {
+    await writeWithBackpressure(this.out, csvLine(headers) + '\r\n');
+  }
+
+  async writeRows(rows: unknown[][]) {
+    if (rows.length === 0) return;
+    await writeWithBackpressure(this.out, rows.map((row) => csvLine(row) + '\r\n').join(''));
+  }
+
+  async finish() {
+    this.out.end();
+  }
+}
+
+// ---- Minimal streaming ZIP (deflate, data descriptors; no ZIP64, so < 4 GB per file) ----
+
+const CRC_TABLE = (() => {
+  const table = new Uint32Array(256);
+  for (let n = 0; n < 256; n++) {
+    let c = n;
+    for (let k = 0; k < 8; k++) c = c & 1 ? 0xedb88320 ^ (c >>> 1) : c >>> 1;
+    table[n] = c >>> 0;
+  }
+  return table;
+})();
+
+const crc32 = (buf: Buffer, crc = 0) => {
+  let c = crc ^ 0xffffffff;
+  for (let i = 0; i < buf.length; i++) c = CRC_TABLE[(c ^ buf[i]) & 0xff] ^ (c >>> 8);
+  return (c ^ 0xffffffff) >>> 0;
+};
+
+const dosDateTime = (date: Date) => ({
+  time: (date.getHours() << 11) | (date.getMinutes() << 5) | Math.floor(date.getSeconds() / 2),
+  date: ((date.getFullYear() - 1980) << 9) | ((date.getMonth() + 1) << 5) | date.getDate(),
+});
+
+// bit 3: sizes/CRC follow the data; bit 11: UTF-8 names
+const ZIP_FLAGS = 0x0808;
+
+type ZipEntry = { name: Buffer; offset: number; crc: number; compressedSize: number; size: number };
+
+class ZipStreamWriter {
+  private offset = 0;
+  private entries: ZipEntry[] = [];
+  private readonly stamp = dosDateTime(new Date());
+
+  constructor(private readonly out: Writable) {}
+
+  private async emit(chunk: Buffer) {
+    this.offset += chunk.length;
+    await writeWithBackpressure(this.out, chunk);
+  }
+
+  /**
+   * Start a deflated entry; returns write/end for its uncompressed content.
+   */
+  async openEntry(path: string) {
+    const name = Buffer.from(path, 'utf8');
+    const entry: ZipEntry = { name, offset: this.offset, crc: 0, compressedSize: 0, size: 0 };
+
+    const header = Buffer.alloc(30);
+    header.writeUInt32LE(0x04034b50, 0);
+    header.writeUInt16LE(20, 4);
+    header.writeUInt16LE(ZIP_FLAGS, 6);
+    header.writeUInt16LE(8, 8); // deflate
+    header.writeUInt16LE(this.stamp.time, 10);
+    header.writeUInt16LE(this.stamp.date, 12);
+    // crc/sizes (14..25) are zero here and written in the data descriptor
+    header.writeUInt16LE(name.length, 26);
+    await this.emit(Buffer.concat([header, name]));
+
+    const deflate = createDeflateRaw();
+    const pump = (async () => {
+      for await (const compressed of deflate) {
+        entry.compressedSize += compressed.length;
+        await this.emit(compressed);
+      }
+    })();
+    // Surface pump failures (e.g. client disconnect) from write()/end()
+    let pumpError: unknown = null;
+    pump.catch((e) => {
+      pumpError = e;
+      deflate.destroy();
+    });
+
+    return {
+      write: async (content: string | Buffer) => {
+        if (pumpError) throw pumpError;
+        const buf = typeof content === 'string' ? Buffer.from(content, 'utf8') : content;
+        if (buf.length === 0) return;
+        entry.crc = crc32(buf, entry.crc);
+        entry.size += buf.length;
+        if (!deflate.write(buf)) {
+          await Promise.race([once(deflate, 'drain'), pump]);
+        }
+      },
+      end: async () => {
+        deflate.end();
+        await pump;
+        const descriptor = Buffer.alloc(16);
+        descriptor.writeUInt32LE(0x08074b50, 0);
+        descriptor.writeUInt32LE(entry.crc, 4);
+        descriptor.writeUInt32LE(entry.compressedSize, 8);
+        descriptor.writeUInt32LE(entry.size, 12);
+        await this.emit(descriptor);
+        this.entries.push(entry);
+      },
+    };
+  }
+
+  async addFile(path: string, content: string) {
+    const file = await this.openEntry(path);
+    await file.write(content);
+    await file.end();
+  }
+
+  async finish() {
+    const start = this.offset;
+    for (const entry of this.entries) {
+      const header = Buffer.alloc(46);
+      header.writeUInt32LE(0x02014b50, 0);
+      header.writeUInt16LE(20, 4);
+      header.writeUInt16LE(20, 6);
+      header.writeUInt16LE(ZIP_FLAGS, 8);
+      header.writeUInt16LE(8, 10);
+      header.writeUInt16LE(this.stamp.time, 12);
+      header.writeUInt16LE(this.stamp.date, 14);
+      header.writeUInt32LE(entry.crc, 16);
+      header.writeUInt32LE(entry.compressedSize, 20);
+      header.writeUInt32LE(entry.size, 24);
+      header.writeUInt16LE(entry.name.length, 28);
+      header.writeUInt32LE(entry.offset, 42);
+      await this.emit(Buffer.concat([header, entry.name]));
+    }
+    const end = Buffer.alloc(22);
+    end.writeUInt32LE(0x06054b50, 0);
+    end.writeUInt16LE(this.entries.length, 8);
+    end.writeUInt16LE(this.entries.length, 10);
+    end.writeUInt32LE(this.offset - start, 12);
+    end.writeUInt32LE(start, 16);
+    await this.emit(end);
+    this.out.end();
+  }
+}
+
+// ---- XLSX (single sheet, inline strings, no styles) ----
+
+// XML 1.0 forbids most control characters; drop them rather than produce a corrupt file.
+// eslint-disable-next-line no-control-regex
+const INVALID_XML_CHARS = /[\u0000-\u0008\u000B\u000C\u000E-\u001F\uFFFE\uFFFF]/g;
+
+const xmlEscape = (text: string) =>
+  text
+    .replace(INVALID_XML_CHARS, '')
+    .replace(/&/g, '&amp;')
+    .replace(/</g, '&lt;')
+    .replace(/>/g, '&gt;')
+    .replace(/"/g, '&quot;');
+
+const xlsxCell = (value: unknown) => {
+  if (typeof value === 'number' && Number.isFinite(value)) return `<c><v>${value}</v></c>`;
+  if (typeof value === 'boolean') return `<c t="b"><v>${value ? 1 : 0}</v></c>`;
+  const text = cellText(value);
+  if (text === '') return '<c/>';
+  return `<c t="inlineStr"><is><t xml:space="preserve">${xmlEscape(text)}</t></is></c>`;
+};
+
+const xlsxRow = (values: unknown[]) => `<row>${values.map(xlsxCell).join('')}</row>`;
+
+// Excel's hard row limit (including the header row)
+const XLSX_MAX_ROWS = 1048576;
+
+export class XlsxStreamWriter implements TabularStreamWriter {
+  readonly contentType = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet';
+  private readonly zip: ZipStreamWriter;
+  private sheet: Awaited<ReturnType<ZipStreamWriter['openEntry']>> | null = null;
+  private rowCount = 0;
+
+  constructor(out: Writable, private readonly sheetName = 'Report') {
+    this.zip = new ZipStreamWriter(out);
+  }
+
+  async start(headers: string[]) {
+    const sheetName = xmlEscape(this.sheetName.replace(/[\\/?*[\]:]/g, ' ').slice(0, 31) || 'Report');
+    await this.zip.addFile(
+      '[Content_Types].xml',
+      '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>' +
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">' +
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>' +
+        '<Default Extension="xml" ContentType="application/xml"/>' +
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>' +
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>' +
+        '</Types>',
+    );
+    await this.zip.addFile(
+      '_rels/.rels',
+      '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>' +
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">' +
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>' +
+        '</Relationships>',
+    );
+    await this.zip.addFile(
+      'xl/workbook.xml',
+      '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>' +
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">' +
+        `<sheets><sheet name="${sheetName}" sheetId="1" r:id="rId1"/></sheets>` +
+        '</workbook>',
+    );
+    await this.zip.addFile(
+      'xl/_rels/workbook.xml.rels',
+      '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>' +
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">' +
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>' +
+        '</Relationships>',
+    );
+
+    this.sheet = await this.zip.openEntry('xl/worksheets/sheet1.xml');
+    await this.sheet.write(
+      '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>' +
+        '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>' +
+        xlsxRow(headers),
+    );
+    this.rowCount = 1;
+  }
+
+  async writeRows(rows: unknown[][]) {
+    if (!this.sheet) throw new Error('XlsxStreamWriter.start() must be called first');
+    if (this.rowCount + rows.length > XLSX_MAX_ROWS) {
+      throw new Error(`Export exceeds the XLSX limit of ${XLSX_MAX_ROWS} rows; use CSV`);
+    }
+    if (rows.length === 0) return;
+    this.rowCount += rows.length;
+    await this.sheet.write(rows.map(xlsxRow).join(''));
+  }
+
+  async finish() {
+    if (!this.sheet) throw new Error('XlsxStreamWriter.start() must be called first');
+    await this.sheet.write('</sheetData></worksheet>');
+    await this.sheet.end();
+    await this.zip.finish();
+  }
+}
+
+export const createTabularWriter = (
+  format: TabularFormat,
+  out: Writable,
+  sheetName?: string,
+): TabularStreamWriter => (format === 'xlsx' ? new XlsxStreamWriter(out, sheetName) : new CsvStreamWriter(out));
@@ -283,6 +283,19 @@ export const opdTokenCounter = pgTable(
   })
 );
 
+// Doctor/date queues reordered by hand: ranked by opd_queue_entries.position instead of slot + arrival
+export const opdQueueManualOrder = pgTable(
+  'opd_queue_manual_order',
+  {
+    doctorId: integer('doctor_id').references(() => doctors.id).notNull(),
+    queueDate: text('queue_date').notNull(), // YYYY-MM-DD
+    updatedAt: timestamp('updated_at').defaultNow(),
+  },
+  (table) => ({
+    pk: primaryKey({ columns: [table.doctorId, table.queueDate] }),
+  })
+);
+
 // Appointment Reschedule Requests - For patient-initiated reschedule requests
 export const appointmentReschedules = pgTable("appointment_reschedules", {
   id: serial("id").primaryKey(),
@@ -1110,6 +1123,26 @@ export const refunds = pgTable("refunds", {
   createdAt: timestamp("created_at").defaultNow(),
 });
 
+// Daily revenue rollup per hospital - maintained by billing.service on every payment/refund,
+// rebuilt from payments/refunds with `npm run db:rebuild-daily-revenue`
+export const hospitalDailyRevenue = pgTable(
+  'hospital_daily_revenue',
+  {
+    hospitalId: integer('hospital_id').references(() => hospitals.id).notNull(),
+    day: text('day').notNull(), // YYYY-MM-DD of COALESCE(received_at, created_at)
+    source: text('source').notNull(), // appointment, test, pharmacy, opd
+    method: text('method').notNull(), // payment method; 'unknown' for refunds
+    collectedAmount: decimal('collected_amount', { precision: 12, scale: 2 }).default('0').notNull(),
+    paymentCount: integer('payment_count').default(0).notNull(),
+    refundedAmount: decimal('refunded_amount', { precision: 12, scale: 2 }).default('0').notNull(),
+    refundCount: integer('refund_count').default(0).notNull(),
+    updatedAt: timestamp('updated_at').defaultNow(),
+  },
+  (table) => ({
+    pk: primaryKey({ columns: [table.hospitalId, table.day, table.source, table.method] }),
+  })
+);
+
 // Medicine Catalog - Master list of medicines available in the system
 export const medicineCatalog = pgTable("medicine_catalog", {
   id: serial("id").primaryKey(),
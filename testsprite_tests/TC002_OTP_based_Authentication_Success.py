@@ -1,36 +1,18 @@
 import asyncio
 from playwright import async_api
 from playwright.async_api import expect
+from harness.locators import locate
+from harness.session import BASE_URL, case_context
+from harness.waits import wait_actionable
 
-async def run_test():
-    pw = None
-    browser = None
-    context = None
-    
-    try:
-        # Start a Playwright session in asynchronous mode
-        pw = await async_api.async_playwright().start()
-        
-        # Launch a Chromium browser in headless mode with custom arguments
-        browser = await pw.chromium.launch(
-            headless=True,
-            args=[
-                "--window-size=1280,720",         # Set the browser window size
-                "--disable-dev-shm-usage",        # Avoid using /dev/shm which can cause issues in containers
-                "--ipc=host",                     # Use host-level IPC for better stability
-                "--single-process"                # Run the browser in a single process mode
-            ],
-        )
-        
-        # Create a new browser context (like an incognito window)
-        context = await browser.new_context()
-        context.set_default_timeout(5000)
-        
+async def run_test(context=None):
+    # Use the runner's shared-browser context, or start a private browser when run standalone
+    async with case_context(context) as context:
         # Open a new page in the browser context
         page = await context.new_page()
         
         # Navigate to your target URL and wait until the network request is committed
-        await page.goto("http://localhost:3000", wait_until="commit", timeout=10000)
+        await page.goto(BASE_URL, wait_until="commit", timeout=10000)
         
         # Wait for the main page to reach DOMContentLoaded state (optional for stability)
         try:
@@ -49,36 +31,36 @@ async def run_test():
         # -> Click on the OTP Login tab to switch to OTP login form.
         frame = context.pages[-1]
         # Click on OTP Login tab to switch to OTP login form
-        elem = frame.locator('xpath=html/body/div/div/div/div/div/div/div/div/div/div/div/div/div/div[2]/div').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = locate(frame, "login.otp_tab")
+        await wait_actionable(elem); await elem.click(timeout=5000)
         
 
         # -> Try clicking the mobile number input field first to focus, then input the mobile number '9810000000'.
         frame = context.pages[-1]
         # Click on mobile number input field to focus it before typing
-        elem = frame.locator('xpath=html/body/div/div/div/div/div/div/div/div/div/div/div[2]/div/div/div/form/div/div/div[2]/div/div/span/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = locate(frame, "login.mobile")
+        await wait_actionable(elem); await elem.click(timeout=5000)
         
 
         # -> Click on the OTP Login tab (index 4) to switch to OTP login form, or if not possible, report the issue and stop.
         frame = context.pages[-1]
         # Click on OTP Login tab to switch to OTP login form
-        elem = frame.locator('xpath=html/body/div/div/div/div/div/div/div/div/div/div/div/div/div/div[2]/div').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = locate(frame, "login.otp_tab")
+        await wait_actionable(elem); await elem.click(timeout=5000)
         
 
         # -> Input the registered mobile number '9810000000' into the mobile number input field.
         frame = context.pages[-1]
         # Input registered mobile number for OTP request
-        elem = frame.locator('xpath=html/body/div/div/div/div/div/div/div/div/div/div/div[2]/div/div[2]/div/form/div/div/div[2]/div/div/span/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('9810000000')
+        elem = locate(frame, "otp.mobile")
+        await wait_actionable(elem); await elem.fill('9810000000')
         
 
         # -> Click the 'Send OTP' button (index 8) to request the OTP.
         frame = context.pages[-1]
         # Click the Send OTP button to request OTP for the entered mobile number
-        elem = frame.locator('xpath=html/body/div/div/div/div/div/div/div/div/div/div/div[2]/div/div[2]/div/form/div[2]/div/div/div/div/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = locate(frame, "otp.send")
+        await wait_actionable(elem); await elem.click(timeout=5000)
         
 
         # --> Assertions to verify final state
@@ -87,15 +69,6 @@ async def run_test():
             await expect(frame.locator('text=Authentication Successful').first).to_be_visible(timeout=1000)
         except AssertionError:
             raise AssertionError("Test case failed: OTP login flow did not complete successfully, valid JWT token was not received, or user did not access the correct role-based dashboard as per the test plan.")
-        await asyncio.sleep(5)
-    
-    finally:
-        if context:
-            await context.close()
-        if browser:
-            await browser.close()
-        if pw:
-            await pw.stop()
-            
-asyncio.run(run_test())
-    
\ No newline at end of file
+
+if __name__ == "__main__":
+    asyncio.run(run_test())
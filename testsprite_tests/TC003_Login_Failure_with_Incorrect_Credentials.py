@@ -1,36 +1,18 @@
 import asyncio
 from playwright import async_api
 from playwright.async_api import expect
+from harness.locators import locate
+from harness.session import BASE_URL, case_context
+from harness.waits import wait_actionable
 
-async def run_test():
-    pw = None
-    browser = None
-    context = None
-    
-    try:
-        # Start a Playwright session in asynchronous mode
-        pw = await async_api.async_playwright().start()
-        
-        # Launch a Chromium browser in headless mode with custom arguments
-        browser = await pw.chromium.launch(
-            headless=True,
-            args=[
-                "--window-size=1280,720",         # Set the browser window size
-                "--disable-dev-shm-usage",        # Avoid using /dev/shm which can cause issues in containers
-                "--ipc=host",                     # Use host-level IPC for better stability
-                "--single-process"                # Run the browser in a single process mode
-            ],
-        )
-        
-        # Create a new browser context (like an incognito window)
-        context = await browser.new_context()
-        context.set_default_timeout(5000)
-        
+async def run_test(context=None):
+    # Use the runner's shared-browser context, or start a private browser when run standalone
+    async with case_context(context) as context:
         # Open a new page in the browser context
         page = await context.new_page()
         
         # Navigate to your target URL and wait until the network request is committed
-        await page.goto("http://localhost:3000", wait_until="commit", timeout=10000)
+        await page.goto(BASE_URL, wait_until="commit", timeout=10000)
         
         # Wait for the main page to reach DOMContentLoaded state (optional for stability)
         try:
@@ -49,21 +31,21 @@ async def run_test():
         # -> Input invalid username and password into the respective fields
         frame = context.pages[-1]
         # Input invalid username/mobile number
-        elem = frame.locator('xpath=html/body/div/div/div/div/div/div/div/div/div/div/div[2]/div/div/div/form/div/div/div[2]/div/div/span/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('9810000000')
+        elem = locate(frame, "login.mobile")
+        await wait_actionable(elem); await elem.fill('9810000000')
         
 
         frame = context.pages[-1]
         # Input invalid password
-        elem = frame.locator('xpath=html/body/div/div/div/div/div/div/div/div/div/div/div[2]/div/div/div/form/div[2]/div/div[2]/div/div/span/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('password123')
+        elem = locate(frame, "login.password")
+        await wait_actionable(elem); await elem.fill('password123')
         
 
         # -> Submit the login form by clicking the Sign In button
         frame = context.pages[-1]
         # Click the Sign In button to submit the login form
-        elem = frame.locator('xpath=html/body/div/div/div/div/div/div/div/div/div/div/div[2]/div/div/div/form/div[3]/div/div/div/div/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = locate(frame, "login.submit")
+        await wait_actionable(elem); await elem.click(timeout=5000)
         
 
         # --> Assertions to verify final state
@@ -72,15 +54,6 @@ async def run_test():
             await expect(frame.locator('text=Login Successful').first).to_be_visible(timeout=5000)
         except AssertionError:
             raise AssertionError('Test case failed: Login attempt with invalid credentials was rejected as expected, but the test plan execution has failed.')
-        await asyncio.sleep(5)
-    
-    finally:
-        if context:
-            await context.close()
-        if browser:
-            await browser.close()
-        if pw:
-            await pw.stop()
-            
-asyncio.run(run_test())
-    
\ No newline at end of file
+
+if __name__ == "__main__":
+    asyncio.run(run_test())
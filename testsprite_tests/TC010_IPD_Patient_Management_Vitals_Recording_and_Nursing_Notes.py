@@ -1,36 +1,21 @@
 import asyncio
 from playwright import async_api
 from playwright.async_api import expect
+from harness.locators import locate
+from harness.session import BASE_URL, case_context
+from harness.waits import wait_actionable
 
-async def run_test():
-    pw = None
-    browser = None
-    context = None
-    
-    try:
-        # Start a Playwright session in asynchronous mode
-        pw = await async_api.async_playwright().start()
-        
-        # Launch a Chromium browser in headless mode with custom arguments
-        browser = await pw.chromium.launch(
-            headless=True,
-            args=[
-                "--window-size=1280,720",         # Set the browser window size
-                "--disable-dev-shm-usage",        # Avoid using /dev/shm which can cause issues in containers
-                "--ipc=host",                     # Use host-level IPC for better stability
-                "--single-process"                # Run the browser in a single process mode
-            ],
-        )
-        
-        # Create a new browser context (like an incognito window)
-        context = await browser.new_context()
-        context.set_default_timeout(5000)
-        
+# Starts signed in from the cached login (harness.auth_state); TC001-TC003 cover the login form
+AUTH_ROLE = "hospital"
+
+async def run_test(context=None):
+    # Use the runner's shared-browser context, or start a private browser when run standalone
+    async with case_context(context, role=AUTH_ROLE) as context:
         # Open a new page in the browser context
         page = await context.new_page()
         
-        # Navigate to your target URL and wait until the network request is committed
-        await page.goto("http://localhost:3000", wait_until="commit", timeout=10000)
+        # Navigate to the role dashboard and wait until the network request is committed
+        await page.goto(f"{BASE_URL}/dashboard", wait_until="commit", timeout=10000)
         
         # Wait for the main page to reach DOMContentLoaded state (optional for stability)
         try:
@@ -46,56 +31,11 @@ async def run_test():
                 pass
         
         # Interact with the page elements to simulate user flow
-        # -> Input nurse mobile number and password, then click Sign In button
-        frame = context.pages[-1]
-        # Enter nurse mobile number
-        elem = frame.locator('xpath=html/body/div/div/div/div/div/div/div/div/div/div/div[2]/div/div/div/form/div/div/div[2]/div/div/span/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('9810000000')
-        
-
-        frame = context.pages[-1]
-        # Enter nurse password
-        elem = frame.locator('xpath=html/body/div/div/div/div/div/div/div/div/div/div/div[2]/div/div/div/form/div[2]/div/div[2]/div/div/span/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('password123')
-        
-
-        frame = context.pages[-1]
-        # Click Sign In button
-        elem = frame.locator('xpath=html/body/div/div/div/div/div/div/div/div/div/div/div[2]/div/div/div/form/div[3]/div/div/div/div/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-
-        # -> Click Sign In button to login as Nurse
-        frame = context.pages[-1]
-        # Click Sign In button
-        elem = frame.locator('xpath=html/body/div/div/div/div/div/div/div/div/div/div/div[2]/div/div/div/form/div[3]/div/div/div/div/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-
-        # -> Re-enter nurse mobile number and password, then click Sign In button
-        frame = context.pages[-1]
-        # Re-enter nurse mobile number
-        elem = frame.locator('xpath=html/body/div/div/div/div/div/div/div/div/div/div/div[2]/div/div/div/form/div/div/div[2]/div/div/span/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('9810000000')
-        
-
-        frame = context.pages[-1]
-        # Re-enter nurse password
-        elem = frame.locator('xpath=html/body/div/div/div/div/div/div/div/div/div/div/div[2]/div/div/div/form/div[2]/div/div[2]/div/div/span/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('password123')
-        
-
-        frame = context.pages[-1]
-        # Click Sign In button
-        elem = frame.locator('xpath=html/body/div/div/div/div/div/div/div/div/div/div/div[2]/div/div/div/form/div[3]/div/div/div/div/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-
         # -> Click on the 'IPD Management' tab to access admitted IPD patients list
         frame = context.pages[-1]
         # Click on IPD Management tab
-        elem = frame.locator('xpath=html/body/div/div/div/div/div/main/div/div[4]/div/div/div/div/div[2]/div').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = locate(frame, "dashboard.tab.ipd")
+        await wait_actionable(elem); await elem.click(timeout=5000)
         
 
         # -> Locate and select an admitted IPD patient to proceed with recording vitals and nursing notes
@@ -104,8 +44,8 @@ async def run_test():
 
         frame = context.pages[-1]
         # Click on Patients menu to find admitted IPD patients
-        elem = frame.locator('xpath=html/body/div/div/div/div/aside/div/div/ul/li[3]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = locate(frame, "sidebar.patients")
+        await wait_actionable(elem); await elem.click(timeout=5000)
         
 
         # --> Assertions to verify final state
@@ -114,15 +54,6 @@ async def run_test():
             await expect(frame.locator('text=Patient Discharge Summary').first).to_be_visible(timeout=1000)
         except AssertionError:
             raise AssertionError("Test case failed: The test plan execution failed to verify that nurses can record patient vitals, input nursing notes, monitor patient status, and view documentation efficiently within the IPD workflow.")
-        await asyncio.sleep(5)
-    
-    finally:
-        if context:
-            await context.close()
-        if browser:
-            await browser.close()
-        if pw:
-            await pw.stop()
-            
-asyncio.run(run_test())
-    
\ No newline at end of file
+
+if __name__ == "__main__":
+    asyncio.run(run_test())
@@ -1,36 +1,24 @@
 import asyncio
 from playwright import async_api
 from playwright.async_api import expect
+from harness.latency import LatencyRecorder
+from harness.locators import locate
+from harness.session import BASE_URL, case_context
+from harness.waits import expect_api, wait_actionable
 
-async def run_test():
-    pw = None
-    browser = None
-    context = None
-    
-    try:
-        # Start a Playwright session in asynchronous mode
-        pw = await async_api.async_playwright().start()
-        
-        # Launch a Chromium browser in headless mode with custom arguments
-        browser = await pw.chromium.launch(
-            headless=True,
-            args=[
-                "--window-size=1280,720",         # Set the browser window size
-                "--disable-dev-shm-usage",        # Avoid using /dev/shm which can cause issues in containers
-                "--ipc=host",                     # Use host-level IPC for better stability
-                "--single-process"                # Run the browser in a single process mode
-            ],
-        )
-        
-        # Create a new browser context (like an incognito window)
-        context = await browser.new_context()
-        context.set_default_timeout(5000)
-        
+# Repetitions per measurement; percentiles over fewer samples are not meaningful
+LOGIN_SAMPLES = 5
+DASHBOARD_SAMPLES = 5
+
+async def run_test(context=None):
+    # Use the runner's shared-browser context, or start a private browser when run standalone
+    async with case_context(context) as context:
         # Open a new page in the browser context
         page = await context.new_page()
+        recorder = LatencyRecorder().attach(page)
         
         # Navigate to your target URL and wait until the network request is committed
-        await page.goto("http://localhost:3000", wait_until="commit", timeout=10000)
+        await page.goto(BASE_URL, wait_until="commit", timeout=10000)
         
         # Wait for the main page to reach DOMContentLoaded state (optional for stability)
         try:
@@ -38,113 +26,46 @@ async def run_test():
         except async_api.Error:
             pass
         
-        # Iterate through all iframes and wait for them to load as well
-        for frame in page.frames:
-            try:
-                await frame.wait_for_load_state("domcontentloaded", timeout=3000)
-            except async_api.Error:
-                pass
-        
         # Interact with the page elements to simulate user flow
-        # -> Input mobile number and password, then click Sign In to measure login API response time.
-        frame = context.pages[-1]
-        # Input mobile number for login
-        elem = frame.locator('xpath=html/body/div/div/div/div/div/div/div/div/div/div/div[2]/div/div/div/form/div/div/div[2]/div/div/span/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('9810000000')
-        
-
-        frame = context.pages[-1]
-        # Input password for login
-        elem = frame.locator('xpath=html/body/div/div/div/div/div/div/div/div/div/div/div[2]/div/div/div/form/div[2]/div/div[2]/div/div/span/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('password123')
-        
+        # -> Sign in through the login form several times to sample /api/auth/login latency.
+        for _ in range(LOGIN_SAMPLES):
+            await page.evaluate("() => { sessionStorage.clear(); localStorage.clear(); }")
+            await page.goto(f"{BASE_URL}/login", wait_until="domcontentloaded")
+            # Input mobile number for login
+            elem = locate(page, "login.mobile")
+            await wait_actionable(elem); await elem.fill('9810000000')
+            # Input password for login
+            elem = locate(page, "login.password")
+            await wait_actionable(elem); await elem.fill('password123')
+            # Click Sign In button and wait for the login API response
+            elem = locate(page, "login.submit")
+            async with expect_api(page, "/api/auth/login", status=200):
+                await elem.click(timeout=5000)
+            await page.wait_for_url("**/dashboard/**")
 
-        # -> Click Sign In button to submit login form and measure login API response time.
-        frame = context.pages[-1]
-        # Click Sign In button to submit login form
-        elem = frame.locator('xpath=html/body/div/div/div/div/div/div/div/div/div/div/div[2]/div/div/div/form/div[3]/div/div/div/div/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
+        # -> Reload the hospital dashboard to sample page load and its /api calls.
+        for _ in range(DASHBOARD_SAMPLES):
+            await recorder.measure_page_load(page, "/dashboard/hospital")
+        await recorder.collect_resource_timing(page)
 
-        # -> Clear and re-input mobile number and password, then click Sign In again to trigger login API and measure response time.
+        # -> Open the Appointments section to sample the appointment list endpoints.
         frame = context.pages[-1]
-        # Clear mobile number input field
-        elem = frame.locator('xpath=html/body/div/div/div/div/div/div/div/div/div/div/div[2]/div/div/div/form/div/div/div[2]/div/div/span/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('')
-        
-
-        frame = context.pages[-1]
-        # Clear password input field
-        elem = frame.locator('xpath=html/body/div/div/div/div/div/div/div/div/div/div/div[2]/div/div/div/form/div[2]/div/div[2]/div/div/span/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('')
-        
-
-        frame = context.pages[-1]
-        # Re-input mobile number for login
-        elem = frame.locator('xpath=html/body/div/div/div/div/div/div/div/div/div/div/div[2]/div/div/div/form/div/div/div[2]/div/div/span/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('9810000000')
-        
-
-        frame = context.pages[-1]
-        # Re-input password for login
-        elem = frame.locator('xpath=html/body/div/div/div/div/div/div/div/div/div/div/div[2]/div/div/div/form/div[2]/div/div[2]/div/div/span/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('password123')
-        
-
-        frame = context.pages[-1]
-        # Click Sign In button to submit login form
-        elem = frame.locator('xpath=html/body/div/div/div/div/div/div/div/div/div/div/div[2]/div/div/div/form/div[3]/div/div/div/div/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-
-        # -> Click Sign In button to submit login form and measure login API response time.
-        frame = context.pages[-1]
-        # Click Sign In button to submit login form
-        elem = frame.locator('xpath=html/body/div/div/div/div/div/div/div/div/div/div/div[2]/div/div/div/form/div[3]/div/div/div/div/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-
-        # -> Re-input mobile number and password carefully ensuring no validation errors, then click Sign In to trigger login API and measure response time.
-        frame = context.pages[-1]
-        # Input mobile number for login
-        elem = frame.locator('xpath=html/body/div/div/div/div/div/div/div/div/div/div/div[2]/div/div/div/form/div/div/div[2]/div/div/span/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('9810000000')
-        
-
-        frame = context.pages[-1]
-        # Input password for login
-        elem = frame.locator('xpath=html/body/div/div/div/div/div/div/div/div/div/div/div[2]/div/div/div/form/div[2]/div/div[2]/div/div/span/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('password123')
-        
-
-        frame = context.pages[-1]
-        # Click Sign In button to submit login form
-        elem = frame.locator('xpath=html/body/div/div/div/div/div/div/div/div/div/div/div[2]/div/div/div/form/div[3]/div/div/div/div/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-
-        # -> Measure API response time for appointment booking endpoint under normal load.
-        frame = context.pages[-1]
-        # Click on Appointments menu to access appointment booking features
-        elem = frame.locator('xpath=html/body/div/div/div/div/aside/div/div/ul/li[4]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
+        # Click on Appointments menu
+        elem = locate(frame, "dashboard.tab.appointments")
+        await wait_actionable(elem); await elem.click(timeout=5000)
+        try:
+            await page.wait_for_load_state("networkidle", timeout=15000)
+        except async_api.Error:
+            pass
+        await recorder.collect_resource_timing(page)
 
         # --> Assertions to verify final state
+        report = recorder.write_report()
         frame = context.pages[-1]
-        try:
-            await expect(frame.locator('text=API Response Time Exceeded Limit').first).to_be_visible(timeout=1000)
-        except AssertionError:
-            raise AssertionError("Test case failed: Critical API endpoints and UI page loads did not meet the defined maximum response times under normal load as per the test plan.")
-        await asyncio.sleep(5)
-    
-    finally:
-        if context:
-            await context.close()
-        if browser:
-            await browser.close()
-        if pw:
-            await pw.stop()
-            
-asyncio.run(run_test())
-    
\ No newline at end of file
+        await expect(frame.locator('text=Appointments').first).to_be_visible(timeout=30000)
+        assert report["endpoints"].get("/api/auth/login", {}).get("count"), "Test case failed: no /api/auth/login samples were recorded."
+        if report["violations"]:
+            raise AssertionError("Test case failed: Critical API endpoints or UI page loads exceeded their response-time budgets: " + "; ".join(report["violations"]))
+
+if __name__ == "__main__":
+    asyncio.run(run_test())
@@ -1,36 +1,21 @@
 import asyncio
 from playwright import async_api
 from playwright.async_api import expect
+from harness.locators import locate
+from harness.session import BASE_URL, case_context
+from harness.waits import wait_actionable
 
-async def run_test():
-    pw = None
-    browser = None
-    context = None
-    
-    try:
-        # Start a Playwright session in asynchronous mode
-        pw = await async_api.async_playwright().start()
-        
-        # Launch a Chromium browser in headless mode with custom arguments
-        browser = await pw.chromium.launch(
-            headless=True,
-            args=[
-                "--window-size=1280,720",         # Set the browser window size
-                "--disable-dev-shm-usage",        # Avoid using /dev/shm which can cause issues in containers
-                "--ipc=host",                     # Use host-level IPC for better stability
-                "--single-process"                # Run the browser in a single process mode
-            ],
-        )
-        
-        # Create a new browser context (like an incognito window)
-        context = await browser.new_context()
-        context.set_default_timeout(5000)
-        
+# Restored from the seeded template database before this case when run with --reset-db
+FRESH_DB = True
+
+async def run_test(context=None):
+    # Use the runner's shared-browser context, or start a private browser when run standalone
+    async with case_context(context) as context:
         # Open a new page in the browser context
         page = await context.new_page()
         
         # Navigate to your target URL and wait until the network request is committed
-        await page.goto("http://localhost:3000", wait_until="commit", timeout=10000)
+        await page.goto(BASE_URL, wait_until="commit", timeout=10000)
         
         # Wait for the main page to reach DOMContentLoaded state (optional for stability)
         try:
@@ -49,158 +34,158 @@ async def run_test():
         # -> Click on 'Register here' to start new user registration for Patient role.
         frame = context.pages[-1]
         # Click on 'Register here' button to start registration
-        elem = frame.locator('xpath=html/body/div/div/div/div/div/div/div/div/div/div[3]/span/a/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = locate(frame, "login.register")
+        await wait_actionable(elem); await elem.click(timeout=5000)
         
 
         # -> Click on 'I manage a Hospital' role button which is active to proceed with onboarding for a selectable role.
         frame = context.pages[-1]
         # Click on 'I manage a Hospital' button to start onboarding for Hospital Admin role
-        elem = frame.locator('xpath=html/body/div/div/div/div/div/div/div/div[2]/button[3]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = locate(frame, "register.role.hospital")
+        await wait_actionable(elem); await elem.click(timeout=5000)
         
 
         # -> Fill in the 'Full Name', 'Email', 'Mobile Number', 'Password', and 'Confirm Password' fields with valid test data and click 'Send OTP' to proceed to OTP verification.
         frame = context.pages[-1]
         # Input Full Name for Hospital Admin
-        elem = frame.locator('xpath=html/body/div/div/div/div/div/div/div/div/form/div/div/div/div/div/div[2]/div/div/span/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('Test Admin')
+        elem = locate(frame, "register.full_name")
+        await wait_actionable(elem); await elem.fill('Test Admin')
         
 
         frame = context.pages[-1]
         # Input Email address for Hospital Admin
-        elem = frame.locator('xpath=html/body/div/div/div/div/div/div/div/div/form/div/div/div[2]/div/div/div[2]/div/div/span/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('testadmin@example.com')
+        elem = locate(frame, "register.email")
+        await wait_actionable(elem); await elem.fill('testadmin@example.com')
         
 
         frame = context.pages[-1]
         # Input Mobile Number for Hospital Admin
-        elem = frame.locator('xpath=html/body/div/div/div/div/div/div/div/div/form/div/div/div[3]/div/div/div[2]/div/div/span/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('9810000000')
+        elem = locate(frame, "register.mobile")
+        await wait_actionable(elem); await elem.fill('9810000000')
         
 
         frame = context.pages[-1]
         # Input Password for Hospital Admin
-        elem = frame.locator('xpath=html/body/div/div/div/div/div/div/div/div/form/div/div/div[4]/div/div/div[2]/div/div/span/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('password123')
+        elem = locate(frame, "register.password")
+        await wait_actionable(elem); await elem.fill('password123')
         
 
         frame = context.pages[-1]
         # Input Confirm Password for Hospital Admin
-        elem = frame.locator('xpath=html/body/div/div/div/div/div/div/div/div/form/div/div/div[5]/div/div/div[2]/div/div/span/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('password123')
+        elem = locate(frame, "register.confirm_password")
+        await wait_actionable(elem); await elem.fill('password123')
         
 
         frame = context.pages[-1]
         # Click 'Send OTP' button to send OTP and proceed to verification step
-        elem = frame.locator('xpath=html/body/div/div/div/div/div/div/div/div/form/div[2]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = locate(frame, "register.submit")
+        await wait_actionable(elem); await elem.click(timeout=5000)
         
 
         # -> Try to input Email address using alternative method or focus and clear the field before inputting text again, then proceed with OTP sending.
         frame = context.pages[-1]
         # Click on Email input field to focus
-        elem = frame.locator('xpath=html/body/div/div/div/div/div/div/div/div/form/div/div/div[2]/div/div/div[2]/div/div/span/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = locate(frame, "register.email")
+        await wait_actionable(elem); await elem.click(timeout=5000)
         
 
         frame = context.pages[-1]
         # Try inputting Email address again after focusing
-        elem = frame.locator('xpath=html/body/div/div/div/div/div/div/div/div/form/div/div/div[2]/div/div/div[2]/div/div/span/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('testadmin@example.com')
+        elem = locate(frame, "register.email")
+        await wait_actionable(elem); await elem.fill('testadmin@example.com')
         
 
         frame = context.pages[-1]
         # Click 'Send OTP' button to send OTP and proceed to verification step
-        elem = frame.locator('xpath=html/body/div/div/div/div/div/div/div/div/form/div[2]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = locate(frame, "register.submit")
+        await wait_actionable(elem); await elem.click(timeout=5000)
         
 
         # -> Try to focus Confirm Password field, clear it if needed, and input the password again. Then click 'Send OTP' to proceed.
         frame = context.pages[-1]
         # Focus Confirm Password input field
-        elem = frame.locator('xpath=html/body/div/div/div/div/div/div/div/div/form/div/div/div[5]/div/div/div[2]/div/div/span/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = locate(frame, "register.confirm_password")
+        await wait_actionable(elem); await elem.click(timeout=5000)
         
 
         frame = context.pages[-1]
         # Input Confirm Password
-        elem = frame.locator('xpath=html/body/div/div/div/div/div/div/div/div/form/div/div/div[5]/div/div/div[2]/div/div/span/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('password123')
+        elem = locate(frame, "register.confirm_password")
+        await wait_actionable(elem); await elem.fill('password123')
         
 
         frame = context.pages[-1]
         # Click 'Send OTP' button to send OTP and proceed to verification step
-        elem = frame.locator('xpath=html/body/div/div/div/div/div/div/div/div/form/div[2]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = locate(frame, "register.submit")
+        await wait_actionable(elem); await elem.click(timeout=5000)
         
 
         # -> Try to clear Confirm Password field by clicking and sending backspace keys, then input Confirm Password again. If still fails, report issue and proceed with other roles.
         frame = context.pages[-1]
         # Focus Confirm Password input field
-        elem = frame.locator('xpath=html/body/div/div/div/div/div/div/div/div/form/div/div/div[5]/div/div/div[2]/div/div/span/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = locate(frame, "register.confirm_password")
+        await wait_actionable(elem); await elem.click(timeout=5000)
         
 
         frame = context.pages[-1]
         # Clear Confirm Password field by sending backspaces
-        elem = frame.locator('xpath=html/body/div/div/div/div/div/div/div/div/form/div/div/div[5]/div/div/div[2]/div/div/span/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('\x08\x08\x08\x08\x08\x08\x08\x08\x08\x08')
+        elem = locate(frame, "register.confirm_password")
+        await wait_actionable(elem); await elem.fill('\x08\x08\x08\x08\x08\x08\x08\x08\x08\x08')
         
 
         frame = context.pages[-1]
         # Input Confirm Password
-        elem = frame.locator('xpath=html/body/div/div/div/div/div/div/div/div/form/div/div/div[5]/div/div/div[2]/div/div/span/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('password123')
+        elem = locate(frame, "register.confirm_password")
+        await wait_actionable(elem); await elem.fill('password123')
         
 
         frame = context.pages[-1]
         # Click 'Send OTP' button to send OTP and proceed to verification step
-        elem = frame.locator('xpath=html/body/div/div/div/div/div/div/div/div/form/div[2]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = locate(frame, "register.submit")
+        await wait_actionable(elem); await elem.click(timeout=5000)
         
 
         # -> Fill in Full Name, Email, Mobile Number, Password, and Confirm Password fields with valid matching data and click 'Send OTP' to proceed to OTP verification.
         frame = context.pages[-1]
         # Input Full Name
-        elem = frame.locator('xpath=html/body/div/div/div/div/div/div/div/div/form/div/div/div/div/div/div[2]/div/div/span/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('Test Admin')
+        elem = locate(frame, "register.full_name")
+        await wait_actionable(elem); await elem.fill('Test Admin')
         
 
         frame = context.pages[-1]
         # Input Email
-        elem = frame.locator('xpath=html/body/div/div/div/div/div/div/div/div/form/div/div/div[2]/div/div/div[2]/div/div/span/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('testadmin@example.com')
+        elem = locate(frame, "register.email")
+        await wait_actionable(elem); await elem.fill('testadmin@example.com')
         
 
         frame = context.pages[-1]
         # Focus Mobile Number field
-        elem = frame.locator('xpath=html/body/div/div/div/div/div/div/div/div/form/div/div/div[3]/div/div/div[2]/div/div/span/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = locate(frame, "register.mobile")
+        await wait_actionable(elem); await elem.click(timeout=5000)
         
 
         frame = context.pages[-1]
         # Input Mobile Number
-        elem = frame.locator('xpath=html/body/div/div/div/div/div/div/div/div/form/div/div/div[3]/div/div/div[2]/div/div/span/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('9810000000')
+        elem = locate(frame, "register.mobile")
+        await wait_actionable(elem); await elem.fill('9810000000')
         
 
         frame = context.pages[-1]
         # Input Password
-        elem = frame.locator('xpath=html/body/div/div/div/div/div/div/div/div/form/div/div/div[4]/div/div/div[2]/div/div/span/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('password123')
+        elem = locate(frame, "register.password")
+        await wait_actionable(elem); await elem.fill('password123')
         
 
         frame = context.pages[-1]
         # Input Confirm Password
-        elem = frame.locator('xpath=html/body/div/div/div/div/div/div/div/div/form/div/div/div[5]/div/div/div[2]/div/div/span/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('password123')
+        elem = locate(frame, "register.confirm_password")
+        await wait_actionable(elem); await elem.fill('password123')
         
 
         frame = context.pages[-1]
         # Click 'Send OTP' button to send OTP and proceed to verification step
-        elem = frame.locator('xpath=html/body/div/div/div/div/div/div/div/div/form/div[2]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = locate(frame, "register.submit")
+        await wait_actionable(elem); await elem.click(timeout=5000)
         
 
         # --> Assertions to verify final state
@@ -209,15 +194,6 @@ async def run_test():
             await expect(frame.locator('text=Onboarding Completed Successfully').first).to_be_visible(timeout=1000)
         except AssertionError:
             raise AssertionError("Test plan execution failed: The multi-step onboarding process did not complete successfully for all user roles, including profile completion, verification, and role assignment before access to features.")
-        await asyncio.sleep(5)
-    
-    finally:
-        if context:
-            await context.close()
-        if browser:
-            await browser.close()
-        if pw:
-            await pw.stop()
-            
-asyncio.run(run_test())
-    
\ No newline at end of file
+
+if __name__ == "__main__":
+    asyncio.run(run_test())
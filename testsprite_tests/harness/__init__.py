@@ -0,0 +1,6 @@
+"""Shared Playwright harness for the TestSprite TC scripts.
+
+Each ``TC0xx_*.py`` script stays runnable on its own
+(``python TC001_....py``) but exposes ``run_test(context=None)`` so the
+harness can drive it inside a shared browser.
+"""
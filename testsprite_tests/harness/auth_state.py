@@ -0,0 +1,188 @@
+"""Per-role login cache backed by Playwright ``storage_state`` files.
+
+The app keeps its JWT in ``localStorage['auth-token']`` (see
+``client/src/lib/auth.ts``), so one login per role is enough: the resulting
+storage state is written to ``tmp/auth_state/<role>.json`` and loaded into
+every new context until it passes its TTL or the token's own ``exp``.
+
+Only TC001-TC003 exercise the login form itself; every other case starts
+already signed in.
+"""
+import asyncio
+import base64
+import json
+import os
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+from harness.locators import locate
+from harness.session import BASE_URL, TESTS_DIR
+
+STATE_DIR = TESTS_DIR / "tmp" / "auth_state"
+
+# Tokens are issued for 24h; refresh well before that so a long run never
+# straddles expiry.
+STATE_TTL_S = 6 * 60 * 60
+
+# "api" posts to /api/auth/login directly; "ui" drives the login form once.
+AUTH_MODE = os.environ.get("TESTSPRITE_AUTH_MODE", "api")
+
+DEFAULT_PASSWORD = "password123"
+
+# First seeded account per role (ALL_USER_CREDENTIALS.md).
+ROLE_MOBILES = {
+    "admin": "9876543210",
+    "hospital": "9810000000",
+    "doctor": "9820000150",
+    "patient": "9830000000",
+    "lab": "9840000000",
+    "receptionist": "9850000000",
+}
+
+_locks = {}
+
+
+def _load_config():
+    try:
+        return json.loads((TESTS_DIR / "tmp" / "config.json").read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def credentials_for(role):
+    """Return ``(mobileNumber, password)`` for ``role``.
+
+    The hospital admin follows ``tmp/config.json`` (loginUser/loginPassword)
+    so the TestSprite config stays the single source for the default login.
+    Any role can be pointed at another account with
+    ``TESTSPRITE_<ROLE>_MOBILE`` (e.g. nurse/pharmacist, which have no seeded
+    user).
+    """
+    config = _load_config()
+    password = config.get("loginPassword", DEFAULT_PASSWORD)
+    override = os.environ.get(f"TESTSPRITE_{role.upper()}_MOBILE")
+    if override:
+        return override, password
+    if role == "hospital" and config.get("loginUser"):
+        return config["loginUser"], password
+    if role not in ROLE_MOBILES:
+        raise KeyError(f"No seeded credentials for role {role!r}")
+    return ROLE_MOBILES[role], password
+
+
+def state_path(role):
+    return STATE_DIR / f"{role}.json"
+
+
+def _token_from_state(state):
+    for origin in state.get("origins", []):
+        for item in origin.get("localStorage", []):
+            if item.get("name") == "auth-token":
+                return item.get("value")
+    return None
+
+
+def _token_exp(token):
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        return json.loads(base64.urlsafe_b64decode(payload)).get("exp")
+    except (IndexError, ValueError, AttributeError):
+        return None
+
+
+def is_fresh(path, ttl_s=STATE_TTL_S):
+    """True if the cached state exists, is younger than ``ttl_s`` and its JWT has not expired."""
+    try:
+        if time.time() - path.stat().st_mtime > ttl_s:
+            return False
+        token = _token_from_state(json.loads(path.read_text()))
+    except (OSError, ValueError):
+        return False
+    exp = _token_exp(token) if token else None
+    return bool(token) and (exp is None or exp - 60 > time.time())
+
+
+def _state_for_token(token, role):
+    return {
+        "cookies": [],
+        "origins": [{
+            "origin": BASE_URL,
+            "localStorage": [
+                {"name": "auth-token", "value": token},
+                {"name": "userRole", "value": role},
+            ],
+        }],
+    }
+
+
+def _post_login(mobile, password):
+    request = urllib.request.Request(
+        f"{BASE_URL}/api/auth/login",
+        data=json.dumps({"mobileNumber": mobile, "password": password}).encode(),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            return json.loads(response.read())
+    except urllib.error.HTTPError as exc:
+        raise RuntimeError(f"Login for {mobile} failed: HTTP {exc.code} {exc.read()[:200]!r}") from exc
+
+
+async def _login_via_api(role):
+    mobile, password = credentials_for(role)
+    body = await asyncio.to_thread(_post_login, mobile, password)
+    user_role = (body.get("user") or {}).get("role", role)
+    return _state_for_token(body["token"], user_role.lower())
+
+
+async def _login_via_ui(browser, role):
+    mobile, password = credentials_for(role)
+    context = await browser.new_context()
+    try:
+        page = await context.new_page()
+        await page.goto(f"{BASE_URL}/login")
+        await locate(page, "login.mobile").fill(mobile)
+        await locate(page, "login.password").fill(password)
+        await locate(page, "login.submit").click()
+        await page.wait_for_function("() => !!localStorage.getItem('auth-token')", timeout=30000)
+        return await context.storage_state()
+    finally:
+        await context.close()
+
+
+async def storage_state(browser, role, mode=None):
+    """Return the path of a fresh storage-state file for ``role``, logging in if needed.
+
+    Concurrent callers for the same role in one process share one login;
+    separate processes (harness.shard workers) may each log in, and the last
+    complete file wins.
+    """
+    path = state_path(role)
+    if is_fresh(path):
+        return str(path)
+    lock = _locks.setdefault(role, asyncio.Lock())
+    async with lock:
+        if is_fresh(path):
+            return str(path)
+        if (mode or AUTH_MODE) == "ui":
+            state = await _login_via_ui(browser, role)
+        else:
+            state = await _login_via_api(role)
+        STATE_DIR.mkdir(parents=True, exist_ok=True)
+        # A temp file per writer: shard workers refresh the same role concurrently
+        with tempfile.NamedTemporaryFile("w", dir=STATE_DIR, prefix=f"{role}.", suffix=".tmp",
+                                         delete=False) as tmp:
+            tmp.write(json.dumps(state))
+        os.replace(tmp.name, path)
+    return str(path)
+
+
+def clear(role=None):
+    """Drop cached states for ``role`` (or every role)."""
+    paths = [state_path(role)] if role else STATE_DIR.glob("*.json")
+    for path in paths:
+        path.unlink(missing_ok=True)
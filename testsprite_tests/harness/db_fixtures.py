@@ -0,0 +1,187 @@
+"""Seeded local Postgres with a template snapshot restored per case.
+
+Point the app at a local database instead of Neon, build the template once,
+then restore it before each data-dependent case::
+
+    export TESTSPRITE_DATABASE_URL=postgresql://postgres@localhost:5432/postgres
+    python -m harness.db_fixtures build      # schema + migrations + COPY seed -> template
+    python -m harness.db_fixtures restore    # fresh nexacare_test from the template
+    # start the server with DATABASE_URL=<printed URL>, then
+    python -m harness.runner --reset-db
+
+``build`` creates the schema from ``shared/schema.ts`` (``drizzle-kit
+push``), applies ``drizzle/*.sql`` in order (statements that find their
+object already present are skipped, as ``server/db.ts`` does at boot) and
+bulk-loads ``test-data-export.json`` with ``COPY``. ``restore`` is a
+``CREATE DATABASE ... TEMPLATE``, a file-level copy that takes well under a
+second at this size. Needs ``psycopg`` (v3).
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from urllib.parse import urlparse, urlunparse
+
+from harness.session import TESTS_DIR
+
+try:
+    import psycopg
+    from psycopg import sql
+except ImportError:  # pragma: no cover - optional dependency
+    psycopg = None
+
+REPO_ROOT = TESTS_DIR.parent
+SEED_PATH = REPO_ROOT / "test-data-export.json"
+MIGRATIONS_DIR = REPO_ROOT / "drizzle"
+
+ADMIN_URL = os.environ.get("TESTSPRITE_DATABASE_URL", "postgresql://postgres@localhost:5432/postgres")
+TEST_DB = os.environ.get("TESTSPRITE_TEST_DB", "nexacare_test")
+TEMPLATE_DB = f"{TEST_DB}_template"
+
+# Export section -> table, in foreign-key order
+SEED_TABLES = (
+    ("users", "users"),
+    ("hospitals", "hospitals"),
+    ("labs", "labs"),
+    ("doctors", "doctors"),
+    ("patients", "patients"),
+    ("receptionists", "receptionists"),
+)
+
+# SQLSTATEs meaning "already there": duplicate table/column/object/schema, invalid table definition on re-add
+_ALREADY_EXISTS = {"42P07", "42701", "42710", "42P06", "42P16"}
+
+_CAMEL_RE = re.compile(r"(?<!^)(?=[A-Z])")
+
+
+def database_url(dbname, base=ADMIN_URL):
+    parsed = urlparse(base)
+    return urlunparse(parsed._replace(path=f"/{dbname}"))
+
+
+def _require_driver():
+    if psycopg is None:
+        raise SystemExit("harness.db_fixtures needs psycopg: pip install 'psycopg[binary]'")
+
+
+def _admin():
+    return psycopg.connect(ADMIN_URL, autocommit=True)
+
+
+def _recreate(conn, dbname, template=None):
+    conn.execute(sql.SQL("DROP DATABASE IF EXISTS {} WITH (FORCE)").format(sql.Identifier(dbname)))
+    if template:
+        conn.execute(sql.SQL("CREATE DATABASE {} TEMPLATE {}").format(sql.Identifier(dbname), sql.Identifier(template)))
+    else:
+        conn.execute(sql.SQL("CREATE DATABASE {}").format(sql.Identifier(dbname)))
+
+
+def _push_schema(url):
+    """Create tables from shared/schema.ts; the 0000 migration is a deliberate no-op."""
+    subprocess.run(["npx", "drizzle-kit", "push", "--force"], cwd=REPO_ROOT, check=True,
+                   env={**os.environ, "DATABASE_URL": url})
+
+
+def _migration_statements(path):
+    text = path.read_text()
+    parts = text.split("--> statement-breakpoint") if "--> statement-breakpoint" in text else [text]
+    return [part.strip() for part in parts if part.strip()]
+
+
+def _apply_migrations(conn):
+    applied = skipped = 0
+    for path in sorted(MIGRATIONS_DIR.glob("*.sql")):
+        for statement in _migration_statements(path):
+            try:
+                with conn.transaction():
+                    conn.execute(statement)
+                applied += 1
+            except psycopg.Error as exc:
+                if exc.sqlstate not in _ALREADY_EXISTS:
+                    raise RuntimeError(f"{path.name}: {exc}") from exc
+                skipped += 1
+    return applied, skipped
+
+
+def _columns(conn, table):
+    rows = conn.execute(
+        "SELECT column_name FROM information_schema.columns WHERE table_schema = 'public' AND table_name = %s",
+        (table,),
+    ).fetchall()
+    return {row[0] for row in rows}
+
+
+def _cell(value):
+    return json.dumps(value) if isinstance(value, (dict, list)) else value
+
+
+def _seed(conn):
+    data = json.loads(SEED_PATH.read_text())
+    counts = {}
+    for section, table in SEED_TABLES:
+        rows = data[section]["all"] if isinstance(data[section], dict) else data[section]
+        if not rows:
+            continue
+        existing = _columns(conn, table)
+        keys = [k for k in rows[0] if _CAMEL_RE.sub("_", k).lower() in existing]
+        columns = [_CAMEL_RE.sub("_", k).lower() for k in keys]
+        copy_sql = sql.SQL("COPY {} ({}) FROM STDIN").format(
+            sql.Identifier(table), sql.SQL(", ").join(map(sql.Identifier, columns)))
+        with conn.cursor() as cur, cur.copy(copy_sql) as copy:
+            for row in rows:
+                copy.write_row([_cell(row.get(k)) for k in keys])
+        if "id" in columns:
+            conn.execute(sql.SQL("SELECT setval(pg_get_serial_sequence({}, 'id'), (SELECT max(id) FROM {}))").format(
+                sql.Literal(table), sql.Identifier(table)))
+        counts[table] = len(rows)
+    return counts
+
+
+def build():
+    """(Re)build the template database: schema, migrations, bulk seed."""
+    _require_driver()
+    t0 = time.perf_counter()
+    with _admin() as admin:
+        # A template database cannot be dropped until it is unmarked
+        if admin.execute("SELECT 1 FROM pg_database WHERE datname = %s", (TEMPLATE_DB,)).fetchone():
+            admin.execute(sql.SQL("ALTER DATABASE {} IS_TEMPLATE false").format(sql.Identifier(TEMPLATE_DB)))
+        _recreate(admin, TEMPLATE_DB)
+    url = database_url(TEMPLATE_DB)
+    _push_schema(url)
+    with psycopg.connect(url, autocommit=True) as conn:
+        applied, skipped = _apply_migrations(conn)
+        with conn.transaction():
+            counts = _seed(conn)
+    with _admin() as admin:
+        admin.execute(sql.SQL("ALTER DATABASE {} IS_TEMPLATE true").format(sql.Identifier(TEMPLATE_DB)))
+    print(f"Template {TEMPLATE_DB} built in {time.perf_counter() - t0:.1f}s "
+          f"({applied} migration statements, {skipped} already present; seeded {counts})")
+
+
+def restore():
+    """Replace the test database with a fresh copy of the template; returns seconds taken."""
+    _require_driver()
+    t0 = time.perf_counter()
+    with _admin() as admin:
+        _recreate(admin, TEST_DB, template=TEMPLATE_DB)
+    return time.perf_counter() - t0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or restore the seeded test database.")
+    parser.add_argument("command", choices=("build", "restore", "url"))
+    args = parser.parse_args(argv)
+    if args.command == "build":
+        build()
+        print("Restore with: python -m harness.db_fixtures restore")
+    elif args.command == "restore":
+        print(f"Restored {TEST_DB} in {restore() * 1000:.0f} ms")
+    print(f"DATABASE_URL={database_url(TEST_DB)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
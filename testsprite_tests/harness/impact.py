@@ -0,0 +1,259 @@
+"""Change-based test selection for the TC scripts.
+
+The runner records, per case, which ``/api`` endpoints and client routes it
+touched (``tmp/network_traces.json``). From those traces this module builds
+a map from each case to the source files behind them:
+
+* ``/api/<prefix>`` -> the router mounted there in ``server/routes/index.ts``
+  -> every server file it transitively imports;
+* a client route -> the page component registered in ``client/src/App.tsx``
+  -> every client file it transitively imports.
+
+The map is cached in ``tmp/impact_map.json`` and rebuilt only when the
+traces change. ``python -m harness.impact`` then turns a git diff into the
+list of cases worth rerunning (``--run`` runs them)::
+
+    python -m harness.impact --base origin/main
+    python -m harness.impact --base HEAD~1 --run -j 4
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from urllib.parse import urlparse
+
+from harness.session import TESTS_DIR
+
+REPO_ROOT = TESTS_DIR.parent
+TRACES_PATH = TESTS_DIR / "tmp" / "network_traces.json"
+MAP_PATH = TESTS_DIR / "tmp" / "impact_map.json"
+
+# Changes here can affect every case.
+GLOBAL_FILES = {
+    "package.json",
+    "client/package.json",
+    "client/vite.config.ts",
+    "client/index.html",
+    "client/src/main.tsx",
+    "client/src/App.tsx",
+    "server/index.ts",
+    "server/routes/index.ts",
+    "shared/schema.ts",
+}
+GLOBAL_PREFIXES = ("testsprite_tests/harness/",)
+
+IMPORT_RE = re.compile(r"""(?:import|export)\s[^'"]*?from\s+['"]([^'"]+)['"]|import\(\s*['"]([^'"]+)['"]\s*\)""")
+MOUNT_RE = re.compile(r"""app\.use\(\s*["'](/api/[^"']*)["']\s*,\s*(\w+)\s*\)""")
+DEFAULT_IMPORT_RE = re.compile(r"""import\s+(\w+)\s+from\s+['"]([^'"]+)['"]""")
+ROUTE_RE = re.compile(r"""<Route\s+path=["']([^"']+)["']\s+component=\{(\w+)\}""")
+SOURCE_SUFFIXES = (".ts", ".tsx", ".js", ".jsx")
+ID_SEGMENT_RE = re.compile(r"/\d+(?=/|$)")
+
+
+def normalise_api_path(url):
+    """``http://host/api/opd-queue/12/call?x=1`` -> ``/api/opd-queue/:id/call``."""
+    return ID_SEGMENT_RE.sub("/:id", urlparse(url).path)
+
+
+class NetworkTrace:
+    """Collects the ``/api`` paths and client routes one browser context touches."""
+
+    def __init__(self):
+        self.api = set()
+        self.routes = set()
+
+    def attach(self, context):
+        context.on("request", self._on_request)
+        context.on("page", lambda page: page.on("framenavigated", self._on_navigated))
+        return self
+
+    def _on_request(self, request):
+        path = urlparse(request.url).path
+        if path.startswith("/api/"):
+            self.api.add(normalise_api_path(request.url))
+
+    def _on_navigated(self, frame):
+        if frame.parent_frame is None:
+            self.routes.add(urlparse(frame.url).path or "/")
+
+    def as_dict(self):
+        return {"api": sorted(self.api), "routes": sorted(self.routes)}
+
+
+def save_traces(traces, path=TRACES_PATH):
+    """Merge ``{case_id: NetworkTrace or its as_dict()}`` into the traces file (other cases are kept).
+
+    Call it from one process: harness.shard collects every worker's traces
+    and saves them once in the parent.
+    """
+    data = load_traces(path)
+    data.update({case_id: trace.as_dict() if isinstance(trace, NetworkTrace) else trace
+                 for case_id, trace in traces.items()})
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile("w", dir=path.parent, prefix=f"{path.stem}.", suffix=".tmp",
+                                     delete=False) as tmp:
+        tmp.write(json.dumps(data, indent=2, sort_keys=True) + "\n")
+    os.replace(tmp.name, path)
+
+
+def load_traces(path=TRACES_PATH):
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def _resolve(spec, importer):
+    """Resolve a relative or aliased import to a repo-relative source path, if local."""
+    if spec.startswith("."):
+        base = (importer.parent / spec).resolve()
+    elif spec.startswith("@shared/"):
+        base = REPO_ROOT / "shared" / spec[len("@shared/"):]
+    elif spec.startswith("@/"):
+        root = "client/src" if importer.is_relative_to(REPO_ROOT / "client") else "server"
+        base = REPO_ROOT / root / spec[2:]
+    else:
+        return None
+    # "./queue.service.js" is compiled-output style; the source is queue.service.ts
+    stem = base.with_suffix("") if base.suffix in SOURCE_SUFFIXES else base
+    for candidate in [base, *(stem.with_name(stem.name + s) for s in SOURCE_SUFFIXES),
+                      *(stem / f"index{s}" for s in SOURCE_SUFFIXES)]:
+        if candidate.is_file():
+            return candidate
+    return None
+
+
+def import_closure(entry, cache):
+    """Repo-relative paths of ``entry`` and every local module it transitively imports."""
+    seen, stack = set(), [entry]
+    while stack:
+        path = stack.pop()
+        if path in seen:
+            continue
+        seen.add(path)
+        if path not in cache:
+            try:
+                text = path.read_text(errors="ignore")
+            except OSError:
+                text = ""
+            cache[path] = [p for m in IMPORT_RE.finditer(text)
+                           if (p := _resolve(m.group(1) or m.group(2), path))]
+        stack.extend(cache[path])
+    return {str(p.relative_to(REPO_ROOT)) for p in seen}
+
+
+def _mounted_routers():
+    """``[(api_prefix, router_file)]`` longest prefix first, from ``server/routes/index.ts``."""
+    index = REPO_ROOT / "server" / "routes" / "index.ts"
+    text = index.read_text()
+    imports = {name: _resolve(spec, index) for name, spec in DEFAULT_IMPORT_RE.findall(text)}
+    mounts = [(prefix.rstrip("/"), imports.get(name)) for prefix, name in MOUNT_RE.findall(text)]
+    return sorted([(p, f) for p, f in mounts if f], key=lambda m: len(m[0]), reverse=True)
+
+
+def _client_pages():
+    """``[(route_path, page_file)]`` from the ``<Route>`` table in ``client/src/App.tsx``."""
+    app = REPO_ROOT / "client" / "src" / "App.tsx"
+    text = app.read_text()
+    imports = {name: _resolve(spec, app) for name, spec in DEFAULT_IMPORT_RE.findall(text)}
+    return [(path, imports[name]) for path, name in ROUTE_RE.findall(text) if imports.get(name)]
+
+
+def _route_matches(pattern, path):
+    regex = "^" + re.sub(r":\w+", "[^/]+", pattern.rstrip("/") or "/") + "/?$"
+    return re.match(regex, path) is not None
+
+
+def build_map(traces):
+    routers = _mounted_routers()
+    pages = _client_pages()
+    cache = {}
+    mapping = {}
+    for case_id, trace in sorted(traces.items()):
+        files = set()
+        for api_path in trace.get("api", []):
+            router = next((f for prefix, f in routers if api_path == prefix or api_path.startswith(prefix + "/")), None)
+            if router:
+                files |= import_closure(router, cache)
+        for route in trace.get("routes", []):
+            for pattern, page in pages:
+                if _route_matches(pattern, route):
+                    files |= import_closure(page, cache)
+        mapping[case_id] = sorted(files)
+    return mapping
+
+
+def _digest(path):
+    try:
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+    except OSError:
+        return None
+
+
+def load_map(traces_path=TRACES_PATH, map_path=MAP_PATH):
+    """Return ``{case_id: [files]}``, rebuilding the cache only if the traces changed."""
+    digest = _digest(traces_path)
+    try:
+        cached = json.loads(map_path.read_text())
+        if cached.get("tracesDigest") == digest:
+            return cached["cases"]
+    except (OSError, ValueError, KeyError):
+        pass
+    cases = build_map(load_traces(traces_path))
+    map_path.parent.mkdir(parents=True, exist_ok=True)
+    map_path.write_text(json.dumps({"tracesDigest": digest, "cases": cases}, indent=2) + "\n")
+    return cases
+
+
+def changed_files(base="HEAD"):
+    """Files changed between ``base`` and the working tree (including untracked)."""
+    def git(*args):
+        return subprocess.run(["git", *args], cwd=REPO_ROOT, capture_output=True, text=True, check=True).stdout.split()
+    return sorted(set(git("diff", "--name-only", base)) | set(git("ls-files", "--others", "--exclude-standard")))
+
+
+def select_cases(changed, mapping, all_ids):
+    """Case ids affected by ``changed`` files; cases with no trace are always selected."""
+    if any(f in GLOBAL_FILES or f.startswith(GLOBAL_PREFIXES) for f in changed):
+        return sorted(all_ids)
+    changed = set(changed)
+    selected = {cid for cid in all_ids if cid not in mapping}
+    for cid, files in mapping.items():
+        if changed.intersection(files):
+            selected.add(cid)
+    for f in changed:
+        name = Path(f).name
+        if f.startswith("testsprite_tests/") and name[:5] in all_ids:
+            selected.add(name[:5])
+    return sorted(selected & set(all_ids))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Select TC cases affected by a git diff.")
+    parser.add_argument("--base", default="HEAD", help="git revision to diff against (default HEAD)")
+    parser.add_argument("--run", action="store_true", help="run the selected cases with harness.runner")
+    parser.add_argument("-j", "--jobs", type=int, default=4, help="concurrency when running (default 4)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    from harness.runner import discover_cases
+
+    all_ids = [case.case_id for case in discover_cases()]
+    changed = changed_files(args.base)
+    selected = select_cases(changed, load_map(), all_ids)
+    print(f"{len(changed)} changed file(s) -> {len(selected)}/{len(all_ids)} case(s): {' '.join(selected) or '-'}")
+    if args.run and selected:
+        from harness import runner
+        return runner.main([*selected, "-j", str(args.jobs)])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
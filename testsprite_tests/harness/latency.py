@@ -0,0 +1,174 @@
+"""Per-endpoint API latency and page-load timing for a Playwright page.
+
+``LatencyRecorder`` hooks ``page.on("request")``/``page.on("requestfinished")``
+and the browser's Navigation/Resource Timing entries, groups samples by the
+patterns in ``perf_thresholds.json`` and checks p50/p95/p99 against them.
+``write_report`` emits stable, sorted JSON so two releases can be diffed.
+"""
+import fnmatch
+import json
+import math
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from urllib.parse import urlparse
+
+from harness.session import BASE_URL, TESTS_DIR
+
+THRESHOLDS_PATH = TESTS_DIR / "perf_thresholds.json"
+REPORT_PATH = TESTS_DIR / "tmp" / "latency_report.json"
+
+PERCENTILES = (50, 95, 99)
+
+
+def load_thresholds(path=THRESHOLDS_PATH):
+    config = json.loads(Path(path).read_text())
+    return {"endpoints": config.get("endpoints", {}), "pages": config.get("pages", {})}
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile; ``None`` for an empty sample."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def _summarise(samples, budget=None):
+    summary = {
+        "count": len(samples),
+        "max": round(max(samples), 1) if samples else None,
+    }
+    for pct in PERCENTILES:
+        value = percentile(samples, pct)
+        summary[f"p{pct}"] = round(value, 1) if value is not None else None
+    if budget:
+        summary["budget"] = budget
+        summary["violations"] = [
+            f"p{pct} {summary[f'p{pct}']}ms > {budget[f'p{pct}']}ms"
+            for pct in PERCENTILES
+            if f"p{pct}" in budget and summary[f"p{pct}"] is not None and summary[f"p{pct}"] > budget[f"p{pct}"]
+        ]
+    return summary
+
+
+@dataclass
+class LatencyRecorder:
+    """Collects timings from one page; call ``attach`` before driving it."""
+
+    thresholds: dict = field(default_factory=load_thresholds)
+    api_samples: dict = field(default_factory=dict)
+    page_samples: dict = field(default_factory=dict)
+    ttfb_samples: dict = field(default_factory=dict)
+    failures: list = field(default_factory=list)
+    _started: dict = field(default_factory=dict, repr=False)
+
+    def attach(self, page):
+        page.on("request", self._on_request)
+        page.on("requestfinished", self._on_finished)
+        page.on("requestfailed", self._on_failed)
+        return self
+
+    def endpoint_key(self, path):
+        """The configured pattern owning ``path``, or ``path`` itself if none matches."""
+        for pattern in self.thresholds["endpoints"]:
+            if fnmatch.fnmatchcase(path, pattern):
+                return pattern
+        return path
+
+    @staticmethod
+    def _api_path(url):
+        path = urlparse(url).path
+        return path if path.startswith("/api/") else None
+
+    def _on_request(self, request):
+        if self._api_path(request.url):
+            self._started[request] = time.perf_counter()
+
+    def _on_finished(self, request):
+        path = self._api_path(request.url)
+        started = self._started.pop(request, None)
+        if not path or started is None:
+            return
+        # Prefer the browser's own timing (request start to last byte) over
+        # wall clock, which also includes Python event-loop delay.
+        timing = request.timing or {}
+        elapsed = timing.get("responseEnd", -1)
+        if elapsed is None or elapsed < 0:
+            elapsed = (time.perf_counter() - started) * 1000
+        self.api_samples.setdefault(self.endpoint_key(path), []).append(elapsed)
+
+    def _on_failed(self, request):
+        path = self._api_path(request.url)
+        self._started.pop(request, None)
+        if path:
+            self.failures.append({"endpoint": self.endpoint_key(path), "error": request.failure})
+
+    async def measure_page_load(self, page, path, wait_until="networkidle", timeout=30000):
+        """Navigate to ``path`` and record its load time under that path.
+
+        Uses the Navigation Timing entry (``loadEventEnd``) when the browser
+        provides one, plus wall time until ``wait_until`` so the SPA's own
+        ``/api`` waterfall is included.
+        """
+        t0 = time.perf_counter()
+        await page.goto(f"{BASE_URL}{path}", wait_until=wait_until, timeout=timeout)
+        wall_ms = (time.perf_counter() - t0) * 1000
+        nav = await page.evaluate(
+            "() => { const [n] = performance.getEntriesByType('navigation');"
+            " return n ? {load: n.loadEventEnd, dcl: n.domContentLoadedEventEnd} : null; }"
+        )
+        self.page_samples.setdefault(path, []).append(max(wall_ms, (nav or {}).get("load") or 0))
+        return wall_ms
+
+    async def collect_resource_timing(self, page):
+        """Record time-to-first-byte per endpoint from the Resource Timing buffer.
+
+        This separates server wait from transfer time for the same requests
+        the hooks timed end to end.
+        """
+        # Clear the buffer as we read it so repeated calls never double count.
+        entries = await page.evaluate(
+            "() => { const out = performance.getEntriesByType('resource')"
+            ".filter(e => e.initiatorType === 'fetch' || e.initiatorType === 'xmlhttprequest')"
+            ".map(e => ({name: e.name, ttfb: e.responseStart - e.requestStart}));"
+            " performance.clearResourceTimings(); return out; }"
+        )
+        for entry in entries:
+            path = self._api_path(entry["name"])
+            if path and entry["ttfb"] > 0:
+                self.ttfb_samples.setdefault(self.endpoint_key(path), []).append(entry["ttfb"])
+
+    def report(self):
+        endpoints = {
+            key: _summarise(samples, self.thresholds["endpoints"].get(key))
+            for key, samples in sorted(self.api_samples.items())
+        }
+        for key, samples in self.ttfb_samples.items():
+            if key in endpoints:
+                endpoints[key]["ttfb"] = _summarise(samples)
+        pages = {
+            key: _summarise(samples, self.thresholds["pages"].get(key))
+            for key, samples in sorted(self.page_samples.items())
+        }
+        violations = [
+            f"{kind} {key}: {violation}"
+            for kind, group in (("endpoint", endpoints), ("page", pages))
+            for key, summary in group.items()
+            for violation in summary.get("violations", [])
+        ]
+        return {
+            "baseUrl": BASE_URL,
+            "endpoints": endpoints,
+            "pages": pages,
+            "failedRequests": self.failures,
+            "violations": violations,
+        }
+
+    def write_report(self, path=REPORT_PATH):
+        report = self.report()
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(report, indent=2, sort_keys=True) + "\n")
+        return report
@@ -0,0 +1,287 @@
+"""Headless HTTP load generator for the Express API.
+
+Usage (from ``testsprite_tests/``, needs ``aiohttp``)::
+
+    python -m harness.loadgen --users 500 --duration 120
+    python -m harness.loadgen --users 50 --mix queue_poll=70,slots=30 --allow-writes
+
+Virtual receptionists and doctors log in with the seeded accounts
+(``tmp/config.json`` plus ``ALL_USER_CREDENTIALS.json``) and replay a
+weighted mix of OPD check-in, queue polling, slot lookup and billing calls
+over one pooled connector. Each virtual user only draws the scenarios its
+account's role is authorized for, so check-ins come from the front desk. The report has per-route throughput, error rate
+and a latency histogram, written to ``tmp/load_report.json``.
+"""
+import argparse
+import asyncio
+import bisect
+import json
+import random
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from pathlib import Path
+
+from harness import auth_state
+from harness.latency import PERCENTILES, percentile
+from harness.session import BASE_URL, TESTS_DIR
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - optional dependency
+    aiohttp = None
+
+CREDENTIALS_PATH = TESTS_DIR.parent / "ALL_USER_CREDENTIALS.json"
+REPORT_PATH = TESTS_DIR / "tmp" / "load_report.json"
+
+# Upper bounds (ms) of the latency histogram buckets; the last is open-ended.
+HISTOGRAM_BOUNDS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+# Default mix, roughly what a morning OPD looks like: screens poll the queue,
+# booking looks up slots, the front desk checks patients in and bills.
+DEFAULT_MIX = {"queue_poll": 55, "slots": 25, "billing": 12, "check_in": 8}
+
+# Scenarios that change data; skipped unless --allow-writes.
+WRITE_SCENARIOS = {"check_in"}
+
+# Roles the route behind each scenario authorizes (server/routes); anyone else gets a 403,
+# which would be counted as an error.
+SCENARIO_ROLES = {
+    "queue_poll": {"RECEPTIONIST", "DOCTOR", "HOSPITAL", "ADMIN"},
+    "slots": {"RECEPTIONIST", "DOCTOR", "HOSPITAL", "ADMIN"},
+    "billing": {"RECEPTIONIST", "DOCTOR", "HOSPITAL", "ADMIN"},
+    "check_in": {"RECEPTIONIST", "ADMIN"},
+}
+
+
+@dataclass
+class RouteStats:
+    latencies_ms: list = field(default_factory=list)
+    errors: int = 0
+    statuses: dict = field(default_factory=dict)
+
+    def add(self, status, elapsed_ms):
+        self.latencies_ms.append(elapsed_ms)
+        self.statuses[str(status)] = self.statuses.get(str(status), 0) + 1
+        if not isinstance(status, int) or status >= 400:
+            self.errors += 1
+
+    def histogram(self):
+        counts = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+        for value in self.latencies_ms:
+            counts[bisect.bisect_left(HISTOGRAM_BOUNDS_MS, value)] += 1
+        labels = [f"<={b}ms" for b in HISTOGRAM_BOUNDS_MS] + [f">{HISTOGRAM_BOUNDS_MS[-1]}ms"]
+        return dict(zip(labels, counts))
+
+    def summary(self, elapsed_s):
+        count = len(self.latencies_ms)
+        result = {
+            "requests": count,
+            "throughputRps": round(count / elapsed_s, 2) if elapsed_s else 0,
+            "errors": self.errors,
+            "errorRate": round(self.errors / count, 4) if count else 0,
+            "statuses": self.statuses,
+            "histogram": self.histogram(),
+        }
+        for pct in PERCENTILES:
+            value = percentile(self.latencies_ms, pct)
+            result[f"p{pct}"] = round(value, 1) if value is not None else None
+        return result
+
+
+@dataclass
+class Targets:
+    """Ids the scenarios pick from, discovered once from the API before the run."""
+
+    doctor_ids: list
+    appointment_ids: list
+    dates: list
+
+
+class LoadRun:
+    def __init__(self, session, targets, mix, think_ms):
+        self.session = session
+        self.targets = targets
+        self.mix = mix
+        self.think_ms = think_ms
+        self.stats = {}
+
+    def scenarios_for(self, role):
+        """Weighted scenario names ``role`` may run (empty if none)."""
+        return [name for name in self.mix if role in SCENARIO_ROLES[name] for _ in range(self.mix[name])]
+
+    async def _request(self, route, method, path, token, **kwargs):
+        headers = {"Authorization": f"Bearer {token}"}
+        t0 = time.perf_counter()
+        try:
+            async with self.session.request(method, f"{BASE_URL}{path}", headers=headers, **kwargs) as response:
+                await response.read()
+                status = response.status
+        except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+            status = type(exc).__name__
+        self.stats.setdefault(route, RouteStats()).add(status, (time.perf_counter() - t0) * 1000)
+
+    async def queue_poll(self, token):
+        doctor_id = random.choice(self.targets.doctor_ids)
+        await self._request("GET /api/opd-queue/doctor/:doctorId/date/:date", "GET",
+                            f"/api/opd-queue/doctor/{doctor_id}/date/{date.today().isoformat()}", token)
+
+    async def slots(self, token):
+        doctor_id = random.choice(self.targets.doctor_ids)
+        day = random.choice(self.targets.dates)
+        await self._request("GET /api/availability/doctor/:doctorId/slots/:date", "GET",
+                            f"/api/availability/doctor/{doctor_id}/slots/{day}", token)
+
+    async def billing(self, token):
+        await self._request("GET /api/billing/opd/invoices", "GET", "/api/billing/opd/invoices", token)
+
+    async def check_in(self, token):
+        if not self.targets.appointment_ids:
+            return
+        appointment_id = random.choice(self.targets.appointment_ids)
+        await self._request("POST /api/opd-queue/check-in", "POST", "/api/opd-queue/check-in", token,
+                            json={"appointmentId": appointment_id})
+
+    async def virtual_user(self, account, deadline):
+        role, token = account
+        scenarios = self.scenarios_for(role)
+        while time.monotonic() < deadline:
+            await getattr(self, random.choice(scenarios))(token)
+            if self.think_ms:
+                await asyncio.sleep(random.expovariate(1000 / self.think_ms))
+
+
+def load_users(roles=("receptionists", "doctors")):
+    """Seeded ``(mobile, password)`` pairs for the given credential groups."""
+    users = []
+    try:
+        data = json.loads(CREDENTIALS_PATH.read_text())
+        for role in roles:
+            users += [(u["mobileNumber"], u.get("password", data.get("universalPassword")))
+                      for u in data["credentials"].get(role, [])]
+    except (OSError, ValueError, KeyError):
+        pass
+    if not users:
+        users = [auth_state.credentials_for(role) for role in ("receptionist", "doctor", "hospital")]
+    return users
+
+
+async def login(session, mobile, password):
+    """``(ROLE, token)`` for a seeded account, or None if it cannot log in."""
+    async with session.post(f"{BASE_URL}/api/auth/login",
+                            json={"mobileNumber": mobile, "password": password}) as response:
+        if response.status != 200:
+            return None
+        body = await response.json()
+    role = ((body.get("user") or {}).get("role") or "").upper()
+    return (role, body["token"]) if body.get("token") else None
+
+
+async def discover_targets(session, token, days):
+    """Read doctor and appointment ids visible to one front-desk user."""
+    async with session.get(f"{BASE_URL}/api/appointments/my",
+                           headers={"Authorization": f"Bearer {token}"}) as response:
+        appointments = await response.json() if response.status == 200 else []
+    doctor_ids = sorted({a["doctorId"] for a in appointments if a.get("doctorId")})
+    appointment_ids = [a["id"] for a in appointments if a.get("status") in ("confirmed", "pending")]
+    today = date.today()
+    dates = [(today + timedelta(days=i)).isoformat() for i in range(days)]
+    return Targets(doctor_ids or [1], appointment_ids, dates)
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        try:
+            mix[name] = int(weight or 1)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"weight for {name!r} is not an integer: {weight!r}") from None
+        if mix[name] < 1:
+            raise argparse.ArgumentTypeError(f"weight for {name!r} must be at least 1")
+    unknown = set(mix) - set(DEFAULT_MIX)
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown scenario(s): {', '.join(sorted(unknown))}")
+    return mix
+
+
+async def run_load(users, duration_s, mix, think_ms, pool_size, days):
+    connector = aiohttp.TCPConnector(limit=pool_size)
+    timeout = aiohttp.ClientTimeout(total=30)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        logins = [a for a in await asyncio.gather(*(login(session, m, p) for m, p in load_users())) if a]
+        if not logins:
+            raise RuntimeError(f"No seeded user could log in at {BASE_URL}")
+        for name in mix:
+            if not any(role in SCENARIO_ROLES[name] for role, _ in logins):
+                print(f"No logged-in account is authorized for {name}; it will not run", file=sys.stderr)
+        # Virtual users cycle through the accounts that have something to run
+        accounts = [(role, token) for role, token in logins if any(role in SCENARIO_ROLES[name] for name in mix)]
+        if not accounts:
+            raise RuntimeError("No logged-in account is authorized for any scenario in the mix")
+        front_desk = next((token for role, token in accounts if role == "RECEPTIONIST"), accounts[0][1])
+        targets = await discover_targets(session, front_desk, days)
+
+        run = LoadRun(session, targets, mix, think_ms)
+        started = time.monotonic()
+        deadline = started + duration_s
+        await asyncio.gather(*(run.virtual_user(accounts[i % len(accounts)], deadline) for i in range(users)))
+        elapsed = time.monotonic() - started
+
+    routes = {route: stats.summary(elapsed) for route, stats in sorted(run.stats.items())}
+    total = sum(r["requests"] for r in routes.values())
+    return {
+        "baseUrl": BASE_URL,
+        "virtualUsers": users,
+        "loggedInAccounts": len(accounts),
+        "durationS": round(elapsed, 1),
+        "mix": mix,
+        "totalRequests": total,
+        "throughputRps": round(total / elapsed, 2) if elapsed else 0,
+        "routes": routes,
+    }
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Replay OPD traffic against the API and report capacity.")
+    parser.add_argument("--users", type=int, default=100, help="concurrent virtual users (default 100)")
+    parser.add_argument("--duration", type=float, default=60, help="seconds to run (default 60)")
+    parser.add_argument("--mix", type=parse_mix, help="scenario weights, e.g. queue_poll=70,slots=30")
+    parser.add_argument("--think-ms", type=float, default=500, help="mean think time between requests (default 500)")
+    parser.add_argument("--pool", type=int, default=200, help="max pooled connections (default 200)")
+    parser.add_argument("--days", type=int, default=7, help="slot lookups span this many days from today")
+    parser.add_argument("--allow-writes", action="store_true", help="include data-changing scenarios (check-in)")
+    parser.add_argument("--out", default=str(REPORT_PATH), help="report path")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if aiohttp is None:
+        print("harness.loadgen needs aiohttp: pip install aiohttp", file=sys.stderr)
+        return 2
+    mix = dict(args.mix or DEFAULT_MIX)
+    if not args.allow_writes:
+        mix = {name: weight for name, weight in mix.items() if name not in WRITE_SCENARIOS}
+    if not mix:
+        print("Scenario mix is empty.", file=sys.stderr)
+        return 2
+
+    report = asyncio.run(run_load(args.users, args.duration, mix, args.think_ms, args.pool, args.days))
+    out = Path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2, sort_keys=True) + "\n")
+
+    print(f"{report['totalRequests']} requests in {report['durationS']}s "
+          f"({report['throughputRps']} req/s, {args.users} users)")
+    for route, stats in report["routes"].items():
+        print(f"  {route:<55} {stats['requests']:>7} req  {stats['throughputRps']:>7} rps  "
+              f"p50 {stats['p50']}ms  p95 {stats['p95']}ms  p99 {stats['p99']}ms  "
+              f"err {stats['errorRate']:.1%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
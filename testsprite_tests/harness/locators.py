@@ -0,0 +1,95 @@
+"""Named locator registry for the TC scripts.
+
+Scripts ask for ``locate(frame, "login.mobile")`` instead of carrying
+absolute XPath chains. Entries use role, label, title, placeholder, form
+id or text selectors, which Playwright resolves without walking the whole DOM and
+which survive Ant Design layout changes; a renamed control fails fast with
+a clear "not found" instead of a 5 s timeout on a stale path.
+"""
+import difflib
+import re
+import weakref
+from collections import namedtuple
+
+# kind: css | role | label | title | placeholder | text | testid; options go to the matching get_by_* call
+Spec = namedtuple("Spec", "kind value options", defaults=({},))
+
+REGISTRY = {
+    # Login page (client/src/pages/auth/login.tsx). antd puts the Form.Item id on the wrapping
+    # <div style="position: relative">, not the input, so fields go by placeholder; only one
+    # form is rendered at a time, so the shared mobile placeholder is unambiguous.
+    "login.password_tab": Spec("role", "button", {"name": "Password", "exact": True}),
+    "login.otp_tab": Spec("role", "button", {"name": "OTP", "exact": True}),
+    "login.mobile": Spec("placeholder", "Enter 10-digit mobile number"),
+    "login.password": Spec("placeholder", "Enter your password"),
+    "login.submit": Spec("css", "#password-login button[type=submit]"),
+    "login.register": Spec("text", "Register here"),
+    "otp.mobile": Spec("placeholder", "Enter 10-digit mobile number"),
+    "otp.send": Spec("css", "#send-otp button[type=submit]"),
+    # OTPInput (client/src/components/common/OTPInput.tsx) ignores the id; this is the first digit box
+    "otp.code": Spec("css", "#verify-otp input.otp-digit-input"),
+    "otp.verify": Spec("css", "#verify-otp button[type=submit]"),
+
+    # Registration (client/src/pages/auth/register-with-role.tsx)
+    "register.role.hospital": Spec("text", "I manage a Hospital"),
+    "register.full_name": Spec("label", "Full Name"),
+    "register.email": Spec("label", "Email"),
+    "register.mobile": Spec("label", "Mobile Number"),
+    "register.password": Spec("label", "Password", {"exact": True}),
+    "register.confirm_password": Spec("label", "Confirm Password"),
+    "register.submit": Spec("role", "button", {"name": "Complete Registration"}),
+
+    # Hospital sidebar (client/src/components/layout/HospitalSidebar.tsx); icon buttons carry a title
+    "sidebar.profile": Spec("title", "Profile"),
+    "sidebar.dashboard": Spec("title", "Dashboard"),
+    "sidebar.patients": Spec("title", "Patients"),
+    "sidebar.messages": Spec("title", "Messages"),
+    "sidebar.revenue": Spec("title", "Revenue"),
+    "sidebar.staff": Spec("title", "Staff management"),
+    "sidebar.logout": Spec("title", "Logout"),
+
+    # Hospital dashboard (client/src/pages/dashboards/hospital-dashboard.tsx)
+    "dashboard.tab.appointments": Spec("role", "tab", {"name": "Appointments"}),
+    "dashboard.tab.ipd": Spec("role", "tab", {"name": "IPD Management"}),
+    "dashboard.upcoming.view_all": Spec("role", "button", {"name": "View All"}),
+    "appointments.filter.completed": Spec("text", re.compile(r"^Completed \(\d+\)$")),
+    "appointments.first_row": Spec("css", "table tbody tr.ant-table-row"),
+}
+
+_cache = weakref.WeakKeyDictionary()
+
+
+def _build(frame, spec):
+    if spec.kind == "css":
+        return frame.locator(spec.value)
+    if spec.kind == "role":
+        return frame.get_by_role(spec.value, **spec.options)
+    if spec.kind == "label":
+        return frame.get_by_label(spec.value, **spec.options)
+    if spec.kind == "title":
+        return frame.get_by_title(spec.value, **spec.options)
+    if spec.kind == "placeholder":
+        return frame.get_by_placeholder(spec.value, **spec.options)
+    if spec.kind == "text":
+        return frame.get_by_text(spec.value, **spec.options)
+    if spec.kind == "testid":
+        return frame.get_by_test_id(spec.value)
+    raise ValueError(f"Unknown locator kind {spec.kind!r}")
+
+
+def locate(frame, name):
+    """Return the (first) element registered as ``name`` within ``frame``.
+
+    Locators are lazy, so the cached object stays valid across re-renders and
+    navigations of the same page; it is rebuilt only for a new page/frame.
+    """
+    try:
+        spec = REGISTRY[name]
+    except KeyError:
+        close = difflib.get_close_matches(name, REGISTRY, n=3)
+        hint = f" (did you mean {', '.join(close)}?)" if close else ""
+        raise KeyError(f"No locator registered as {name!r}{hint}") from None
+    per_frame = _cache.setdefault(frame, {})
+    if name not in per_frame:
+        per_frame[name] = _build(frame, spec).first
+    return per_frame[name]
@@ -0,0 +1,166 @@
+"""Record/replay of same-origin network traffic for the TC scripts.
+
+Set ``TESTSPRITE_NETWORK`` before running a script or the runner:
+
+* ``record`` - requests to ``BASE_URL`` go to the live app through
+  ``context.route`` and every response (``/api`` calls, the SPA document and
+  its assets) is saved to ``tmp/network_archive/<case>.json.gz`` when the
+  context closes, along with the storage state the case started with;
+* ``replay`` - the archive is loaded into memory and every request is
+  fulfilled from it, so no Express server, Vite or Neon database is needed
+  and latency is deterministic;
+* ``live`` (default) - no interception.
+
+Requests are matched on method, path with query string and a hash of the
+request body. Repeats of the same request are served in recorded order
+(the last response is reused once exhausted). URLs that embed the current
+date will miss on a later day; record again when the fixtures move.
+"""
+import base64
+import gzip
+import hashlib
+import json
+import os
+import sys
+import time
+from urllib.parse import urlparse
+
+from playwright import async_api
+
+from harness.session import BASE_URL, TESTS_DIR
+
+ARCHIVE_DIR = TESTS_DIR / "tmp" / "network_archive"
+
+MODES = ("live", "record", "replay")
+
+# Hop-by-hop or encoding headers that no longer describe the stored (decoded) body
+_DROP_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection", "keep-alive", "date"}
+
+_loaded = {}
+
+
+def network_mode():
+    mode = os.environ.get("TESTSPRITE_NETWORK", "live").lower()
+    if mode not in MODES:
+        raise ValueError(f"TESTSPRITE_NETWORK must be one of {', '.join(MODES)}, not {mode!r}")
+    return mode
+
+
+def archive_path(case_id):
+    return ARCHIVE_DIR / f"{case_id or 'adhoc'}.json.gz"
+
+
+def request_key(method, url, post_data):
+    parsed = urlparse(url)
+    target = parsed.path + (f"?{parsed.query}" if parsed.query else "")
+    body_hash = hashlib.sha1(post_data).hexdigest()[:16] if post_data else ""
+    return f"{method} {target} {body_hash}"
+
+
+class Archive:
+    def __init__(self, case_id, storage_state=None, entries=None):
+        self.case_id = case_id
+        self.storage_state = storage_state
+        self.entries = entries or {}
+        self._cursor = {}
+        self.misses = []
+
+    @classmethod
+    def load(cls, case_id):
+        """Read (once per process) the archive for ``case_id``."""
+        if case_id not in _loaded:
+            path = archive_path(case_id)
+            if not path.exists():
+                raise FileNotFoundError(f"No network archive for {case_id}; run it with TESTSPRITE_NETWORK=record first")
+            with gzip.open(path, "rt") as fh:
+                data = json.load(fh)
+            _loaded[case_id] = cls(case_id, data.get("storageState"), data["entries"])
+        archive = _loaded[case_id]
+        archive._cursor = {}
+        return archive
+
+    def save(self):
+        path = archive_path(self.case_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "version": 1,
+            "case": self.case_id,
+            "baseUrl": BASE_URL,
+            "recordedAt": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "storageState": self.storage_state,
+            "entries": self.entries,
+        }
+        with gzip.open(path, "wt") as fh:
+            json.dump(data, fh, separators=(",", ":"))
+
+    def add(self, key, status, headers, body):
+        self.entries.setdefault(key, []).append({
+            "status": status,
+            "headers": {k: v for k, v in headers.items() if k.lower() not in _DROP_HEADERS},
+            "body": base64.b64encode(body).decode(),
+        })
+
+    def next_response(self, key):
+        responses = self.entries.get(key)
+        if not responses:
+            return None
+        index = self._cursor.get(key, 0)
+        self._cursor[key] = index + 1
+        return responses[min(index, len(responses) - 1)]
+
+
+async def install(context, case_id, mode, storage_state=None):
+    """Route ``context``'s same-origin traffic for ``mode``; no-op when live."""
+    if mode == "live":
+        return None
+
+    if mode == "record":
+        state = None
+        if storage_state:
+            state = json.loads(open(storage_state).read()) if isinstance(storage_state, str) else storage_state
+        archive = Archive(case_id, state)
+
+        async def handle(route, request):
+            try:
+                response = await route.fetch()
+                body = await response.body()
+            except async_api.Error:
+                await route.abort()
+                return
+            archive.add(request_key(request.method, request.url, request.post_data_buffer),
+                        response.status, response.headers, body)
+            await route.fulfill(response=response, body=body)
+
+        context.on("close", lambda _: archive.save())
+    else:
+        archive = Archive.load(case_id)
+
+        async def handle(route, request):
+            key = request_key(request.method, request.url, request.post_data_buffer)
+            recorded = archive.next_response(key)
+            if recorded is None:
+                archive.misses.append(key)
+                is_api = urlparse(request.url).path.startswith("/api/")
+                await route.fulfill(
+                    status=404,
+                    content_type="application/json" if is_api else "text/plain",
+                    body=json.dumps({"message": f"Not recorded: {key}"}) if is_api else f"Not recorded: {key}",
+                )
+                return
+            await route.fulfill(status=recorded["status"], headers=recorded["headers"],
+                                body=base64.b64decode(recorded["body"]))
+
+        def report_misses(_):
+            if archive.misses:
+                print(f"[replay] {case_id}: {len(archive.misses)} request(s) not in archive, "
+                      f"e.g. {archive.misses[0]}", file=sys.stderr)
+
+        context.on("close", report_misses)
+
+    await context.route(f"{BASE_URL}/**", handle)
+    return archive
+
+
+def recorded_storage_state(case_id):
+    """Storage state captured with the recording, so replay needs no live login."""
+    return Archive.load(case_id).storage_state
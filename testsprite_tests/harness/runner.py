@@ -0,0 +1,188 @@
+"""Run every TC script inside one shared Chromium.
+
+Usage (from ``testsprite_tests/``)::
+
+    python -m harness.runner                 # all cases, 4 at a time
+    python -m harness.runner -j 8 TC001 TC009
+
+Each case gets its own isolated ``BrowserContext``; at most ``--jobs``
+cases run at once, so a full pass costs one browser cold start and is
+bounded by the slowest case rather than the sum of all of them.
+"""
+import argparse
+import asyncio
+import importlib.util
+import json
+import re
+import sys
+import time
+import traceback
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from playwright import async_api
+
+from harness import auth_state, db_fixtures, tracing
+from harness.impact import NetworkTrace, save_traces
+from harness.session import TESTS_DIR, current_case, launch_browser, new_case_context
+from harness.waits import WAIT_LOG
+
+CASE_FILE_RE = re.compile(r"^(TC\d{3})_(.+)\.py$")
+
+
+@dataclass
+class Case:
+    case_id: str
+    title: str
+    path: Path
+
+
+@dataclass
+class CaseResult:
+    case_id: str
+    title: str
+    status: str
+    duration_s: float
+    error: str = ""
+    started_at: float = field(default=0.0, repr=False)
+
+
+def discover_cases(ids=None, tests_dir=TESTS_DIR):
+    """Return the TC scripts in ``tests_dir`` ordered by id, optionally filtered."""
+    wanted = {i.upper() for i in ids} if ids else None
+    cases = []
+    for path in sorted(tests_dir.glob("TC*.py")):
+        match = CASE_FILE_RE.match(path.name)
+        if not match:
+            continue
+        case_id, slug = match.groups()
+        if wanted and case_id not in wanted:
+            continue
+        cases.append(Case(case_id, slug.replace("_", " "), path))
+    return cases
+
+
+def load_case_module(case):
+    """Import a TC script as a module and check it exposes an async ``run_test``."""
+    if str(TESTS_DIR) not in sys.path:
+        sys.path.insert(0, str(TESTS_DIR))
+    spec = importlib.util.spec_from_file_location(f"testsprite_{case.case_id.lower()}", case.path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    if not asyncio.iscoroutinefunction(getattr(module, "run_test", None)):
+        raise TypeError(f"{case.path.name} does not define an async run_test()")
+    return module
+
+
+async def run_case(browser, case, semaphore, traces):
+    async with semaphore:
+        current_case.set(case.case_id)
+        started = time.time()
+        t0 = time.perf_counter()
+        context = None
+        try:
+            module = load_case_module(case)
+            context = await new_case_context(browser, role=getattr(module, "AUTH_ROLE", None))
+            traces[case.case_id] = NetworkTrace().attach(context)
+            await module.run_test(context)
+            status, error = "PASSED", ""
+        except Exception as exc:  # noqa: BLE001 - any failure is a case failure
+            status = "FAILED"
+            error = f"{type(exc).__name__}: {exc}\n{traceback.format_exc(limit=5)}"
+        finally:
+            if context:
+                try:
+                    await context.close()
+                except async_api.Error:
+                    pass
+        result = CaseResult(case.case_id, case.title, status, round(time.perf_counter() - t0, 3), error, started)
+        print(f"[{result.status}] {case.case_id} {case.title} ({result.duration_s:.1f}s, "
+              f"{WAIT_LOG.total_ms(case.case_id) / 1000:.1f}s waiting)", flush=True)
+        return result
+
+
+async def run_cases(cases, jobs=4, reset_db=False, traces=None):
+    """Run ``cases`` in one browser with at most ``jobs`` in flight; results keep input order.
+
+    With ``reset_db``, cases whose script sets ``FRESH_DB = True`` run first,
+    one at a time, each on a database freshly restored from the seeded
+    template; the rest then run concurrently as usual.
+
+    Network traces are saved for harness.impact, unless a ``traces`` dict is
+    passed: they are then collected into it for the caller to save.
+    """
+    semaphore = asyncio.Semaphore(max(1, jobs))
+    save = traces is None
+    traces = {} if save else traces
+    fresh = []
+    if reset_db:
+        fresh = [case for case in cases if getattr(load_case_module(case), "FRESH_DB", False)]
+    async with async_api.async_playwright() as pw:
+        browser = await launch_browser(pw, shared=True)
+        try:
+            results = {}
+            serial = asyncio.Semaphore(1)
+            for case in fresh:
+                elapsed = await asyncio.to_thread(db_fixtures.restore)
+                print(f"[reset-db] {case.case_id}: database restored in {elapsed * 1000:.0f} ms", flush=True)
+                results[case.case_id] = await run_case(browser, case, serial, traces)
+            rest = [case for case in cases if case.case_id not in results]
+            for result in await asyncio.gather(*(run_case(browser, case, semaphore, traces) for case in rest)):
+                results[result.case_id] = result
+            return [results[case.case_id] for case in cases]
+        finally:
+            await browser.close()
+            # Feeds harness.impact's case -> source file map
+            if save:
+                save_traces(traces)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Run TestSprite TC scripts in one shared browser.")
+    parser.add_argument("cases", nargs="*", help="case ids to run (e.g. TC001 TC009); default all")
+    parser.add_argument("-j", "--jobs", type=int, default=4, help="cases to run concurrently (default 4)")
+    parser.add_argument("--json", dest="json_path", help="write per-case results to this JSON file")
+    parser.add_argument("--reset-db", action="store_true",
+                        help="restore the seeded test database before each FRESH_DB case (harness.db_fixtures)")
+    parser.add_argument("--refresh-auth", action="store_true", help="discard cached logins before running")
+    parser.add_argument("--waits", dest="waits_path", help="write every recorded wait to this JSONL file")
+    parser.add_argument("--trace", nargs="?", const=str(tracing.SPANS_PATH), dest="trace_path",
+                        help="record per-step spans to this JSONL file (default tmp/trace_spans.jsonl)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    cases = discover_cases(args.cases)
+    if not cases:
+        print("No matching TC scripts found.", file=sys.stderr)
+        return 2
+
+    if args.refresh_auth:
+        auth_state.clear()
+    if args.trace_path:
+        tracing.install()
+
+    t0 = time.perf_counter()
+    results = asyncio.run(run_cases(cases, args.jobs, reset_db=args.reset_db))
+    wall = time.perf_counter() - t0
+
+    failed = [r for r in results if r.status != "PASSED"]
+    print(f"\n{len(results) - len(failed)}/{len(results)} passed in {wall:.1f}s "
+          f"(serial sum {sum(r.duration_s for r in results):.1f}s, jobs={args.jobs})")
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps([asdict(r) for r in results], indent=2))
+    if WAIT_LOG.records:
+        print("\nSlowest waits:")
+        for record in WAIT_LOG.slowest(5):
+            print(f"  {record.duration_ms:>8.0f} ms  {record.case} {record.kind} {record.target}")
+    if args.waits_path:
+        WAIT_LOG.write_jsonl(args.waits_path)
+    if args.trace_path:
+        tracing.SPAN_LOG.write_jsonl(args.trace_path)
+        print(f"Spans written to {args.trace_path} (python -m harness.tracing chrome ... to view)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
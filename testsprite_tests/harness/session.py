@@ -0,0 +1,100 @@
+"""Browser and context lifecycle shared by the TC scripts and the runner."""
+import re
+import sys
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from playwright import async_api
+
+BASE_URL = "http://localhost:3000"
+
+TESTS_DIR = Path(__file__).resolve().parent.parent
+
+# Default per-action timeout the generated scripts were written against
+DEFAULT_TIMEOUT_MS = 5000
+
+# Id of the TC case running in the current asyncio task; the runner sets it so
+# recorders shared across concurrent cases can attribute what they record.
+current_case = ContextVar("current_case", default=None)
+
+BROWSER_ARGS = [
+    "--window-size=1280,720",         # Set the browser window size
+    "--disable-dev-shm-usage",        # Avoid using /dev/shm which can cause issues in containers
+    "--ipc=host",                     # Use host-level IPC for better stability
+]
+
+
+async def launch_browser(pw, shared=False):
+    """Launch headless Chromium.
+
+    A standalone script keeps ``--single-process`` as before; a browser
+    shared by several concurrent contexts must not, or one crashing
+    renderer takes every case down with it.
+    """
+    args = list(BROWSER_ARGS)
+    if not shared:
+        args.append("--single-process")
+    return await pw.chromium.launch(headless=True, args=args)
+
+
+async def new_case_context(browser, role=None, **options):
+    """Create an isolated context (like an incognito window) for one case.
+
+    With ``role`` set the context starts signed in as that role from the
+    cached storage state (see ``harness.auth_state``). ``TESTSPRITE_NETWORK``
+    switches on recording or offline replay (see ``harness.replay``).
+    """
+    from harness import auth_state, replay
+
+    mode = replay.network_mode()
+    case_id = current_case.get()
+    if role and "storage_state" not in options:
+        if mode == "replay":
+            options["storage_state"] = replay.recorded_storage_state(case_id)
+        else:
+            options["storage_state"] = await auth_state.storage_state(browser, role)
+    context = await browser.new_context(**options)
+    context.set_default_timeout(DEFAULT_TIMEOUT_MS)
+    await replay.install(context, case_id, mode, options.get("storage_state"))
+    return context
+
+
+@asynccontextmanager
+async def case_context(context=None, role=None):
+    """Yield the context a TC script should run in.
+
+    When the runner hands in a context it is used as-is and left for the
+    runner to close. Otherwise a private Playwright/Chromium/context is
+    started and torn down around the script, matching the old standalone
+    behaviour.
+    """
+    if context is not None:
+        yield context
+        return
+
+    # A script run directly is still "its" case, so archives and logs line up with runner runs
+    script = Path(sys.argv[0]).name
+    if current_case.get() is None and re.match(r"TC\d{3}_", script):
+        current_case.set(script[:5])
+
+    from harness import tracing
+
+    if tracing.enabled():
+        tracing.install()
+
+    pw = await async_api.async_playwright().start()
+    browser = None
+    context = None
+    try:
+        browser = await launch_browser(pw)
+        context = await new_case_context(browser, role=role)
+        yield context
+    finally:
+        if context:
+            await context.close()
+        if browser:
+            await browser.close()
+        await pw.stop()
+        if tracing.enabled():
+            tracing.SPAN_LOG.write_jsonl(append=True)
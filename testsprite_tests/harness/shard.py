@@ -0,0 +1,169 @@
+"""Split the frontend test plan across worker processes, one browser each.
+
+Usage (from ``testsprite_tests/``)::
+
+    python -m harness.shard -k 4            # 4 processes, 2 cases at a time in each
+    python -m harness.shard -k 8 -j 1 --dry-run
+
+Cases come from ``testsprite_frontend_test_plan.json``. Shards are balanced
+(longest-processing-time first) on the ``duration`` each case took in the
+previous ``tmp/test_results.json``; cases without one are estimated from
+their step count. Results are merged back into ``tmp/test_results.json`` in
+the same schema, so existing tooling keeps reading it.
+"""
+import argparse
+import asyncio
+import heapq
+import json
+import multiprocessing
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+from datetime import datetime, timezone
+
+from harness.impact import save_traces
+from harness.runner import discover_cases, run_cases
+from harness.session import TESTS_DIR
+
+PLAN_PATH = TESTS_DIR / "testsprite_frontend_test_plan.json"
+RESULTS_PATH = TESTS_DIR / "tmp" / "test_results.json"
+
+# Fallback estimate for a case with no recorded duration: seconds per plan step.
+SECONDS_PER_STEP = 8.0
+
+
+def load_plan(path=PLAN_PATH):
+    return json.loads(path.read_text())
+
+
+def load_results(path=RESULTS_PATH):
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return []
+
+
+def result_case_id(entry):
+    """``"TC001-Password-based ..."`` -> ``"TC001"``."""
+    return entry.get("title", "").split("-", 1)[0]
+
+
+def previous_durations(results):
+    return {
+        result_case_id(entry): float(entry["duration"])
+        for entry in results
+        if isinstance(entry.get("duration"), (int, float))
+    }
+
+
+def estimate_durations(plan, results):
+    """Recorded duration per case, else steps x the observed (or default) per-step rate."""
+    known = previous_durations(results)
+    steps = {case["id"]: max(1, len(case.get("steps", []))) for case in plan}
+    rates = [known[cid] / steps[cid] for cid in known if cid in steps]
+    per_step = statistics.median(rates) if rates else SECONDS_PER_STEP
+    return {cid: known.get(cid, n * per_step) for cid, n in steps.items()}
+
+
+def balance(case_ids, durations, shards):
+    """Greedy LPT assignment: longest case first onto the least-loaded shard."""
+    heap = [(0.0, i, []) for i in range(max(1, min(shards, len(case_ids))))]
+    for cid in sorted(case_ids, key=lambda c: durations.get(c, 0.0), reverse=True):
+        load, i, members = heapq.heappop(heap)
+        members.append(cid)
+        heapq.heappush(heap, (load + durations.get(cid, 0.0), i, members))
+    return [(load, sorted(members)) for load, _, members in sorted(heap, key=lambda s: s[1])]
+
+
+def run_shard(case_ids, jobs):
+    """Worker entry point: run one shard in this process's own browser.
+
+    Returns ``(results, traces)``; the parent saves every shard's traces in one write.
+    """
+    cases = discover_cases(case_ids)
+    traces = {}
+    results = asyncio.run(run_cases(cases, jobs, traces=traces))
+    return [asdict(result) for result in results], {cid: trace.as_dict() for cid, trace in traces.items()}
+
+
+def merge_results(existing, plan, shard_results):
+    """Fold fresh results into the ``test_results.json`` list, keeping entry order and ids."""
+    now = datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+    by_id = {result_case_id(entry): entry for entry in existing}
+    plan_by_id = {case["id"]: case for case in plan}
+    merged = list(existing)
+    for result in shard_results:
+        cid = result["case_id"]
+        entry = by_id.get(cid)
+        if entry is None:
+            case = plan_by_id.get(cid, {})
+            entry = {
+                "title": f"{cid}-{case.get('title', result['title'])}",
+                "description": case.get("description", ""),
+                "testType": "FRONTEND",
+                "createFrom": "harness",
+                "created": now,
+            }
+            by_id[cid] = entry
+            merged.append(entry)
+        script = next(iter(discover_cases([cid])), None)
+        if script is not None:
+            entry["code"] = script.path.read_text()
+        entry["testStatus"] = result["status"]
+        entry["testError"] = result["error"]
+        entry["duration"] = result["duration_s"]
+        entry["modified"] = now
+    return merged
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Run the frontend test plan sharded across processes.")
+    parser.add_argument("-k", "--shards", type=int, default=multiprocessing.cpu_count(),
+                        help="worker processes, each with its own browser (default: CPU count)")
+    parser.add_argument("-j", "--jobs", type=int, default=2, help="concurrent cases inside each shard (default 2)")
+    parser.add_argument("--dry-run", action="store_true", help="print the shard plan and exit")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    plan = load_plan()
+    existing = load_results()
+    available = {case.case_id for case in discover_cases()}
+    case_ids = [case["id"] for case in plan if case["id"] in available]
+    missing = [case["id"] for case in plan if case["id"] not in available]
+    if missing:
+        print(f"Plan cases without a script (skipped): {', '.join(missing)}", file=sys.stderr)
+    if not case_ids:
+        print("No runnable cases in the plan.", file=sys.stderr)
+        return 2
+
+    shards = balance(case_ids, estimate_durations(plan, existing), args.shards)
+    for i, (load, members) in enumerate(shards):
+        print(f"shard {i}: ~{load:.0f}s  {' '.join(members)}")
+    if args.dry_run:
+        return 0
+
+    t0 = time.perf_counter()
+    results, traces = [], {}
+    # spawn, not fork: each worker starts its own Playwright driver from a clean interpreter
+    with ProcessPoolExecutor(len(shards), mp_context=multiprocessing.get_context("spawn")) as pool:
+        for shard_results, shard_traces in pool.map(run_shard, [members for _, members in shards],
+                                                    [args.jobs] * len(shards)):
+            results.extend(shard_results)
+            traces.update(shard_traces)
+
+    save_traces(traces)
+
+    RESULTS_PATH.parent.mkdir(parents=True, exist_ok=True)
+    RESULTS_PATH.write_text(json.dumps(merge_results(existing, plan, results), indent=2) + "\n")
+    failed = [r for r in results if r["status"] != "PASSED"]
+    print(f"\n{len(results) - len(failed)}/{len(results)} passed in {time.perf_counter() - t0:.1f}s "
+          f"across {len(shards)} shard(s); results merged into {RESULTS_PATH.relative_to(TESTS_DIR)}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,391 @@
+"""Soak test for the appointment SSE stream and the presence store.
+
+Usage (from ``testsprite_tests/``, needs ``aiohttp``)::
+
+    python -m harness.sse_soak --clients 2000 --duration 4h --server-pid $(pgrep -f "tsx server")
+    python -m harness.sse_soak --clients 200 --duration 600 --event-interval 2
+
+Opens ``--clients`` concurrent ``GET /api/events/appointments?token=...``
+streams spread over the seeded receptionist, hospital, doctor and patient
+accounts. A front-desk user then fires ``appointment.changed`` events at a
+steady rate by re-applying each appointment's current status
+(``PATCH /api/appointments/:id/status``). That rewrites nothing but
+``confirmedAt`` for confirmed rows, but run it against a test database all
+the same.
+
+What it measures, over hours rather than seconds:
+
+* fan-out latency from the trigger request to each client that got the event
+  (and from the event's ``occurredAt``, i.e. from ``emitAppointmentChanged``)
+* events missed by a client while other clients on the same account got them
+* dropped streams (EOF, errors, no data for ``--stall-s`` on a stream that
+  has been sending keep-alives); dropped clients reconnect, so a leak shows
+  up as a drop rate, not a dead run. A stream that goes quiet without ever
+  sending a keep-alive is reconnected and counted as an idle timeout, not a
+  drop: without keep-alives the tool cannot tell a dead stream from a quiet
+  one.
+* server RSS sampled from ``/proc/<pid>/status`` (``--server-pid``) and its
+  growth in MB/hour
+* presence entries still ``online`` after every stream has closed
+
+The report is written to ``tmp/sse_soak_report.json``.
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+from harness.latency import PERCENTILES, percentile
+from harness.loadgen import load_users
+from harness.session import BASE_URL, TESTS_DIR
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - optional dependency
+    aiohttp = None
+
+REPORT_PATH = TESTS_DIR / "tmp" / "sse_soak_report.json"
+
+STREAM_PATH = "/api/events/appointments"
+
+# Account groups that receive appointment events (patients only see their own).
+CLIENT_GROUPS = ("receptionists", "hospitals", "doctors", "patients")
+
+# The server writes a keep-alive comment every 30s (server/routes/events.routes.ts).
+KEEPALIVE_S = 30
+KEEPALIVE_PREFIX = ":"
+
+
+def parse_duration(text):
+    """Seconds from ``90``, ``90s``, ``15m`` or ``4h``."""
+    units = {"s": 1, "m": 60, "h": 3600}
+    text = text.strip().lower()
+    if text and text[-1] in units:
+        return float(text[:-1]) * units[text[-1]]
+    return float(text)
+
+
+def read_rss_mb(pid):
+    """Resident set size of ``pid`` in MB, or ``None`` if it cannot be read."""
+    try:
+        for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def slope_per_hour(samples):
+    """Least-squares slope of ``[(t_s, value), ...]`` scaled to one hour."""
+    if len(samples) < 2:
+        return None
+    n = len(samples)
+    mean_t = sum(t for t, _ in samples) / n
+    mean_v = sum(v for _, v in samples) / n
+    var = sum((t - mean_t) ** 2 for t, _ in samples)
+    if not var:
+        return None
+    return sum((t - mean_t) * (v - mean_v) for t, v in samples) / var * 3600
+
+
+@dataclass
+class Account:
+    user_id: int
+    role: str
+    token: str
+
+
+@dataclass
+class Client:
+    index: int
+    account: Account
+    connected: bool = False
+    connects: int = 0
+    drops: int = 0
+    idle_timeouts: int = 0
+    received: set = field(default_factory=set)
+
+
+class Soak:
+    def __init__(self, session, accounts, clients, stall_s):
+        self.session = session
+        self.clients = [Client(i, accounts[i % len(accounts)]) for i in range(clients)]
+        self.stall_s = stall_s
+        self.events_fired = 0
+        self.fired = {}  # appointment id -> monotonic time its last trigger was sent
+        self.latency_ms = []
+        self.emit_latency_ms = []
+        self.drop_reasons = {}
+        self.idle_timeouts = 0
+        self.rss_samples = []
+        self.presence_samples = []
+        self.trigger_errors = 0
+        self.started = time.monotonic()
+
+    def _drop(self, client, reason):
+        if client.connected:
+            client.drops += 1
+        client.connected = False
+        self.drop_reasons[reason] = self.drop_reasons.get(reason, 0) + 1
+
+    def _on_event(self, client, evt):
+        if evt.get("type") != "appointment.changed":
+            return
+        key = (evt["appointmentId"], evt.get("occurredAt"))
+        now = time.monotonic()
+        client.received.add(key)
+        sent = self.fired.get(evt["appointmentId"])
+        if sent is not None:
+            self.latency_ms.append((now - sent) * 1000)
+        try:
+            occurred = datetime.fromisoformat(evt["occurredAt"].replace("Z", "+00:00")).timestamp()
+        except (KeyError, ValueError, AttributeError):
+            return
+        self.emit_latency_ms.append((time.time() - occurred) * 1000)
+
+    async def stream(self, client, deadline):
+        """Keep one client connected until ``deadline``, reconnecting on drops."""
+        url = f"{BASE_URL}{STREAM_PATH}"
+        timeout = aiohttp.ClientTimeout(total=None, sock_read=self.stall_s)
+        while time.monotonic() < deadline:
+            keepalive_seen = False
+            try:
+                async with self.session.get(url, params={"token": client.account.token}, timeout=timeout) as response:
+                    if response.status != 200:
+                        self._drop(client, f"http {response.status}")
+                        await asyncio.sleep(random.uniform(1, 5))
+                        continue
+                    client.connected = True
+                    client.connects += 1
+                    async for raw in response.content:
+                        line = raw.decode("utf-8", "replace").strip()
+                        if line.startswith(KEEPALIVE_PREFIX):
+                            keepalive_seen = True
+                        elif line.startswith("data:"):
+                            try:
+                                self._on_event(client, json.loads(line[5:]))
+                            except ValueError:
+                                self.drop_reasons["bad frame"] = self.drop_reasons.get("bad frame", 0) + 1
+                        if time.monotonic() >= deadline:
+                            client.connected = False
+                            return
+                    self._drop(client, "eof")
+            except asyncio.TimeoutError:
+                if client.connected and not keepalive_seen:
+                    # Quiet stream with no keep-alives: cannot tell it from a dead one
+                    client.connected = False
+                    client.idle_timeouts += 1
+                    self.idle_timeouts += 1
+                else:
+                    self._drop(client, "stall")
+            except aiohttp.ClientError as exc:
+                self._drop(client, type(exc).__name__)
+            await asyncio.sleep(random.uniform(0.5, 2))
+
+    async def fire(self, trigger, appointments, interval_s, deadline):
+        """Re-apply appointment statuses round-robin every ``interval_s``."""
+        headers = {"Authorization": f"Bearer {trigger.token}"}
+        i = 0
+        while time.monotonic() < deadline:
+            appointment = appointments[i % len(appointments)]
+            i += 1
+            self.events_fired += 1
+            self.fired[appointment["id"]] = time.monotonic()
+            try:
+                async with self.session.patch(f"{BASE_URL}/api/appointments/{appointment['id']}/status",
+                                              headers=headers, json={"status": appointment["status"]}) as response:
+                    await response.read()
+                    if response.status != 200:
+                        self.trigger_errors += 1
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                self.trigger_errors += 1
+            await asyncio.sleep(interval_s)
+
+    async def sample(self, server_pid, observer, interval_s, deadline):
+        """Record RSS and presence every ``interval_s`` until ``deadline``."""
+        staff_ids = sorted({c.account.user_id for c in self.clients if c.account.role != "PATIENT"})
+        while time.monotonic() < deadline:
+            elapsed = round(time.monotonic() - self.started, 1)
+            if server_pid:
+                rss = read_rss_mb(server_pid)
+                if rss is not None:
+                    self.rss_samples.append((elapsed, round(rss, 1)))
+            online = await presence_online(self.session, observer, staff_ids)
+            connected = sum(1 for c in self.clients if c.connected)
+            self.presence_samples.append({"t": elapsed, "connectedClients": connected, "staffOnline": online})
+            print(f"[{elapsed:>8}s] connected={connected} staffOnline={online} "
+                  f"events={len(self.latency_ms)} drops={sum(c.drops for c in self.clients)}"
+                  + (f" rss={self.rss_samples[-1][1]}MB" if self.rss_samples else ""))
+            await asyncio.sleep(interval_s)
+
+    def missed_events(self):
+        """Events one client on an account saw that another client on it did not.
+
+        Clients sharing an account pass the same server-side filter, so the
+        union of what they received is what each one should have received
+        while it was connected.
+        """
+        by_account = {}
+        for client in self.clients:
+            by_account.setdefault(client.account.token, []).append(client)
+        missed = 0
+        for group in by_account.values():
+            expected = set().union(*(c.received for c in group))
+            # A client that dropped (or reconnected after an idle timeout) can
+            # legitimately miss events sent while it was reconnecting; only
+            # count misses on streams that stayed up.
+            missed += sum(len(expected - c.received) for c in group if not c.drops and not c.idle_timeouts)
+        return missed
+
+
+async def login_account(session, mobile, password):
+    async with session.post(f"{BASE_URL}/api/auth/login",
+                            json={"mobileNumber": mobile, "password": password}) as response:
+        if response.status != 200:
+            return None
+        body = await response.json()
+    user = body.get("user") or {}
+    return Account(user.get("id"), (user.get("role") or "").upper(), body.get("token"))
+
+
+async def presence_online(session, observer, user_ids):
+    """How many of ``user_ids`` the presence store reports as online."""
+    if not user_ids:
+        return 0
+    online = 0
+    headers = {"Authorization": f"Bearer {observer.token}"}
+    # Keep the query string short; presence is looked up per id anyway.
+    for start in range(0, len(user_ids), 100):
+        chunk = ",".join(str(uid) for uid in user_ids[start:start + 100])
+        async with session.get(f"{BASE_URL}/api/presence/users", headers=headers,
+                               params={"userIds": chunk}) as response:
+            if response.status != 200:
+                return None
+            body = await response.json()
+        online += sum(1 for status in body.get("presence", {}).values() if status == "online")
+    return online
+
+
+def _summary(samples):
+    result = {"count": len(samples)}
+    for pct in PERCENTILES:
+        value = percentile(samples, pct)
+        result[f"p{pct}"] = round(value, 1) if value is not None else None
+    result["max"] = round(max(samples), 1) if samples else None
+    return result
+
+
+async def run_soak(clients, duration_s, event_interval_s, sample_interval_s, server_pid, stall_s, connect_rate):
+    connector = aiohttp.TCPConnector(limit=0)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        credentials = load_users(CLIENT_GROUPS)
+        accounts = [a for a in await asyncio.gather(*(login_account(session, m, p) for m, p in credentials))
+                    if a and a.token]
+        front_desk = [a for a in accounts if a.role == "RECEPTIONIST"]
+        if not front_desk:
+            raise RuntimeError(f"No receptionist could log in at {BASE_URL}")
+        trigger = front_desk[0]
+
+        async with session.get(f"{BASE_URL}/api/appointments/my",
+                               headers={"Authorization": f"Bearer {trigger.token}"}) as response:
+            appointments = [a for a in (await response.json() if response.status == 200 else [])
+                            if a.get("id") and a.get("status")]
+        if not appointments:
+            raise RuntimeError("The trigger receptionist has no appointments to fire events for")
+
+        soak = Soak(session, accounts, clients, stall_s)
+        deadline = soak.started + duration_s
+
+        streams = []
+        for client in soak.clients:
+            # Ramp up instead of opening every socket in the same tick.
+            streams.append(asyncio.create_task(soak.stream(client, deadline)))
+            await asyncio.sleep(1 / connect_rate)
+        rss_before_events = read_rss_mb(server_pid) if server_pid else None
+
+        await asyncio.gather(
+            soak.fire(trigger, appointments, event_interval_s, deadline),
+            soak.sample(server_pid, trigger, sample_interval_s, deadline),
+            *streams,
+        )
+        elapsed = time.monotonic() - soak.started
+
+        # Every stream is closed now; the server should have marked them offline.
+        await asyncio.sleep(2)
+        staff_ids = sorted({c.account.user_id for c in soak.clients if c.account.role != "PATIENT"})
+        leaked_presence = await presence_online(session, trigger, staff_ids)
+
+    rss = [value for _, value in soak.rss_samples]
+    return {
+        "baseUrl": BASE_URL,
+        "clients": clients,
+        "accounts": len(accounts),
+        "durationS": round(elapsed, 1),
+        "eventsFired": soak.events_fired,
+        "triggerErrors": soak.trigger_errors,
+        "fanoutLatencyMs": _summary(soak.latency_ms),
+        "emitToClientMs": _summary(soak.emit_latency_ms),
+        "missedEvents": soak.missed_events(),
+        "connects": sum(c.connects for c in soak.clients),
+        "drops": sum(c.drops for c in soak.clients),
+        "dropReasons": dict(sorted(soak.drop_reasons.items())),
+        "idleTimeouts": soak.idle_timeouts,
+        "rssMb": {
+            "afterConnect": round(rss_before_events, 1) if rss_before_events is not None else None,
+            "min": min(rss) if rss else None,
+            "max": max(rss) if rss else None,
+            "last": rss[-1] if rss else None,
+            "growthMbPerHour": round(slope, 2) if (slope := slope_per_hour(soak.rss_samples)) is not None else None,
+            "samples": soak.rss_samples,
+        },
+        "presence": {"leakedOnlineAfterClose": leaked_presence, "samples": soak.presence_samples},
+    }
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Hold many SSE clients open and watch fan-out, drops and memory.")
+    parser.add_argument("--clients", type=int, default=1000, help="concurrent SSE streams (default 1000)")
+    parser.add_argument("--duration", type=parse_duration, default=3600, help="run time, e.g. 600, 30m, 4h (default 1h)")
+    parser.add_argument("--event-interval", type=float, default=5, help="seconds between fired events (default 5)")
+    parser.add_argument("--sample-interval", type=float, default=60, help="seconds between RSS/presence samples")
+    parser.add_argument("--server-pid", type=int, help="pid of the node server, for RSS sampling (Linux)")
+    parser.add_argument("--stall-s", type=float, default=KEEPALIVE_S * 3,
+                        help=f"treat a stream as dropped after this long without data (default {KEEPALIVE_S * 3})")
+    parser.add_argument("--connect-rate", type=float, default=200, help="new streams per second during ramp-up")
+    parser.add_argument("--out", default=str(REPORT_PATH), help="report path")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if aiohttp is None:
+        print("harness.sse_soak needs aiohttp: pip install aiohttp", file=sys.stderr)
+        return 2
+
+    report = asyncio.run(run_soak(args.clients, args.duration, args.event_interval, args.sample_interval,
+                                  args.server_pid, args.stall_s, args.connect_rate))
+    out = Path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2, sort_keys=True) + "\n")
+
+    fanout = report["fanoutLatencyMs"]
+    print(f"{report['clients']} clients for {report['durationS']}s, {report['eventsFired']} events fired")
+    print(f"  fan-out      p50 {fanout['p50']}ms  p95 {fanout['p95']}ms  p99 {fanout['p99']}ms  "
+          f"({fanout['count']} deliveries)")
+    print(f"  drops        {report['drops']} {report['dropReasons']}  missed events {report['missedEvents']}")
+    if report["idleTimeouts"]:
+        print(f"  idle         {report['idleTimeouts']} reconnects after --stall-s with no keep-alive (not counted as drops)")
+    print(f"  rss          {report['rssMb']['min']} -> {report['rssMb']['last']} MB  "
+          f"({report['rssMb']['growthMbPerHour']} MB/h)")
+    print(f"  presence     {report['presence']['leakedOnlineAfterClose']} staff still online after close")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,216 @@
+"""Per-step spans for the TC scripts, labelled by their ``# -> ...`` comments.
+
+``install()`` wraps ``Locator.fill``/``Locator.click``, ``Page.goto`` and the
+``expect(...)`` assertions so every call becomes a timestamped span. The span
+is labelled with the nearest ``# -> ...`` (or ``# --> ...``) comment above
+the calling line in the TC script, so the generated step descriptions double
+as trace labels without editing the scripts. Waits from ``harness.waits``
+are recorded as spans too.
+
+Enable with ``TESTSPRITE_TRACE=1`` for a standalone script or
+``python -m harness.runner --trace`` and find the spans in
+``tmp/trace_spans.jsonl``. Convert them with::
+
+    python -m harness.tracing chrome tmp/trace_spans.jsonl -o tmp/trace.json   # chrome://tracing, Perfetto
+    python -m harness.tracing folded tmp/trace_spans.jsonl -o tmp/trace.folded # flamegraph.pl, speedscope
+"""
+import argparse
+import functools
+import json
+import linecache
+import os
+import re
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from harness.session import TESTS_DIR, current_case
+
+SPANS_PATH = TESTS_DIR / "tmp" / "trace_spans.jsonl"
+
+_SCRIPT_RE = re.compile(r"TC\d{3}_.*\.py$")
+_STEP_RE = re.compile(r"^\s*# -{1,2}> (.+)$")
+
+_installed = False
+_step_cache = {}
+
+
+@dataclass
+class Span:
+    case: str
+    step: str
+    action: str
+    target: str
+    start_us: int
+    duration_ms: float
+    ok: bool
+    line: int
+
+
+class SpanLog:
+    def __init__(self):
+        self.spans = []
+
+    def add(self, span):
+        self.spans.append(span)
+
+    def clear(self):
+        self.spans.clear()
+
+    def write_jsonl(self, path=SPANS_PATH, append=False):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("a" if append else "w") as fh:
+            for span in self.spans:
+                fh.write(json.dumps(asdict(span)) + "\n")
+
+
+SPAN_LOG = SpanLog()
+
+
+def enabled():
+    return _installed or os.environ.get("TESTSPRITE_TRACE", "") not in ("", "0")
+
+
+def _step_label(filename, lineno):
+    """Nearest ``# -> step`` comment at or above ``lineno`` in a TC script."""
+    key = (filename, lineno)
+    if key not in _step_cache:
+        label = ""
+        for n in range(lineno, 0, -1):
+            match = _STEP_RE.match(linecache.getline(filename, n))
+            if match:
+                label = match.group(1).strip()
+                break
+        _step_cache[key] = label
+    return _step_cache[key]
+
+
+def _caller_step():
+    """``(step label, line)`` of the innermost TC-script frame on the stack."""
+    frame = sys._getframe(1)
+    while frame is not None:
+        if _SCRIPT_RE.search(frame.f_code.co_filename):
+            return _step_label(frame.f_code.co_filename, frame.f_lineno), frame.f_lineno
+        frame = frame.f_back
+    return "", 0
+
+
+@contextmanager
+def span(action, target):
+    """Record the enclosed block as one span; a no-op until tracing is enabled."""
+    if not enabled():
+        yield
+        return
+    step, line = _caller_step()
+    start_us = int(time.time() * 1_000_000)
+    t0 = time.perf_counter()
+    ok = False
+    try:
+        yield
+        ok = True
+    finally:
+        SPAN_LOG.add(Span(
+            case=current_case.get() or "",
+            step=step,
+            action=action,
+            target=str(target)[:200],
+            start_us=start_us,
+            duration_ms=round((time.perf_counter() - t0) * 1000, 2),
+            ok=ok,
+            line=line,
+        ))
+
+
+def _wrap(cls, name, action):
+    original = getattr(cls, name)
+    if getattr(original, "_traced", False):
+        return
+
+    @functools.wraps(original)
+    async def traced(self, *args, **kwargs):
+        with span(action, self):
+            return await original(self, *args, **kwargs)
+
+    traced._traced = True
+    setattr(cls, name, traced)
+
+
+def install():
+    """Wrap the Playwright calls the TC scripts make; safe to call more than once."""
+    global _installed
+    from playwright.async_api import Locator, LocatorAssertions, Page, PageAssertions
+
+    _wrap(Locator, "fill", "fill")
+    _wrap(Locator, "click", "click")
+    _wrap(Page, "goto", "goto")
+    for cls in (LocatorAssertions, PageAssertions):
+        for name in dir(cls):
+            if name.startswith("to_") and callable(getattr(cls, name)):
+                _wrap(cls, name, f"assert:{name}")
+    _installed = True
+
+
+def load_spans(path):
+    with open(path) as fh:
+        return [json.loads(line) for line in fh if line.strip()]
+
+
+def to_chrome_trace(spans):
+    """Chrome trace-event JSON: one thread per case, a step span enclosing its actions."""
+    tids = {case: i + 1 for i, case in enumerate(sorted({s["case"] for s in spans}))}
+    events = [{"ph": "M", "name": "thread_name", "pid": 1, "tid": tid, "args": {"name": case or "adhoc"}}
+              for case, tid in tids.items()]
+    by_case = {}
+    for s in sorted(spans, key=lambda s: s["start_us"]):
+        by_case.setdefault(s["case"], []).append(s)
+        events.append({
+            "ph": "X", "pid": 1, "tid": tids[s["case"]], "cat": s["action"].split(":")[0],
+            "name": s["action"], "ts": s["start_us"], "dur": int(s["duration_ms"] * 1000),
+            "args": {"target": s["target"], "line": s["line"], "ok": s["ok"]},
+        })
+    # Consecutive actions under the same step comment form one enclosing step span
+    for case, case_spans in by_case.items():
+        group = []
+        for s in case_spans + [None]:
+            if group and (s is None or s["step"] != group[0]["step"]):
+                start = group[0]["start_us"]
+                end = max(g["start_us"] + int(g["duration_ms"] * 1000) for g in group)
+                events.append({"ph": "X", "pid": 1, "tid": tids[case], "cat": "step",
+                               "name": group[0]["step"] or "(no step)", "ts": start, "dur": end - start})
+                group = []
+            if s is not None:
+                group.append(s)
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def to_folded(spans):
+    """Folded stacks (``case;step;action weight``) in milliseconds for flame graphs."""
+    totals = {}
+    for s in spans:
+        frames = [s["case"] or "adhoc", (s["step"] or "(no step)").replace(";", ","), s["action"]]
+        key = ";".join(frames)
+        totals[key] = totals.get(key, 0.0) + s["duration_ms"]
+    return "".join(f"{key} {max(1, round(ms))}\n" for key, ms in sorted(totals.items()))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export recorded TC spans.")
+    parser.add_argument("format", choices=("chrome", "folded"))
+    parser.add_argument("spans", nargs="?", default=str(SPANS_PATH), help="spans JSONL file")
+    parser.add_argument("-o", "--out", required=True, help="output path")
+    args = parser.parse_args(argv)
+
+    spans = load_spans(args.spans)
+    if args.format == "chrome":
+        Path(args.out).write_text(json.dumps(to_chrome_trace(spans)))
+    else:
+        Path(args.out).write_text(to_folded(spans))
+    print(f"{len(spans)} span(s) -> {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,240 @@
+"""Web Vitals and bundle-cost budgets for every role dashboard.
+
+Each dashboard is loaded signed in (via ``auth_state``) in a fresh context
+with CPU and network throttling applied over CDP, and the following are
+collected once the page settles:
+
+* ``lcp_ms``        largest-contentful-paint start time
+* ``tbt_ms``        total blocking time: sum of (long task - 50ms) after FCP
+* ``js_heap_mb``    ``JSHeapUsedSize`` from ``Performance.getMetrics``
+* ``requests``      every request the page issued, ``api_requests`` for /api
+* ``transfer_kb``   encoded bytes over the wire (``Network.loadingFinished``)
+
+The median of ``--samples`` loads is compared to ``vitals_baseline.json``;
+any metric above ``baseline * (1 + tolerance)`` plus the metric's absolute
+slack is a regression and the command exits non-zero. A measured dashboard
+whose baseline lacks any collected metric also fails, unless
+``--update-baseline`` is given.
+
+Roles without seeded credentials (nurse, pharmacist) are skipped unless an
+account is supplied through ``TESTSPRITE_<ROLE>_MOBILE``.
+
+Usage (from testsprite_tests/, with the dev server on :3000):
+
+    python -m harness.vitals                       # all dashboards
+    python -m harness.vitals doctor hospital       # a subset
+    python -m harness.vitals --update-baseline     # accept current numbers
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+from pathlib import Path
+
+from playwright.async_api import async_playwright
+
+from harness import auth_state
+from harness.session import BASE_URL, TESTS_DIR, launch_browser, new_case_context
+
+BASELINE_PATH = TESTS_DIR / "vitals_baseline.json"
+REPORT_PATH = TESTS_DIR / "tmp" / "vitals_report.json"
+
+# Role -> dashboard route (client/src/App.tsx). "hospital" is the hospital
+# admin; platform admins land on the same dashboard.
+DASHBOARDS = {
+    "patient": "/dashboard/patient",
+    "doctor": "/dashboard/doctor",
+    "receptionist": "/dashboard/receptionist",
+    "nurse": "/dashboard/nurse",
+    "lab": "/dashboard/lab",
+    "pharmacist": "/dashboard/pharmacist",
+    "hospital": "/dashboard/hospital",
+}
+
+METRICS = ("lcp_ms", "tbt_ms", "js_heap_mb", "requests", "api_requests", "transfer_kb")
+
+# Lighthouse's mobile profile: 4x CPU slowdown on a ~1.6Mbps / 150ms RTT link.
+CPU_THROTTLE_RATE = 4
+NETWORK_CONDITIONS = {
+    "offline": False,
+    "latency": 150,
+    "downloadThroughput": 1_600_000 / 8,
+    "uploadThroughput": 750_000 / 8,
+}
+
+# Used when the baseline file has no "tolerance" section.
+DEFAULT_TOLERANCE = {
+    "relative": 0.10,
+    "absolute": {"lcp_ms": 100, "tbt_ms": 50, "js_heap_mb": 2, "requests": 2,
+                 "api_requests": 1, "transfer_kb": 20},
+}
+
+# LCP and long tasks are only observable from inside the page, so record them
+# from the first script that runs in every document.
+_OBSERVER_SCRIPT = """
+(() => {
+  const vitals = window.__vitals = { lcp: 0, fcp: null, longTasks: [] };
+  const observe = (type, cb) => {
+    try { new PerformanceObserver(list => list.getEntries().forEach(cb)).observe({ type, buffered: true }); }
+    catch (e) { /* entry type unsupported */ }
+  };
+  observe('largest-contentful-paint', e => { vitals.lcp = e.renderTime || e.loadTime || e.startTime; });
+  observe('paint', e => { if (e.name === 'first-contentful-paint') vitals.fcp = e.startTime; });
+  observe('longtask', e => vitals.longTasks.push([e.startTime, e.duration]));
+})();
+"""
+
+
+def total_blocking_time(fcp, long_tasks):
+    """Sum of the blocking part (over 50ms) of every long task after FCP."""
+    start = fcp or 0
+    return sum(max(0, duration - 50) for begin, duration in long_tasks if begin >= start)
+
+
+def available_roles(roles=None):
+    """Split ``roles`` into (runnable, skipped) by whether credentials exist."""
+    runnable, skipped = [], []
+    for role in roles or DASHBOARDS:
+        try:
+            auth_state.credentials_for(role)
+        except KeyError:
+            skipped.append(role)
+        else:
+            runnable.append(role)
+    return runnable, skipped
+
+
+async def measure_dashboard(browser, role, settle_ms=2000, timeout=60000):
+    """Load ``role``'s dashboard once under throttling and return its metrics."""
+    # Sign in unthrottled so only the dashboard load itself is measured.
+    context = await new_case_context(browser, role=role)
+    try:
+        page = await context.new_page()
+        await page.add_init_script(_OBSERVER_SCRIPT)
+        cdp = await context.new_cdp_session(page)
+        await cdp.send("Network.enable")
+        await cdp.send("Network.setCacheDisabled", {"cacheDisabled": True})
+        await cdp.send("Network.emulateNetworkConditions", NETWORK_CONDITIONS)
+        await cdp.send("Emulation.setCPUThrottlingRate", {"rate": CPU_THROTTLE_RATE})
+        await cdp.send("Performance.enable")
+
+        urls = {}
+        transferred = [0]
+        cdp.on("Network.requestWillBeSent", lambda e: urls.setdefault(e["requestId"], e["request"]["url"]))
+        cdp.on("Network.loadingFinished", lambda e: transferred.__setitem__(0, transferred[0] + e["encodedDataLength"]))
+
+        await page.goto(f"{BASE_URL}{DASHBOARDS[role]}", wait_until="networkidle", timeout=timeout)
+        # LCP candidates keep arriving until the largest element has painted.
+        await page.wait_for_timeout(settle_ms)
+
+        vitals = await page.evaluate("window.__vitals")
+        metrics = {m["name"]: m["value"] for m in (await cdp.send("Performance.getMetrics"))["metrics"]}
+        api_prefix = f"{BASE_URL}/api/"
+        return {
+            "lcp_ms": round(vitals["lcp"], 1),
+            "tbt_ms": round(total_blocking_time(vitals["fcp"], vitals["longTasks"]), 1),
+            "js_heap_mb": round(metrics.get("JSHeapUsedSize", 0) / 2**20, 2),
+            "requests": len(urls),
+            "api_requests": sum(1 for url in urls.values() if url.startswith(api_prefix)),
+            "transfer_kb": round(transferred[0] / 1024, 1),
+        }
+    finally:
+        await context.close()
+
+
+async def measure(roles, samples=3):
+    """Median of ``samples`` loads per role: ``{role: {metric: value}}``."""
+    results = {}
+    async with async_playwright() as pw:
+        browser = await launch_browser(pw, shared=True)
+        try:
+            for role in roles:
+                runs = [await measure_dashboard(browser, role) for _ in range(samples)]
+                results[role] = {name: statistics.median(run[name] for run in runs) for name in METRICS}
+                print(f"{role:<14}" + "  ".join(f"{name}={results[role][name]}" for name in METRICS))
+        finally:
+            await browser.close()
+    return results
+
+
+def load_baseline(path=BASELINE_PATH):
+    try:
+        return json.loads(Path(path).read_text())
+    except FileNotFoundError:
+        return {}
+
+
+def compare(results, baseline):
+    """Return a list of regressions as ``(role, metric, value, limit)``."""
+    tolerance = baseline.get("tolerance", DEFAULT_TOLERANCE)
+    relative = tolerance.get("relative", 0)
+    absolute = tolerance.get("absolute", {})
+    budgets = baseline.get("dashboards", {})
+    regressions = []
+    for role, values in results.items():
+        for metric, expected in budgets.get(role, {}).items():
+            limit = expected * (1 + relative) + absolute.get(metric, 0)
+            if values.get(metric) is not None and values[metric] > limit:
+                regressions.append((role, metric, values[metric], round(limit, 2)))
+    return regressions
+
+
+def missing_budgets(results, baseline):
+    """Return ``(role, metric)`` pairs that were measured but have no budget to compare against."""
+    budgets = baseline.get("dashboards", {})
+    return [(role, metric) for role, values in results.items() for metric in METRICS
+            if values.get(metric) is not None and metric not in budgets.get(role, {})]
+
+
+def update_baseline(results, path=BASELINE_PATH):
+    baseline = load_baseline(path)
+    baseline.setdefault("tolerance", DEFAULT_TOLERANCE)
+    baseline.setdefault("dashboards", {}).update(results)
+    baseline.pop("_note", None)  # describes the threshold-only starting budgets
+    baseline["dashboards"] = dict(sorted(baseline["dashboards"].items()))
+    Path(path).write_text(json.dumps(baseline, indent=2) + "\n")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Check dashboard Web Vitals against the checked-in baseline.")
+    parser.add_argument("roles", nargs="*", metavar="role",
+                        help=f"dashboards to measure ({', '.join(DASHBOARDS)}); default all")
+    parser.add_argument("-n", "--samples", type=int, default=3, help="loads per dashboard, median is used (default 3)")
+    parser.add_argument("--baseline", default=str(BASELINE_PATH), help="baseline JSON to compare against")
+    parser.add_argument("--update-baseline", action="store_true", help="write the measured values as the new baseline")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    unknown = sorted(set(args.roles) - set(DASHBOARDS))
+    if unknown:
+        parser.error(f"unknown role(s): {', '.join(unknown)}")
+    roles, skipped = available_roles(args.roles or None)
+    for role in skipped:
+        print(f"{role:<14}skipped: no credentials (set TESTSPRITE_{role.upper()}_MOBILE)")
+
+    results = asyncio.run(measure(roles, samples=args.samples))
+    REPORT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    REPORT_PATH.write_text(json.dumps(results, indent=2, sort_keys=True) + "\n")
+
+    if args.update_baseline:
+        update_baseline(results, args.baseline)
+        print(f"Baseline updated: {args.baseline}")
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    # A measured metric with nothing to compare against would pass silently
+    missing = missing_budgets(results, baseline)
+    for role, metric in missing:
+        print(f"MISSING BASELINE {role} {metric} (run with --update-baseline to record one)")
+    regressions = compare(results, baseline)
+    for role, metric, value, limit in regressions:
+        print(f"REGRESSION {role} {metric}: {value} > {limit}")
+    return 1 if regressions or missing else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
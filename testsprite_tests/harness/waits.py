@@ -0,0 +1,139 @@
+"""Condition-based waits to use instead of fixed ``page.wait_for_timeout`` sleeps.
+
+Every wait returns as soon as its condition holds and is recorded in
+``WAIT_LOG`` with how long it actually took, so a run shows where the app
+is slow instead of hiding it behind a flat 3 s pause per step.
+"""
+import json
+import re
+import time
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from urllib.parse import urlparse
+
+from playwright.async_api import expect
+
+from harness import tracing
+from harness.session import current_case
+
+# The app is React 18 on Vite; first render after navigation can take a while,
+# but these are upper bounds, not sleeps.
+ACTIONABLE_TIMEOUT_MS = 15000
+NETWORK_IDLE_TIMEOUT_MS = 15000
+API_TIMEOUT_MS = 15000
+
+
+@dataclass
+class WaitRecord:
+    case: str
+    kind: str
+    target: str
+    duration_ms: float
+    ok: bool
+    at: float
+
+
+class WaitLog:
+    """In-memory list of completed waits across every case in the process."""
+
+    def __init__(self):
+        self.records = []
+
+    def add(self, record):
+        self.records.append(record)
+
+    def clear(self):
+        self.records.clear()
+
+    def slowest(self, n=10):
+        return sorted(self.records, key=lambda r: r.duration_ms, reverse=True)[:n]
+
+    def total_ms(self, case=None):
+        return sum(r.duration_ms for r in self.records if case is None or r.case == case)
+
+    def write_jsonl(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("w") as fh:
+            for record in self.records:
+                fh.write(json.dumps(asdict(record)) + "\n")
+
+
+WAIT_LOG = WaitLog()
+
+
+@asynccontextmanager
+async def _timed(kind, target):
+    started = time.time()
+    t0 = time.perf_counter()
+    ok = False
+    try:
+        with tracing.span(f"wait:{kind}", target):
+            yield
+        ok = True
+    finally:
+        WAIT_LOG.add(WaitRecord(
+            case=current_case.get() or "",
+            kind=kind,
+            target=target[:200],
+            duration_ms=round((time.perf_counter() - t0) * 1000, 1),
+            ok=ok,
+            at=started,
+        ))
+
+
+def _api_matcher(path):
+    """Build a response predicate from an ``/api/...`` prefix or a compiled regex."""
+    if isinstance(path, re.Pattern):
+        return lambda response: bool(path.search(urlparse(response.url).path))
+    return lambda response: urlparse(response.url).path.startswith(path)
+
+
+async def wait_actionable(locator, timeout=ACTIONABLE_TIMEOUT_MS):
+    """Wait until ``locator`` is attached, visible and enabled."""
+    async with _timed("actionable", str(locator)):
+        await locator.wait_for(state="visible", timeout=timeout)
+        await expect(locator).to_be_enabled(timeout=timeout)
+
+
+async def wait_network_idle(page, timeout=NETWORK_IDLE_TIMEOUT_MS):
+    """Wait until the page has had no network traffic for 500 ms.
+
+    Vite's HMR websocket does not count as traffic, so this settles once the
+    SPA has finished its initial ``/api`` calls.
+    """
+    async with _timed("network_idle", page.url):
+        await page.wait_for_load_state("networkidle", timeout=timeout)
+
+
+@asynccontextmanager
+async def expect_api(page, path, status=None, timeout=API_TIMEOUT_MS):
+    """Wrap an action that should trigger an ``/api`` call and wait for its response.
+
+    Usage::
+
+        async with expect_api(page, "/api/auth/login") as info:
+            await submit.click()
+        response = await info.value
+    """
+    matches = _api_matcher(path)
+
+    def predicate(response):
+        return matches(response) and (status is None or response.status == status)
+
+    async with _timed("api", getattr(path, "pattern", path)):
+        async with page.expect_response(predicate, timeout=timeout) as info:
+            yield info
+        await info.value
+
+
+async def wait_for_api(page, path, status=None, timeout=API_TIMEOUT_MS):
+    """Wait for the next response whose path matches ``path`` and return it."""
+    matches = _api_matcher(path)
+    async with _timed("api", getattr(path, "pattern", path)):
+        return await page.wait_for_event(
+            "response",
+            lambda response: matches(response) and (status is None or response.status == status),
+            timeout=timeout,
+        )